@@ -26,7 +26,7 @@ from asyncio import CancelledError
 from asyncio.events import AbstractEventLoop
 from asyncio.tasks import Task
 from traceback import format_exc
-from typing import Any, Optional, Set, Tuple, Union, cast
+from typing import Any, Dict, Optional, Set, Tuple, Union, cast
 
 import aiohttp
 import certifi  # pylint: disable=wrong-import-order
@@ -111,13 +111,27 @@ class HTTPClientAsyncChannel:  # pylint: disable=too-many-instance-attributes
     DEFAULT_EXCEPTION_CODE = (
         600  # custom code to indicate there was exception during request
     )
-
-    def __init__(
+    DEFAULT_CONNECTION_LIMIT = 100
+    # by default, the requests to the same host are bounded by the overall limit only,
+    # and they do not time out while waiting for a connection, as before the pooling
+    DEFAULT_CONNECTION_LIMIT_PER_HOST = 0
+    DEFAULT_DNS_CACHE_TTL = 300  # in seconds
+    DEFAULT_KEEPALIVE_TIMEOUT = 15.0  # in seconds
+    DEFAULT_CONNECT_TIMEOUT: Optional[float] = None  # in seconds, None for no timeout
+    DEFAULT_READ_TIMEOUT = 60.0  # in seconds
+
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         agent_address: Address,
         address: str,
         port: int,
         connection_id: PublicId,
+        connection_limit: int = DEFAULT_CONNECTION_LIMIT,
+        connection_limit_per_host: int = DEFAULT_CONNECTION_LIMIT_PER_HOST,
+        dns_cache_ttl: int = DEFAULT_DNS_CACHE_TTL,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        connect_timeout: Optional[float] = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
     ):
         """
         Initialize an http client channel.
@@ -126,12 +140,28 @@ class HTTPClientAsyncChannel:  # pylint: disable=too-many-instance-attributes
         :param address: server hostname / IP address
         :param port: server port number
         :param connection_id: the id of the connection
+        :param connection_limit: the maximum number of simultaneous connections, 0 for no limit
+        :param connection_limit_per_host: the maximum number of simultaneous connections to the same host, 0 for no limit
+        :param dns_cache_ttl: the time to cache the resolved DNS entries for, in seconds
+        :param keepalive_timeout: the time to keep an idle connection alive for, in seconds
+        :param connect_timeout: the timeout to acquire a connection from the pool, or to establish a new one, in seconds, None for no timeout
+        :param read_timeout: the timeout to read a portion of data from the peer, in seconds
         """
         self.agent_address = agent_address
         self.address = address
         self.port = port
         self.connection_id = connection_id
         self._dialogues = HttpDialogues()
+        self._connection_limit = connection_limit
+        self._connection_limit_per_host = connection_limit_per_host
+        self._dns_cache_ttl = dns_cache_ttl
+        self._keepalive_timeout = keepalive_timeout
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._requests = 0
+        self._connections_created = 0
+        self._connections_reused = 0
 
         self._in_queue = None  # type: Optional[asyncio.Queue]  # pragma: no cover
         self._loop = (
@@ -151,8 +181,57 @@ class HTTPClientAsyncChannel:  # pylint: disable=too-many-instance-attributes
         """
         self._loop = loop
         self._in_queue = asyncio.Queue()
+        self._session = self._create_session()
         self.is_stopped = False
 
+    def _create_session(self) -> aiohttp.ClientSession:
+        """Create the session which is shared by all the requests, so that the connections are pooled and kept alive."""
+        connector = aiohttp.TCPConnector(
+            limit=self._connection_limit,
+            limit_per_host=self._connection_limit_per_host,
+            use_dns_cache=True,
+            ttl_dns_cache=self._dns_cache_ttl,
+            keepalive_timeout=self._keepalive_timeout,
+            ssl=ssl_context,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=None,
+            connect=self._connect_timeout,
+            sock_read=self._read_timeout,
+        )
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_connection_created)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+        return aiohttp.ClientSession(
+            connector=connector, timeout=timeout, trace_configs=[trace_config]
+        )
+
+    async def _on_connection_created(self, *_args: Any) -> None:  # pragma: nocover
+        """Count the new connections."""
+        self._connections_created += 1
+
+    async def _on_connection_reused(self, *_args: Any) -> None:  # pragma: nocover
+        """Count the reused connections."""
+        self._connections_reused += 1
+
+    @property
+    def pool_stats(self) -> Dict[str, int]:
+        """Get the statistics of the connection pool."""
+        stats = {
+            "requests": self._requests,
+            "in_flight": len(self._tasks),
+            "connections_created": self._connections_created,
+            "connections_reused": self._connections_reused,
+            "idle_connections": 0,
+        }
+        if self._session is not None and not self._session.closed:
+            connector = cast(aiohttp.TCPConnector, self._session.connector)
+            stats["idle_connections"] = sum(
+                len(connections)
+                for connections in connector._conns.values()  # pylint: disable=protected-access
+            )
+        return stats
+
     def _get_message_and_dialogue(
         self, envelope: Envelope
     ) -> Tuple[HttpMessage, Optional[HttpDialogue]]:
@@ -231,16 +310,18 @@ class HTTPClientAsyncChannel:  # pylint: disable=too-many-instance-attributes
                 )
             else:
                 headers = None
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method=request_http_message.method,
-                    url=request_http_message.url,
-                    headers=headers,
-                    data=request_http_message.body,
-                    ssl=ssl_context,
-                ) as resp:
-                    await resp.read()
-                return resp
+            if self._session is None:  # pragma: nocover
+                raise ValueError("Channel is not connected")
+            self._requests += 1
+            async with self._session.request(
+                method=request_http_message.method,
+                url=request_http_message.url,
+                headers=headers,
+                data=request_http_message.body,
+                ssl=ssl_context,
+            ) as resp:
+                await resp.read()
+            return resp
         except Exception as e:  # pragma: nocover # pylint: disable=broad-except
             self.logger.debug(
                 f"Exception raised during http call: {request_http_message.method} {request_http_message.url}, {e}"
@@ -368,6 +449,10 @@ class HTTPClientAsyncChannel:  # pylint: disable=too-many-instance-attributes
             self.is_stopped = True
 
             await self._cancel_tasks()
+            if self._session is not None:
+                self.logger.debug(f"HTTP Client pool stats: {self.pool_stats}")
+                await self._session.close()
+                self._session = None
 
 
 class HTTPClientConnection(Connection):
@@ -386,11 +471,31 @@ class HTTPClientConnection(Connection):
         port = cast(int, self.configuration.config.get("port"))
         if host is None or port is None:  # pragma: nocover
             raise ValueError("host and port must be set!")
+        config = self.configuration.config
         self.channel = HTTPClientAsyncChannel(
             self.address,
             host,
             port,
             connection_id=self.connection_id,
+            connection_limit=config.get(
+                "connection_limit", HTTPClientAsyncChannel.DEFAULT_CONNECTION_LIMIT
+            ),
+            connection_limit_per_host=config.get(
+                "connection_limit_per_host",
+                HTTPClientAsyncChannel.DEFAULT_CONNECTION_LIMIT_PER_HOST,
+            ),
+            dns_cache_ttl=config.get(
+                "dns_cache_ttl", HTTPClientAsyncChannel.DEFAULT_DNS_CACHE_TTL
+            ),
+            keepalive_timeout=config.get(
+                "keepalive_timeout", HTTPClientAsyncChannel.DEFAULT_KEEPALIVE_TIMEOUT
+            ),
+            connect_timeout=config.get(
+                "connect_timeout", HTTPClientAsyncChannel.DEFAULT_CONNECT_TIMEOUT
+            ),
+            read_timeout=config.get(
+                "read_timeout", HTTPClientAsyncChannel.DEFAULT_READ_TIMEOUT
+            ),
         )
 
     async def connect(self) -> None:
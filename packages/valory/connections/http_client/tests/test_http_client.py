@@ -137,6 +137,24 @@ class TestHTTPClientConnect:
         await self.http_client_connection.disconnect()
         assert self.http_client_connection.is_connected is False
 
+    @pytest.mark.asyncio
+    async def test_session_is_pooled(self) -> None:
+        """Test that a single pooled session lives from connect until disconnect."""
+        channel = self.http_client_connection.channel
+        await self.http_client_connection.connect()
+        session = channel._session
+        assert session is not None and not session.closed
+        connector = cast(aiohttp.TCPConnector, session.connector)
+        assert connector.limit_per_host == channel._connection_limit_per_host
+        # by default, the requests to the same host are not queued, nor time out while waiting for a connection
+        assert connector.limit_per_host == 0
+        assert session.timeout.connect is None
+        assert channel.pool_stats["requests"] == 0
+
+        await self.http_client_connection.disconnect()
+        assert session.closed
+        assert channel._session is None
+
     @pytest.mark.asyncio
     async def test_http_send_error(self) -> None:
         """Test request fails and send back result with code 600."""
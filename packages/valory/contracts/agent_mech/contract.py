@@ -109,6 +109,44 @@ class AgentMechContract(Contract):
         )
         return {"data": bytes.fromhex(data[2:])}  # type: ignore
 
+    @classmethod
+    def get_multiple_deliver_data(
+        cls,
+        ledger_api: LedgerApi,
+        contract_address: str,
+        request_ids: List[int],
+        datas: List[str],
+    ) -> JSONLike:
+        """
+        Deliver responses to multiple requests.
+
+        All the calls are encoded in a single contract api request, using the same contract instance.
+
+        :param ledger_api: LedgerApi object
+        :param contract_address: the address of the token to be used
+        :param request_ids: the ids of the target requests
+        :param datas: the response data, one for each request
+        :return: the deliver data, one for each request, in the same order
+        """
+        ledger_api = cast(EthereumApi, ledger_api)
+
+        if not isinstance(ledger_api, EthereumApi):
+            raise ValueError(f"Only EthereumApi is supported, got {type(ledger_api)}")
+
+        if len(request_ids) != len(datas):
+            raise ValueError(
+                f"Got {len(request_ids)} request ids, but {len(datas)} responses."
+            )
+
+        contract_instance = cls.get_instance(ledger_api, contract_address)
+        deliver_datas = []
+        for request_id, data in zip(request_ids, datas):
+            encoded = contract_instance.encodeABI(
+                fn_name="deliver", args=[request_id, bytes.fromhex(data)]
+            )
+            deliver_datas.append(bytes.fromhex(encoded[2:]))
+        return {"data": deliver_datas}
+
     @classmethod
     def get_request_events(
         cls,
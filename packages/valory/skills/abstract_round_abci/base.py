@@ -25,24 +25,27 @@ import heapq
 import itertools
 import json
 import logging
+import operator
 import re
 import sys
 import textwrap
 import uuid
 from abc import ABC, ABCMeta, abstractmethod
-from collections import Counter, deque
+from collections import Counter, OrderedDict, deque
 from copy import copy, deepcopy
-from dataclasses import asdict, astuple, dataclass, field, is_dataclass
+from dataclasses import asdict, dataclass, field, fields, is_dataclass
 from enum import Enum
 from inspect import isclass
 from math import ceil
 from typing import (
     Any,
     Callable,
+    ClassVar,
     Deque,
     Dict,
     FrozenSet,
     Generic,
+    Iterable,
     Iterator,
     List,
     Mapping,
@@ -72,6 +75,8 @@ from packages.valory.protocols.abci.custom_types import (
     Validator,
 )
 from packages.valory.skills.abstract_round_abci.utils import (
+    canonical_decode,
+    canonical_encode,
     consensus_threshold,
     is_json_serializable,
 )
@@ -93,6 +98,15 @@ BLOCKS_STALL_TOLERANCE = 60
 SERIOUS_OFFENCE_ENUM_MIN = 1000
 NUMBER_OF_BLOCKS_TRACKED = 10_000
 NUMBER_OF_ROUNDS_TRACKED = 50
+DEFAULT_TX_CACHE_SIZE = 1000
+# the heap of timeouts is rebuilt once more than this fraction of it has been cancelled
+TIMEOUTS_COMPACTION_THRESHOLD = 0.5
+MIN_TIMEOUTS_COMPACTION_SIZE = 100
+# the binary encodings start with a magic byte, which json encodings never start with, and their version
+BINARY_PAYLOAD_MAGIC = b"\xa0"
+BINARY_TRANSACTION_MAGIC = b"\xa1"
+BINARY_CODEC_VERSION = 1
+PAYLOAD_TYPE_TAG_LENGTH = 4
 
 EventType = TypeVar("EventType")
 
@@ -146,6 +160,13 @@ class AbstractRoundInternalError(ABCIAppException):
         super().__init__("internal error: " + message, *args)
 
 
+class PayloadCodec(Enum):
+    """The encodings of the payloads and the transactions."""
+
+    JSON = "json"
+    BINARY = "binary"
+
+
 class _MetaPayload(ABCMeta):
     """
     Payload metaclass.
@@ -154,9 +175,11 @@ class _MetaPayload(ABCMeta):
     between the type of payload and the payload class to build it.
     This is necessary to recover the right payload class to instantiate
     at decoding time.
+    The binary encoding refers to the payload classes using a short tag, derived from their registry key.
     """
 
     registry: Dict[str, Type["BaseTxPayload"]] = {}
+    tags: Dict[bytes, str] = {}
 
     def __new__(mcs, name: str, bases: Tuple, namespace: Dict, **kwargs: Any) -> Type:  # type: ignore
         """Create a new class object."""
@@ -172,41 +195,65 @@ class _MetaPayload(ABCMeta):
         # remember association from transaction type to payload class
         _metaclass_registry_key = f"{new_cls.__module__}.{new_cls.__name__}"  # type: ignore
         mcs.registry[_metaclass_registry_key] = new_cls
+        tag = mcs.type_tag(_metaclass_registry_key)
+        registered_key = mcs.tags.setdefault(tag, _metaclass_registry_key)
+        if registered_key != _metaclass_registry_key:
+            raise ValueError(  # pragma: no cover
+                f"The type tag of {_metaclass_registry_key} collides with the one of {registered_key}."
+            )
 
         return new_cls
 
+    @staticmethod
+    def type_tag(registry_key: str) -> bytes:
+        """Get the tag of a payload class, used in place of its registry key by the binary encoding."""
+        return hashlib.sha256(registry_key.encode()).digest()[:PAYLOAD_TYPE_TAG_LENGTH]
+
 
 @dataclass(frozen=True)
 class BaseTxPayload(metaclass=_MetaPayload):
-    """This class represents a base class for transaction payload classes."""
+    """
+    This class represents a base class for transaction payload classes.
+
+    The payloads are encoded using the `codec` of the class, json by default.
+    The encoded bytes are memoized, so the values of the payloads must not be mutated.
+    For the same reason, `data`, `values` and `json` reference the values of the payload instead of copying them.
+    A decoded payload is encoded back to the same bytes, using the codec it was decoded with.
+    """
 
     sender: str
     round_count: int = field(default=ROUND_COUNT_DEFAULT, init=False)
     id_: str = field(default_factory=lambda: uuid.uuid4().hex, init=False)
 
+    codec: ClassVar[PayloadCodec] = PayloadCodec.JSON
+
     @property
     def data(self) -> Dict[str, Any]:
         """Data"""
-        excluded = ["sender", "round_count", "id_"]
-        return {k: v for k, v in asdict(self).items() if k not in excluded}
+        excluded = 3  # refers to ["sender", "round_count", "id_"]
+        return {
+            field_.name: getattr(self, field_.name)
+            for field_ in fields(self)[excluded:]
+        }
 
     @property
     def values(self) -> Tuple[Any, ...]:
         """Data"""
         excluded = 3  # refers to ["sender", "round_count", "id_"]
-        return astuple(self)[excluded:]
+        return tuple(getattr(self, field_.name) for field_ in fields(self)[excluded:])
 
     @property
     def json(self) -> Dict[str, Any]:
         """Json"""
-        data, cls = asdict(self), self.__class__
+        data = {field_.name: getattr(self, field_.name) for field_ in fields(self)}
+        cls = self.__class__
         data["_metaclass_registry_key"] = f"{cls.__module__}.{cls.__name__}"
         return data
 
     @classmethod
     def from_json(cls, obj: Dict) -> "BaseTxPayload":
         """Decode the payload."""
-        data = copy(obj)
+        data = dict(obj)
         round_count, id_ = data.pop("round_count"), data.pop("id_")
         payload_cls = _MetaPayload.registry[data.pop("_metaclass_registry_key")]
         payload = payload_cls(**data)  # type: ignore
@@ -220,18 +267,69 @@ class BaseTxPayload(metaclass=_MetaPayload):
         object.__setattr__(new, "round_count", self.round_count)
         return new
 
+    def _memoize(self, encoded: bytes, codec: PayloadCodec) -> None:
+        """Remember the encoding of the payload, for as long as its round count and id do not change."""
+        object.__setattr__(self, "_encoded", (self.round_count, self.id_, encoded))
+        object.__setattr__(self, "_codec", codec)
+
+    def _encode_binary(self) -> bytes:
+        """Encode the payload in the binary format."""
+        cls = self.__class__
+        tag = _MetaPayload.type_tag(f"{cls.__module__}.{cls.__name__}")
+        values = [getattr(self, field_.name) for field_ in fields(self)]
+        return (
+            BINARY_PAYLOAD_MAGIC
+            + bytes((BINARY_CODEC_VERSION,))
+            + tag
+            + canonical_encode(values)
+        )
+
     def encode(self) -> bytes:
         """Encode"""
-        encoded_data = json.dumps(self.json, sort_keys=True).encode()
+        memoized = self.__dict__.get("_encoded", None)
+        if memoized is not None and memoized[:2] == (self.round_count, self.id_):
+            return memoized[2]
+
+        codec = self.__dict__.get("_codec", self.codec)
+        if codec is PayloadCodec.BINARY:
+            encoded_data = self._encode_binary()
+        else:
+            encoded_data = json.dumps(self.json, sort_keys=True).encode()
         if sys.getsizeof(encoded_data) > MAX_READ_IN_BYTES:
             msg = f"{type(self)} must be smaller than {MAX_READ_IN_BYTES} bytes"
             raise ValueError(msg)
+        self._memoize(encoded_data, codec)
         return encoded_data
 
+    @classmethod
+    def _decode_binary(cls, obj: bytes) -> "BaseTxPayload":
+        """Decode a payload from the binary format."""
+        version = obj[1:2]
+        if version != bytes((BINARY_CODEC_VERSION,)):
+            raise ValueError(f"Unsupported binary payload version {version!r}.")
+        header_length = 2 + PAYLOAD_TYPE_TAG_LENGTH
+        registry_key = _MetaPayload.tags[obj[2:header_length]]
+        payload_cls = _MetaPayload.registry[registry_key]
+        values = canonical_decode(obj[header_length:])
+        names = [field_.name for field_ in fields(payload_cls)]
+        if len(values) != len(names):
+            raise ValueError(
+                f"Expected {len(names)} values for {registry_key}, got {len(values)}."
+            )
+        data = dict(zip(names, values))
+        data["_metaclass_registry_key"] = registry_key
+        payload = cls.from_json(data)
+        payload._memoize(bytes(obj), PayloadCodec.BINARY)
+        return payload
+
     @classmethod
     def decode(cls, obj: bytes) -> "BaseTxPayload":
         """Decode"""
-        return cls.from_json(json.loads(obj.decode()))
+        if obj[:1] == BINARY_PAYLOAD_MAGIC:
+            return cls._decode_binary(obj)
+        payload = cls.from_json(json.loads(obj.decode()))
+        object.__setattr__(payload, "_codec", PayloadCodec.JSON)
+        return payload
 
 
 @dataclass(frozen=True)
@@ -242,10 +340,18 @@ class Transaction(ABC):
     signature: str
 
     def encode(self) -> bytes:
-        """Encode the transaction."""
+        """Encode the transaction, using the same codec as its payload."""
 
-        data = dict(payload=self.payload.json, signature=self.signature)
-        encoded_data = json.dumps(data, sort_keys=True).encode()
+        payload_bytes = self.payload.encode()
+        if payload_bytes[:1] == BINARY_PAYLOAD_MAGIC:
+            encoded_data = (
+                BINARY_TRANSACTION_MAGIC
+                + bytes((BINARY_CODEC_VERSION,))
+                + canonical_encode([payload_bytes, self.signature])
+            )
+        else:
+            data = dict(payload=self.payload.json, signature=self.signature)
+            encoded_data = json.dumps(data, sort_keys=True).encode()
         if sys.getsizeof(encoded_data) > MAX_READ_IN_BYTES:
             raise ValueError(
                 f"Transaction must be smaller than {MAX_READ_IN_BYTES} bytes"
@@ -256,9 +362,18 @@ class Transaction(ABC):
     def decode(cls, obj: bytes) -> "Transaction":
         """Decode the transaction."""
 
+        if obj[:1] == BINARY_TRANSACTION_MAGIC:
+            version = obj[1:2]
+            if version != bytes((BINARY_CODEC_VERSION,)):
+                raise ValueError(f"Unsupported binary transaction version {version!r}.")
+            payload_bytes, signature = canonical_decode(obj[2:])
+            return Transaction(BaseTxPayload.decode(payload_bytes), signature)
+
         data = json.loads(obj.decode())
         signature = data["signature"]
         payload = BaseTxPayload.from_json(data["payload"])
+        # the payload has been signed in json, so it has to be verified in json too
+        object.__setattr__(payload, "_codec", PayloadCodec.JSON)
         return Transaction(payload, signature)
 
     def verify(self, ledger_id: str) -> None:
@@ -276,6 +391,109 @@ class Transaction(ABC):
             raise SignatureNotValidError(f"Signature not valid on transaction: {self}")
 
 
+class TransactionCache:
+    """
+    A bounded LRU cache of decoded and verified transactions, keyed by the hash of their raw bytes.
+
+    Every transaction is checked once when it enters the mempool, and once more when it gets delivered.
+    The second time, it is neither decoded nor is its signature recovered again.
+    Transactions which fail to decode or verify are never cached.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_TX_CACHE_SIZE) -> None:
+        """Initialize the cache."""
+        if max_size < 0:
+            raise ValueError(f"The cache size cannot be negative, got {max_size}.")
+        self._max_size = max_size
+        self._transactions: "OrderedDict[Tuple[str, bytes], Transaction]" = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Get the number of cached transactions."""
+        return len(self._transactions)
+
+    def decode_and_verify(
+        self, transaction_bytes: bytes, ledger_id: str
+    ) -> Transaction:
+        """
+        Decode a transaction and verify its signature, or get it from the cache if it has already been verified.
+
+        :param transaction_bytes: the raw bytes of the transaction.
+        :param ledger_id: the ledger id of the address.
+        :return: the verified transaction.
+        """
+        key = (ledger_id, hashlib.sha256(transaction_bytes).digest())
+        transaction = self._transactions.get(key, None)
+        if transaction is not None:
+            self.hits += 1
+            self._transactions.move_to_end(key)
+            return transaction
+
+        self.misses += 1
+        transaction = Transaction.decode(transaction_bytes)
+        transaction.verify(ledger_id)
+        if self._max_size == 0:
+            return transaction
+        self._transactions[key] = transaction
+        if len(self._transactions) > self._max_size:
+            self._transactions.popitem(last=False)
+        return transaction
+
+
+class DeliveredTxIndex:
+    """
+    A bounded index of the result codes of the delivered transactions, keyed by their Tendermint hash.
+
+    It is filled by the local `deliver_tx` calls, so that a behaviour learns that its transaction
+    has been delivered as soon as this agent's ABCI app processes it, instead of polling the Tendermint RPC.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_TX_CACHE_SIZE) -> None:
+        """Initialize the index."""
+        if max_size <= 0:
+            raise ValueError(f"The index size must be positive, got {max_size}.")
+        self._max_size = max_size
+        self._codes: "OrderedDict[str, int]" = OrderedDict()
+        # the number of deliveries recorded so far, it changes whenever a new one is recorded
+        self.recorded = 0
+
+    def __len__(self) -> int:
+        """Get the number of indexed transactions."""
+        return len(self._codes)
+
+    @staticmethod
+    def tx_hash(transaction_bytes: bytes) -> str:
+        """Get the hash of a transaction, the way Tendermint computes it."""
+        return hashlib.sha256(transaction_bytes).hexdigest().upper()
+
+    @staticmethod
+    def _normalize(tx_hash: str) -> str:
+        """Normalize a transaction hash, which may be prefixed and lowercase."""
+        tx_hash = tx_hash[2:] if tx_hash[:2] in ("0x", "0X") else tx_hash
+        return tx_hash.upper()
+
+    def record(self, transaction_bytes: bytes, code: int) -> None:
+        """
+        Record the delivery of a transaction.
+
+        :param transaction_bytes: the raw bytes of the transaction.
+        :param code: the result code of the delivery.
+        """
+        tx_hash = self.tx_hash(transaction_bytes)
+        self._codes[tx_hash] = code
+        self._codes.move_to_end(tx_hash)
+        if len(self._codes) > self._max_size:
+            self._codes.popitem(last=False)
+        self.recorded += 1
+
+    def get(self, tx_hash: str) -> Optional[int]:
+        """Get the result code of a delivered transaction, or `None` if it has not been delivered."""
+        return self._codes.get(self._normalize(tx_hash), None)
+
+
 class Block:  # pylint: disable=too-few-public-methods
     """Class to represent (a subset of) data of a Tendermint block."""
 
@@ -299,24 +517,111 @@ class Block:  # pylint: disable=too-few-public-methods
         return self.header.timestamp
 
 
+@dataclass(frozen=True)
+class BlockRetention:
+    """
+    The retention policy of the blocks which are kept in memory.
+
+    Only the latest `max_blocks` blocks, and only the blocks at most `max_age` seconds older than the latest one,
+    are kept, if set. The age is measured using the timestamps of the blocks, so that it is deterministic.
+    If `spill_path` is set, the dropped blocks are appended to a log on disk.
+    """
+
+    max_blocks: Optional[int] = None
+    max_age: Optional[float] = None
+    spill_path: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        """Check the policy."""
+        if self.max_blocks is not None and self.max_blocks < 1:
+            raise ValueError(
+                f"At least one block must be retained, got max_blocks={self.max_blocks}."
+            )
+        if self.max_age is not None and self.max_age < 0:
+            raise ValueError(f"The max age cannot be negative, got {self.max_age}.")
+
+
+class BlockSpillLog:
+    """
+    An append-only log on disk, of the blocks which have been dropped from the memory.
+
+    Every block is stored in a line, as a json object with its height, its timestamp, and its encoded transactions.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the log."""
+        self.path = path
+
+    def append(self, block: Block) -> None:
+        """Append a block to the log."""
+        line = json.dumps(
+            {
+                "height": block.header.height,
+                "timestamp": block.timestamp.isoformat(),
+                "transactions": [tx.encode().hex() for tx in block.transactions],
+            }
+        )
+        with open(self.path, "a", encoding="utf-8") as log:
+            log.write(line + "\n")
+
+    def __iter__(
+        self,
+    ) -> Iterator[Tuple[int, datetime.datetime, Tuple[Transaction, ...]]]:
+        """Iterate over the height, the timestamp and the transactions of the spilled blocks, oldest first."""
+        with open(self.path, encoding="utf-8") as log:
+            for line in log:
+                block = json.loads(line)
+                transactions = tuple(
+                    Transaction.decode(bytes.fromhex(tx))
+                    for tx in block["transactions"]
+                )
+                timestamp = datetime.datetime.fromisoformat(block["timestamp"])
+                yield block["height"], timestamp, transactions
+
+
 class Blockchain:
     """
     Class to represent a (naive) Tendermint blockchain.
 
     The consistency of the data in the blocks is guaranteed by Tendermint.
+
+    By default, all the blocks are kept in memory. If a retention policy is given,
+    only the latest blocks are kept, in a ring buffer, while the height keeps tracking all the added blocks.
     """
 
-    def __init__(self, height_offset: int = 0, is_init: bool = True) -> None:
+    def __init__(
+        self,
+        height_offset: int = 0,
+        is_init: bool = True,
+        retention: Optional[BlockRetention] = None,
+    ) -> None:
         """Initialize the blockchain."""
-        self._blocks: List[Block] = []
+        self._blocks: Deque[Block] = deque()
         self._height_offset = height_offset
         self._is_init = is_init
+        self._length = 0
+        self._retention = BlockRetention()
+        self._spill_log: Optional[BlockSpillLog] = None
+        self.set_retention(retention or BlockRetention())
 
     @property
     def is_init(self) -> bool:
         """Returns true if the blockchain is initialized."""
         return self._is_init
 
+    @property
+    def retention(self) -> BlockRetention:
+        """Get the retention policy."""
+        return self._retention
+
+    def set_retention(self, retention: BlockRetention) -> None:
+        """Set the retention policy, dropping the blocks which should not be kept anymore."""
+        self._retention = retention
+        self._spill_log = None
+        if retention.spill_path is not None:
+            self._spill_log = BlockSpillLog(retention.spill_path)
+        self._drop_old_blocks()
+
     def add_block(self, block: Block) -> None:
         """Add a block to the list."""
         expected_height = self.height + 1
@@ -331,6 +636,25 @@ class Blockchain:
                 f"expected height {expected_height}, got {actual_height}"
             )
         self._blocks.append(block)
+        self._length += 1
+        self._drop_old_blocks()
+
+    def _is_expired(self, block: Block) -> bool:
+        """Check whether a block should be dropped according to the retention policy."""
+        max_blocks, max_age = self._retention.max_blocks, self._retention.max_age
+        if max_blocks is not None and len(self._blocks) > max_blocks:
+            return True
+        if max_age is None:
+            return False
+        age = self._blocks[-1].timestamp - block.timestamp
+        return age.total_seconds() > max_age
+
+    def _drop_old_blocks(self) -> None:
+        """Drop the oldest blocks, according to the retention policy. The latest block is always kept."""
+        while len(self._blocks) > 1 and self._is_expired(self._blocks[0]):
+            dropped = self._blocks.popleft()
+            if self._spill_log is not None:
+                self._spill_log.append(dropped)
 
     @property
     def height(self) -> int:
@@ -346,14 +670,29 @@ class Blockchain:
 
     @property
     def length(self) -> int:
-        """Get the blockchain length."""
-        return len(self._blocks)
+        """Get the blockchain length, including the blocks which have been dropped from the memory."""
+        return self._length
+
+    @property
+    def first_retained_height(self) -> int:
+        """Get the height of the oldest block which is kept in memory, or the next height if there are none."""
+        return self.height - len(self._blocks) + 1
 
     @property
     def blocks(self) -> Tuple[Block, ...]:
-        """Get the blocks."""
+        """Get the blocks which are kept in memory."""
         return tuple(self._blocks)
 
+    def get_block(self, height: int) -> Block:
+        """Get the block at the given height, if it is kept in memory."""
+        index = height - self.first_retained_height
+        if not 0 <= index < len(self._blocks):
+            raise ValueError(
+                f"Block {height} is not kept in memory, "
+                f"the retained heights are [{self.first_retained_height}, {self.height}]."
+            )
+        return self._blocks[index]
+
     @property
     def last_block(
         self,
@@ -412,6 +751,194 @@ class BlockBuilder:
         )
 
 
+def _immutable(self: Any, *_args: Any, **_kwargs: Any) -> None:
+    """Refuse to mutate a frozen container."""
+    raise TypeError(
+        f"`{type(self).__name__}` is immutable, "
+        f"copy it to a `{type(self).__mro__[1].__name__}` to modify it."
+    )
+
+
+class FrozenList(list):
+    """
+    An immutable list.
+
+    It is a `list` subclass, so it compares equal to lists and is json-serializable as one, but all its mutating methods raise.
+    Copying it returns the same object, since it cannot change. A mutable copy can be taken using `list(frozen_list)`.
+    """
+
+    __slots__ = ()
+
+    append = extend = insert = remove = pop = clear = sort = reverse = _immutable
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+
+    def __copy__(self) -> "FrozenList":
+        """Get a shallow copy, i.e., the list itself."""
+        return self
+
+    def __deepcopy__(self, _memo: Dict[int, Any]) -> "FrozenList":
+        """Get a deep copy, i.e., the list itself."""
+        return self
+
+    def __reduce__(self) -> Tuple[Type["FrozenList"], Tuple[List[Any]]]:
+        """Reduce for pickling, as the default one populates the list after creating it."""
+        return self.__class__, (list(self),)
+
+
+class FrozenDict(dict):
+    """
+    An immutable dict.
+
+    It is a `dict` subclass, so it compares equal to dicts and is json-serializable as one, but all its mutating methods raise.
+    Copying it returns the same object, since it cannot change. A mutable copy can be taken using `dict(frozen_dict)`.
+    """
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    update = pop = popitem = clear = setdefault = _immutable
+
+    def __copy__(self) -> "FrozenDict":
+        """Get a shallow copy, i.e., the dict itself."""
+        return self
+
+    def __deepcopy__(self, _memo: Dict[int, Any]) -> "FrozenDict":
+        """Get a deep copy, i.e., the dict itself."""
+        return self
+
+    def __reduce__(self) -> Tuple[Type["FrozenDict"], Tuple[Dict[Any, Any]]]:
+        """Reduce for pickling, as the default one populates the dict after creating it."""
+        return self.__class__, (dict(self),)
+
+
+def freeze(value: Any) -> Any:
+    """
+    Get an immutable version of a json-serializable value.
+
+    Lists and dicts are converted to frozen ones, recursively.
+    The already frozen containers are reused instead of being converted again,
+    so a value which is built out of values frozen earlier shares their structure.
+
+    :param value: the value to freeze.
+    :return: the frozen value.
+    """
+    if isinstance(value, (FrozenList, FrozenDict)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    if isinstance(value, tuple):
+        frozen = tuple(freeze(item) for item in value)
+        unchanged = all(map(operator.is_, frozen, value))
+        return value if unchanged else frozen
+    return value
+
+
+class _IncrementalHash:
+    """
+    A Merkle-style hash of the `AbciAppDB` data, which is updated incrementally.
+
+    Every value is hashed once, when it is written. The digest of a key is the hash of the digests of its history,
+    the digest of a period is the hash of the digests of its keys, sorted, and the root is the hash of the digests
+    of the periods, sorted by their index, and of the slashing config.
+    The digests of the keys and the periods are cached, and only the ones which have changed are recomputed.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the hash."""
+        self._leaves: Dict[int, Dict[str, List[bytes]]] = {}
+        self._key_digests: Dict[int, Dict[str, bytes]] = {}
+        self._period_digests: Dict[int, bytes] = {}
+        self._slashing_config: Tuple[str, bytes] = ("", hashlib.sha256().digest())
+
+    @staticmethod
+    def _leaf(value: Any) -> bytes:
+        """Hash a value, using the same encoding as the serialization of the db."""
+        return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).digest()
+
+    @staticmethod
+    def _encode_key(key: str) -> bytes:
+        """Encode a key, prefixed by its length, so that the concatenation of the keys and the digests is unambiguous."""
+        encoded = key.encode()
+        return len(encoded).to_bytes(4, "big") + encoded
+
+    def _invalidate(self, index: int, key: Optional[str] = None) -> None:
+        """Invalidate the cached digests of a key, or of a whole period if no key is given."""
+        self._period_digests.pop(index, None)
+        if key is None:
+            self._key_digests.pop(index, None)
+            return
+        self._key_digests.get(index, {}).pop(key, None)
+
+    def append(self, index: int, key: str, value: Any) -> None:
+        """Append a value to the history of a key."""
+        self._leaves.setdefault(index, {}).setdefault(key, []).append(self._leaf(value))
+        self._invalidate(index, key)
+
+    def set_period(self, index: int, data: Dict[str, List[Any]]) -> None:
+        """Set the histories of a period."""
+        self._leaves[index] = {
+            key: [self._leaf(value) for value in history]
+            for key, history in data.items()
+        }
+        self._invalidate(index)
+
+    def keep_periods(self, indexes: Iterable[int]) -> None:
+        """Keep only the given periods."""
+        kept = set(indexes)
+        for index in set(self._leaves) - kept:
+            del self._leaves[index]
+            self._invalidate(index)
+
+    def truncate_histories(self, index: int, depth: int) -> None:
+        """Keep only the latest `depth` values of the histories of a period."""
+        for key, leaves in self._leaves.get(index, {}).items():
+            if len(leaves) > depth:
+                del leaves[:-depth]
+                self._invalidate(index, key)
+
+    def rebuild(self, data: Dict[int, Dict[str, List[Any]]]) -> None:
+        """Rebuild the hash from scratch."""
+        self._leaves.clear()
+        self._key_digests.clear()
+        self._period_digests.clear()
+        for index, period_data in data.items():
+            self.set_period(index, period_data)
+
+    def _period_digest(self, index: int) -> bytes:
+        """Get the digest of a period, recomputing the digests of the changed keys."""
+        digest = self._period_digests.get(index, None)
+        if digest is not None:
+            return digest
+
+        key_digests = self._key_digests.setdefault(index, {})
+        sha256 = hashlib.sha256()
+        for key, leaves in sorted(self._leaves[index].items()):
+            key_digest = key_digests.get(key, None)
+            if key_digest is None:
+                key_digest = key_digests[key] = hashlib.sha256(
+                    b"".join(leaves)
+                ).digest()
+            sha256.update(self._encode_key(key) + key_digest)
+        digest = self._period_digests[index] = sha256.digest()
+        return digest
+
+    def root(self, slashing_config: str) -> bytes:
+        """Get the root hash of the data and the given slashing config."""
+        if slashing_config != self._slashing_config[0]:
+            self._slashing_config = (
+                slashing_config,
+                hashlib.sha256(slashing_config.encode()).digest(),
+            )
+
+        sha256 = hashlib.sha256()
+        for index in sorted(self._leaves):
+            sha256.update(index.to_bytes(8, "big") + self._period_digest(index))
+        sha256.update(self._slashing_config[1])
+        return sha256.digest()
+
+
 class AbciAppDB:
     """Class to represent all data replicated across agents.
 
@@ -487,6 +1014,21 @@ class AbciAppDB:
     * the in-built `copy` module is used, which automatically detects if an item is immutable and skips copying it.
     For more information take a look at the `_deepcopy_atomic` method and its usage:
     https://github.com/python/cpython/blob/3.10/Lib/copy.py#L182-L183
+
+    # Copy-on-write mode
+    -----------------------------------
+    If the database is created with `copy_on_write=True`, the values are frozen once, when they are written,
+    using `FrozenList` and `FrozenDict` instead of lists and dicts, and they are returned without being copied.
+    Modifying a retrieved value raises a `TypeError` instead, so the same safety guarantees hold.
+    A value which is built out of retrieved values, e.g., a list of retrieved dicts, shares them with the stored one.
+    Behaviours and rounds which need to modify a retrieved value have to copy it first, e.g., using `list(value)`.
+
+    # Incremental hashing
+    -----------------------------------
+    By default, `hash()` serializes the whole database and hashes the result, so its cost grows with the history.
+    If the database is created with `incremental_hash=True`, a Merkle-style hash is maintained instead,
+    each value is hashed once when it is written, and `hash()` only recomputes the digests of the keys which have changed.
+    The two modes produce different hashes, so all the agents of a service must use the same one.
     """
 
     DB_DATA_KEY = "db_data"
@@ -506,6 +1048,8 @@ class AbciAppDB:
         self,
         setup_data: Dict[str, List[Any]],
         cross_period_persisted_keys: Optional[FrozenSet[str]] = None,
+        copy_on_write: bool = False,
+        incremental_hash: bool = False,
     ) -> None:
         """Initialize the AbciApp database.
 
@@ -515,13 +1059,20 @@ class AbciAppDB:
 
         :param setup_data: the setup data
         :param cross_period_persisted_keys: data keys that will be kept after a new period starts
+        :param copy_on_write: whether to freeze the values on write, instead of copying them on every read and write
+        :param incremental_hash: whether to maintain the hash incrementally, instead of producing the legacy hash
         """
         AbciAppDB._check_data(setup_data)
-        self._setup_data = deepcopy(setup_data)
+        self._copy_on_write = copy_on_write
+        self._setup_data = self._store_histories(setup_data)
         self._data: Dict[int, Dict[str, List[Any]]] = {
             RESET_COUNT_START: self.setup_data  # the key represents the reset index
         }
         self._round_count = ROUND_COUNT_DEFAULT  # ensures first round is indexed at 0!
+        self._incremental_hash: Optional[_IncrementalHash] = None
+        if incremental_hash:
+            self._incremental_hash = _IncrementalHash()
+            self._incremental_hash.rebuild(self._data)
 
         self._cross_period_persisted_keys = self.default_cross_period_keys.union(
             cross_period_persisted_keys or frozenset()
@@ -548,8 +1099,25 @@ class AbciAppDB:
         :return: the setup_data
         """
         # do not return data if no value has been set
+        if self._copy_on_write:
+            # the values are frozen, only the histories need to be copied
+            return {k: list(v) for k, v in self._setup_data.items() if len(v)}
         return {k: v for k, v in deepcopy(self._setup_data).items() if len(v)}
 
+    @property
+    def copy_on_write(self) -> bool:
+        """Whether the values are frozen on write, instead of being copied on every read and write."""
+        return self._copy_on_write
+
+    def _store_histories(self, data: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        """Get a copy of the given histories, which is safe to store."""
+        if self._copy_on_write:
+            return {
+                key: [freeze(value) for value in history]
+                for key, history in data.items()
+            }
+        return deepcopy(data)
+
     @staticmethod
     def _check_data(data: Any) -> None:
         """Check that all fields in setup data were passed as a list, and that the data can be accepted into the db."""
@@ -588,7 +1156,8 @@ class AbciAppDB:
     def get(self, key: str, default: Any = VALUE_NOT_PROVIDED) -> Optional[Any]:
         """Given a key, get its last for the current reset index."""
         if key in self._data[self.reset_index]:
-            return deepcopy(self._data[self.reset_index][key][-1])
+            value = self._data[self.reset_index][key][-1]
+            return value if self._copy_on_write else deepcopy(value)
         if default != VALUE_NOT_PROVIDED:
             return default
         raise ValueError(
@@ -617,9 +1186,16 @@ class AbciAppDB:
         self.validate(kwargs)
 
         # Append new data to the key history
-        data = self._data[self.reset_index]
-        for key, value in deepcopy(kwargs).items():
+        reset_index = self.reset_index
+        data = self._data[reset_index]
+        if self._copy_on_write:
+            kwargs = {key: freeze(value) for key, value in kwargs.items()}
+        else:
+            kwargs = deepcopy(kwargs)
+        for key, value in kwargs.items():
             data.setdefault(key, []).append(value)
+            if self._incremental_hash is not None:
+                self._incremental_hash.append(reset_index, key, value)
 
     def create(self, **kwargs: Any) -> None:
         """Add a new entry to the data.
@@ -646,10 +1222,18 @@ class AbciAppDB:
     def _create_from_keys(self, **kwargs: Any) -> None:
         """Add a new entry to the data using the provided key-value pairs."""
         AbciAppDB._check_data(kwargs)
-        self._data[self.reset_index + 1] = deepcopy(kwargs)
+        reset_index = self.reset_index + 1
+        self._data[reset_index] = self._store_histories(kwargs)
+        if self._incremental_hash is not None:
+            self._incremental_hash.set_period(reset_index, self._data[reset_index])
 
     def get_latest_from_reset_index(self, reset_index: int) -> Dict[str, Any]:
         """Get the latest key-value pairs from the data dictionary for the specified period."""
+        if self._copy_on_write:
+            return {
+                key: values[-1]
+                for key, values in self._data.get(reset_index, {}).items()
+            }
         return {
             key: values[-1]
             for key, values in deepcopy(self._data.get(reset_index, {})).items()
@@ -684,6 +1268,8 @@ class AbciAppDB:
             key: self._data[key]
             for key in sorted(self._data.keys())[-cleanup_history_depth:]
         }
+        if self._incremental_hash is not None:
+            self._incremental_hash.keep_periods(self._data)
         if cleanup_history_depth_current:
             self.cleanup_current_histories(cleanup_history_depth_current)
 
@@ -696,6 +1282,10 @@ class AbciAppDB:
             key: history[-cleanup_history_depth_current:]
             for key, history in self._data[self.reset_index].items()
         }
+        if self._incremental_hash is not None:
+            self._incremental_hash.truncate_histories(
+                self.reset_index, cleanup_history_depth_current
+            )
 
     def serialize(self) -> str:
         """Serialize the data of the database to a string."""
@@ -745,11 +1335,22 @@ class AbciAppDB:
             ) from exc
 
         self._check_data(dict(tuple(db_data.values())[0]))
+        if self._copy_on_write:
+            db_data = {
+                index: self._store_histories(data) for index, data in db_data.items()
+            }
         self._data = db_data
         self.slashing_config = slashing_config
+        if self._incremental_hash is not None:
+            self._incremental_hash.rebuild(self._data)
 
     def hash(self) -> bytes:
         """Create a hash of the data."""
+        if self._incremental_hash is not None:
+            hash_ = self._incremental_hash.root(self.slashing_config)
+            _logger.debug(f"root hash: {hash_.hex()}")
+            return hash_
+
         # Compute the sha256 hash of the serialized data
         sha256 = hashlib.sha256()
         data = self.serialize()
@@ -768,6 +1369,144 @@ SerializedCollection = Dict[str, Dict[str, Any]]
 DeserializedCollection = Mapping[str, BaseTxPayload]
 
 
+class PayloadCollection(Dict[str, BaseTxPayload]):
+    """
+    The payloads of a collection round, indexed by sender, along with their vote tally.
+
+    The votes are counted per payload values as the payloads arrive, and the most voted values are kept up to date,
+    so that the threshold and majority checks do not need to go over the whole collection on every block.
+    The values are referenced by the tally, not copied, as the payloads must not be mutated.
+    Replacing or removing a payload invalidates the tally, which is then recounted on its next use.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the collection."""
+        super().__init__(*args, **kwargs)
+        self._votes: Optional[Counter] = None
+        # the position of each values in the tally, used to break the ties in the same way as `Counter.most_common`
+        self._ranks: Dict[Tuple[Any, ...], int] = {}
+        self._most_voted: Optional[Tuple[Any, ...]] = None
+        self._serialized: Optional[SerializedCollection] = None
+
+    def _invalidate(self) -> None:
+        """Invalidate the tally and the serialized collection."""
+        self._votes = None
+        self._ranks = {}
+        self._most_voted = None
+        self._serialized = None
+
+    def _count(self, values: Tuple[Any, ...]) -> None:
+        """Count a vote for the given values. The tally must have been initialized."""
+        votes = cast(Counter, self._votes)
+        rank = self._ranks.setdefault(values, len(self._ranks))
+        votes[values] += 1
+        most_voted = self._most_voted
+        if most_voted is None:
+            self._most_voted = values
+            return
+        n_votes, max_votes = votes[values], votes[most_voted]
+        if n_votes > max_votes or (
+            n_votes == max_votes and rank < self._ranks[most_voted]
+        ):
+            self._most_voted = values
+
+    @property
+    def votes(self) -> Counter:
+        """Get the number of votes per payload values. The counter is owned by the collection and must not be mutated."""
+        if self._votes is None:
+            self._votes = Counter()
+            try:
+                for payload in self.values():
+                    self._count(payload.values)
+            except TypeError:
+                self._invalidate()
+                raise
+        return self._votes
+
+    @property
+    def most_voted(self) -> Tuple[Optional[Tuple[Any, ...]], int]:
+        """Get the most voted payload values, if any, along with their number of votes."""
+        votes = self.votes
+        if self._most_voted is None:
+            return None, 0
+        return self._most_voted, votes[self._most_voted]
+
+    @property
+    def max_votes(self) -> int:
+        """Get the number of votes of the most voted payload values."""
+        return self.most_voted[1]
+
+    def votes_for(self, values: Tuple[Any, ...]) -> int:
+        """Get the number of votes for the given payload values."""
+        try:
+            return self.votes[values]
+        except TypeError:
+            # the values are not hashable, and therefore cannot be tallied
+            return sum(payload.values == values for payload in self.values())
+
+    @property
+    def serialized(self) -> SerializedCollection:
+        """Get the collection with the payloads serialized. The result is cached and must not be mutated."""
+        if self._serialized is None:
+            self._serialized = {
+                address: payload.json for address, payload in self.items()
+            }
+        return self._serialized
+
+    def __setitem__(self, sender: str, payload: BaseTxPayload) -> None:
+        """Add the payload of a sender, updating the tally."""
+        replaced = sender in self
+        super().__setitem__(sender, payload)
+        if replaced:
+            self._invalidate()
+            return
+        # the serialized collection may have been handed out, so it is not updated in place
+        self._serialized = None
+        if self._votes is not None:
+            try:
+                self._count(payload.values)
+            except TypeError:
+                # recount on the next use, which raises as `Counter` does with unhashable values
+                self._invalidate()
+
+    def __delitem__(self, sender: str) -> None:
+        """Remove the payload of a sender."""
+        super().__delitem__(sender)
+        self._invalidate()
+
+    def __copy__(self) -> "PayloadCollection":
+        """Copy the collection, without sharing its tally."""
+        return PayloadCollection(self)
+
+    def pop(self, *args: Any) -> Any:
+        """Remove the payload of a sender and return it."""
+        result = super().pop(*args)
+        self._invalidate()
+        return result
+
+    def popitem(self) -> Tuple[str, BaseTxPayload]:
+        """Remove the last added payload and return it along with its sender."""
+        result = super().popitem()
+        self._invalidate()
+        return result
+
+    def clear(self) -> None:
+        """Remove all the payloads."""
+        super().clear()
+        self._invalidate()
+
+    def setdefault(self, sender: str, payload: BaseTxPayload) -> BaseTxPayload:  # type: ignore
+        """Add the payload of a sender, if it has not sent one yet, and return the sender's payload."""
+        if sender not in self:
+            self[sender] = payload
+        return self[sender]
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        """Add the payloads of the given mapping, updating the tally."""
+        for sender, payload in dict(*args, **kwargs).items():
+            self[sender] = payload
+
+
 class BaseSynchronizedData:
     """
     Class to represent the synchronized data.
@@ -1224,10 +1963,14 @@ class AbstractRound(Generic[EventType], ABC, metaclass=_MetaAbstractRound):
         if len(votes_by_participant) == 0:
             return
 
-        votes = votes_by_participant.values()
-        vote_count = Counter(tuple(sorted(v.data.items())) for v in votes)
-        largest_nb_votes = max(vote_count.values())
-        nb_votes_received = sum(vote_count.values())
+        if isinstance(votes_by_participant, PayloadCollection):
+            largest_nb_votes = votes_by_participant.max_votes
+            nb_votes_received = len(votes_by_participant)
+        else:
+            votes = votes_by_participant.values()
+            vote_count = Counter(tuple(sorted(v.data.items())) for v in votes)
+            largest_nb_votes = max(vote_count.values())
+            nb_votes_received = sum(vote_count.values())
         nb_remaining_votes = nb_participants - nb_votes_received
 
         if (
@@ -1310,13 +2053,25 @@ class CollectionRound(AbstractRound, ABC):
     def __init__(self, *args: Any, **kwargs: Any):
         """Initialize the collection round."""
         super().__init__(*args, **kwargs)
-        self.collection: Dict[str, BaseTxPayload] = {}
+        self._collection = PayloadCollection()
+
+    @property
+    def collection(self) -> PayloadCollection:
+        """Get the collected payloads, indexed by sender."""
+        return self._collection
+
+    @collection.setter
+    def collection(self, collection: Dict[str, BaseTxPayload]) -> None:
+        """Replace the collected payloads."""
+        self._collection = PayloadCollection(collection)
 
     @staticmethod
     def serialize_collection(
         collection: DeserializedCollection,
     ) -> SerializedCollection:
         """Deserialize a serialized collection."""
+        if isinstance(collection, PayloadCollection):
+            return collection.serialized
         return {address: payload.json for address, payload in collection.items()}
 
     @staticmethod
@@ -1349,7 +2104,7 @@ class CollectionRound(AbstractRound, ABC):
     @property
     def payload_values_count(self) -> Counter:
         """Get count of payload values."""
-        return Counter(map(lambda p: p.values, self.payloads))
+        return Counter(self.collection.votes)
 
     def process_payload(self, payload: BaseTxPayload) -> None:
         """Process payload."""
@@ -1444,9 +2199,9 @@ class CollectDifferentUntilAllRound(_CollectUntilAllRound, ABC):
     def check_payload(self, payload: BaseTxPayload) -> None:
         """Check Payload"""
         new = payload.values
-        existing = [payload_.values for payload_ in self.collection.values()]
 
-        if payload.sender not in self.collection and new in existing:
+        if payload.sender not in self.collection and self.collection.votes_for(new):
+            existing = [payload_.values for payload_ in self.collection.values()]
             raise TransactionNotValidError(
                 f"`CollectDifferentUntilAllRound` encountered a value '{new}' that already exists. "
                 f"All values: {existing}"
@@ -1465,13 +2220,13 @@ class CollectSameUntilAllRound(_CollectUntilAllRound, ABC):
     def check_payload(self, payload: BaseTxPayload) -> None:
         """Check Payload"""
         new = payload.values
-        existing_ = [payload_.values for payload_ in self.collection.values()]
 
         if (
             payload.sender not in self.collection
             and len(self.collection)
-            and new not in existing_
+            and not self.collection.votes_for(new)
         ):
+            existing_ = [payload_.values for payload_ in self.collection.values()]
             raise TransactionNotValidError(
                 f"`CollectSameUntilAllRound` encountered a value '{new}' "
                 f"which is not the same as the already existing one: '{existing_[0]}'"
@@ -1491,15 +2246,13 @@ class CollectSameUntilAllRound(_CollectUntilAllRound, ABC):
         self,
     ) -> Tuple[Any, ...]:
         """Get the common payload among the agents."""
-        most_common_payload_values, max_votes = self.payload_values_count.most_common(
-            1
-        )[0]
+        most_common_payload_values, max_votes = self.collection.most_voted
         if max_votes < self.synchronized_data.max_participants:
             raise ABCIAppInternalError(
                 f"{max_votes} votes are not enough for `CollectSameUntilAllRound`. Expected: "
                 f"`n_votes = max_participants = {self.synchronized_data.max_participants}`"
             )
-        return most_common_payload_values
+        return cast(Tuple[Any, ...], most_common_payload_values)
 
 
 class CollectSameUntilThresholdRound(CollectionRound, ABC):
@@ -1531,10 +2284,7 @@ class CollectSameUntilThresholdRound(CollectionRound, ABC):
         self,
     ) -> bool:
         """Check if the threshold has been reached."""
-        counts = self.payload_values_count.values()
-        return any(
-            count >= self.synchronized_data.consensus_threshold for count in counts
-        )
+        return self.collection.max_votes >= self.synchronized_data.consensus_threshold
 
     @property
     def most_voted_payload(
@@ -1552,12 +2302,10 @@ class CollectSameUntilThresholdRound(CollectionRound, ABC):
         self,
     ) -> Tuple[Any, ...]:
         """Get the most voted payload values."""
-        most_voted_payload_values, max_votes = self.payload_values_count.most_common()[
-            0
-        ]
+        most_voted_payload_values, max_votes = self.collection.most_voted
         if max_votes < self.synchronized_data.consensus_threshold:
             raise ABCIAppInternalError("not enough votes")
-        return most_voted_payload_values
+        return cast(Tuple[Any, ...], most_voted_payload_values)
 
     def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Enum]]:
         """Process the end of the block."""
@@ -1885,10 +2633,26 @@ class TimeoutEvent(Generic[EventType]):
 
 
 class Timeouts(Generic[EventType]):
-    """Class to keep track of pending timeouts."""
+    """
+    Class to keep track of pending timeouts.
 
-    def __init__(self) -> None:
+    Cancelled timeouts stay in the heap until they reach its top, or until they make up more than
+    `compaction_threshold` of the heap, in which case the heap is rebuilt without them.
+    """
+
+    def __init__(
+        self,
+        compaction_threshold: float = TIMEOUTS_COMPACTION_THRESHOLD,
+        min_compaction_size: int = MIN_TIMEOUTS_COMPACTION_SIZE,
+    ) -> None:
         """Initialize."""
+        if not 0 < compaction_threshold <= 1:
+            raise ValueError(
+                f"The compaction threshold must be in (0, 1], got {compaction_threshold}."
+            )
+        self._compaction_threshold = compaction_threshold
+        self._min_compaction_size = min_compaction_size
+
         # The entry count serves as a tie-breaker so that two tasks with
         # the same priority are returned in the order they were added
         self._counter = itertools.count()
@@ -1899,11 +2663,33 @@ class Timeouts(Generic[EventType]):
         # Mapping from entry id to task
         self._entry_finder: Dict[int, TimeoutEvent[EventType]] = {}
 
+        # the number of cancelled entries in the heap
+        self.cancelled = 0
+        # the number of compactions, and the number of cancelled entries they have removed
+        self.compactions = 0
+        self.compacted = 0
+
     @property
     def size(self) -> int:
         """Get the size of the timeout queue."""
         return len(self._heap)
 
+    @property
+    def pending(self) -> int:
+        """Get the number of timeouts which have not been cancelled."""
+        return self.size - self.cancelled
+
+    @property
+    def metrics(self) -> Dict[str, int]:
+        """Get the size and the compaction metrics of the timeout queue."""
+        return {
+            "size": self.size,
+            "pending": self.pending,
+            "cancelled": self.cancelled,
+            "compactions": self.compactions,
+            "compacted": self.compacted,
+        }
+
     def add_timeout(self, deadline: datetime.datetime, event: EventType) -> int:
         """Add a timeout."""
         entry_count = next(self._counter)
@@ -1919,8 +2705,34 @@ class Timeouts(Generic[EventType]):
         :param entry_count: the entry id to remove.
         :raises: KeyError: if the entry count is not found.
         """
-        if entry_count in self._entry_finder:
-            self._entry_finder[entry_count].cancelled = True
+        entry = self._entry_finder.get(entry_count, None)
+        if entry is None or entry.cancelled:
+            return
+        entry.cancelled = True
+        self.cancelled += 1
+        if (
+            self.size >= self._min_compaction_size
+            and self.cancelled > self.size * self._compaction_threshold
+        ):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rebuild the heap without the cancelled timeouts."""
+        heap: List[TimeoutEvent[EventType]] = []
+        for entry in self._heap:
+            if entry.cancelled:
+                del self._entry_finder[entry.entry_count]
+                continue
+            heap.append(entry)
+        heapq.heapify(heap)
+        removed = self.size - len(heap)
+        self._heap = heap
+        self.cancelled = 0
+        self.compactions += 1
+        self.compacted += removed
+        _logger.debug(
+            f"removed {removed} cancelled timeouts, {len(heap)} timeouts pending."
+        )
 
     def pop_earliest_cancelled_timeouts(self) -> None:
         """Pop earliest cancelled timeouts."""
@@ -1942,6 +2754,8 @@ class Timeouts(Generic[EventType]):
         """Remove and return the earliest timeout-event pair."""
         entry = heapq.heappop(self._heap)
         del self._entry_finder[entry.entry_count]
+        if entry.cancelled:
+            self.cancelled -= 1
         return entry.deadline, entry.event
 
 
@@ -2461,6 +3275,11 @@ class AbciApp(
             raise ABCIAppInternalError("last timestamp is None")
         return self._last_timestamp
 
+    @property
+    def timeouts_metrics(self) -> Dict[str, int]:
+        """Get the size and the compaction metrics of the pending timeouts."""
+        return self._timeouts.metrics
+
     def _setup_background(self) -> None:
         """Set up the background rounds."""
         for app in self.background_apps:
@@ -3150,11 +3969,17 @@ class RoundSequence:  # pylint: disable=too-many-instance-attributes
         self._offence_status: Dict[str, OffenceStatus] = {}
         self._slashing_enabled = False
         self.pending_offences: Set[PendingOffense] = set()
+        self._block_retention: Optional[BlockRetention] = None
 
     def enable_slashing(self) -> None:
         """Enable slashing."""
         self._slashing_enabled = True
 
+    def set_block_retention(self, retention: BlockRetention) -> None:
+        """Set the retention policy of the blocks."""
+        self._block_retention = retention
+        self._blockchain.set_retention(retention)
+
     @property
     def validator_to_agent(self) -> Dict[str, str]:
         """Get the mapping of the validators' addresses to their agent addresses."""
@@ -3330,7 +4155,7 @@ class RoundSequence:  # pylint: disable=too-many-instance-attributes
     def last_timestamp(self) -> datetime.datetime:
         """Get the last timestamp."""
         last_timestamp = (
-            self._blockchain.blocks[-1].timestamp
+            self._blockchain.last_block.timestamp
             if self._blockchain.length != 0
             else None
         )
@@ -3429,7 +4254,9 @@ class RoundSequence:  # pylint: disable=too-many-instance-attributes
     def init_chain(self, initial_height: int) -> None:
         """Init chain."""
         # reduce `initial_height` by 1 to get block count offset as per Tendermint protocol
-        self._blockchain = Blockchain(initial_height - 1)
+        self._blockchain = Blockchain(
+            initial_height - 1, retention=self._block_retention
+        )
 
     def _track_tm_offences(
         self, evidences: Evidences, last_commit_info: LastCommitInfo
@@ -3602,7 +4429,7 @@ class RoundSequence:  # pylint: disable=too-many-instance-attributes
             self._block_construction_phase = (
                 RoundSequence._BlockConstructionState.WAITING_FOR_BEGIN_BLOCK
             )
-        self._blockchain = Blockchain(is_init=is_init)
+        self._blockchain = Blockchain(is_init=is_init, retention=self._block_retention)
 
     def _get_round_result(
         self,
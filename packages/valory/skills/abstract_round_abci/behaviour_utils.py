@@ -23,9 +23,11 @@
 import datetime
 import inspect
 import json
+import math
 import pprint
 import re
 import sys
+import time
 from abc import ABC, ABCMeta, abstractmethod
 from enum import Enum
 from functools import partial
@@ -34,6 +36,7 @@ from typing import (
     Callable,
     Dict,
     Generator,
+    Iterable,
     List,
     Optional,
     Tuple,
@@ -137,6 +140,36 @@ class BaseBehaviourInternalError(Exception):
         super().__init__("internal error: " + message, *args)
 
 
+class _Suspension:
+    """
+    The reason for which the execution of an `AsyncBehaviour` is suspended.
+
+    The behaviour is not resumed on every tick, but only once the deadline has passed,
+    or once the value of the condition key has changed, since the suspension started.
+    """
+
+    __slots__ = ("deadline", "key", "key_value")
+
+    def __init__(
+        self, deadline: float = math.inf, key: Optional[Callable[[], Any]] = None
+    ) -> None:
+        """
+        Initialize the suspension.
+
+        :param deadline: the monotonic time at which the behaviour should be resumed.
+        :param key: a cheap callable, whose value changes whenever the awaited condition may have changed.
+        """
+        self.deadline = deadline
+        self.key = key
+        self.key_value = None if key is None else key()
+
+    def is_over(self) -> bool:
+        """Check whether the behaviour should be resumed."""
+        if time.monotonic() >= self.deadline:
+            return True
+        return self.key is not None and self.key() != self.key_value
+
+
 class AsyncBehaviour(ABC):
     """
     MixIn behaviour class that support limited asynchronous programming.
@@ -145,6 +178,9 @@ class AsyncBehaviour(ABC):
     - READY: no suspended 'async_act' execution;
     - RUNNING: 'act' called, and waiting for a message
     - WAITING_TICK: 'act' called, and waiting for the next 'act' call
+
+    The waiting methods suspend the execution, so that the ticks do not resume it
+    until a deadline passes, a message is sent to the behaviour, or a condition key changes.
     """
 
     class AsyncState(Enum):
@@ -164,6 +200,7 @@ class AsyncBehaviour(ABC):
         self.__notified: bool = False
         self.__message: Any = None
         self.__setup_called: bool = False
+        self.__suspension: Optional[_Suspension] = None
 
     @abstractmethod
     def async_act(self) -> Generator:
@@ -227,26 +264,38 @@ class AsyncBehaviour(ABC):
 
     @classmethod
     def wait_for_condition(
-        cls, condition: Callable[[], bool], timeout: Optional[float] = None
-    ) -> Generator[None, None, None]:
+        cls,
+        condition: Callable[[], bool],
+        timeout: Optional[float] = None,
+        condition_key: Optional[Callable[[], Any]] = None,
+        poll_interval: Optional[float] = None,
+    ) -> Generator[Any, None, None]:
         """Wait for a condition to happen.
 
+        By default, the condition is evaluated on every tick.
+        If a condition key is given, the condition is evaluated again only once the value of the key changes,
+        the timeout expires, or the poll interval passes, whichever happens first.
+
         This is a local method that does not depend on the global clock,
-        so the usage of datetime.now() is acceptable here.
+        so the usage of the monotonic clock is acceptable here.
 
         :param condition: the condition to wait for
         :param timeout: the maximum amount of time to wait
-        :yield: None
+        :param condition_key: a cheap callable, whose value changes whenever the condition may have changed
+        :param poll_interval: the maximum amount of time to wait before evaluating the condition again
+        :yield: the suspension of the behaviour
         """
-        if timeout is not None:
-            deadline = datetime.datetime.now() + datetime.timedelta(0, timeout)
-        else:
-            deadline = datetime.datetime.max
+        deadline = math.inf if timeout is None else time.monotonic() + timeout
 
         while not condition():
-            if timeout is not None and datetime.datetime.now() > deadline:
+            now = time.monotonic()
+            if now > deadline:
                 raise TimeoutException()
-            yield
+            if condition_key is None and poll_interval is None:
+                yield None
+                continue
+            wake_at = deadline if poll_interval is None else now + poll_interval
+            yield _Suspension(min(deadline, wake_at), condition_key)
 
     def sleep(self, seconds: float) -> Any:
         """
@@ -254,17 +303,15 @@ class AsyncBehaviour(ABC):
 
         The argument may be a floating point number for subsecond precision.
         This is a local method that does not depend on the global clock, so the
-        usage of datetime.now() is acceptable here.
+        usage of the monotonic clock is acceptable here.
 
         :param seconds: the seconds
-        :yield: None
+        :yield: the suspension of the behaviour
         """
-        deadline = datetime.datetime.now() + datetime.timedelta(0, seconds)
-
-        def _wait_until() -> bool:
-            return datetime.datetime.now() > deadline
-
-        yield from self.wait_for_condition(_wait_until)
+        deadline = time.monotonic() + seconds
+        # the loop keeps the sleep correct for the callers which resume it on every tick
+        while time.monotonic() < deadline:
+            yield _Suspension(deadline)
 
     def wait_for_message(
         self,
@@ -277,24 +324,23 @@ class AsyncBehaviour(ABC):
         Care must be taken. This method does not handle concurrent requests.
         Use directly after a request is being sent.
         This is a local method that does not depend on the global clock,
-        so the usage of datetime.now() is acceptable here.
+        so the usage of the monotonic clock is acceptable here.
 
         :param condition: a callable
         :param timeout: max time to wait (in seconds)
         :return: a message
-        :yield: None
+        :yield: the suspension of the behaviour
         """
-        if timeout is not None:
-            deadline = datetime.datetime.now() + datetime.timedelta(0, timeout)
-        else:
-            deadline = datetime.datetime.max
+        deadline = math.inf if timeout is None else time.monotonic() + timeout
+        # the behaviour is resumed without a message once the timeout expires
+        suspension = None if timeout is None else _Suspension(deadline)
 
         self.__state = self.AsyncState.WAITING_MESSAGE
         try:
             message = None
             while message is None or not condition(message):
-                message = yield
-                if timeout is not None and datetime.datetime.now() > deadline:
+                message = yield suspension
+                if time.monotonic() > deadline:
                     raise TimeoutException()
             message = cast(Message, message)
             return message
@@ -327,6 +373,7 @@ class AsyncBehaviour(ABC):
         self.__get_generator_act().close()
         self.__state = self.AsyncState.READY
         self.__stopped = True
+        self.__suspension = None
 
     def __call_act_first_time(self) -> None:
         """Call the 'async_act' method for the first time."""
@@ -341,31 +388,47 @@ class AsyncBehaviour(ABC):
                 self.__state = self.AsyncState.READY
                 return
             # trigger first execution, up to next 'yield' statement
-            self.__get_generator_act().send(None)
+            self.__resume(None)
         except StopIteration:
             # this may happen if the generator is empty
             self.__state = self.AsyncState.READY
 
     def __handle_waiting_for_message(self) -> None:
         """Handle an 'act' tick, when waiting for a message."""
-        # if there is no message coming, skip.
         if self.__notified:
             try:
-                self.__get_generator_act().send(self.__message)
+                self.__resume(self.__message)
             except StopIteration:
                 self.__handle_stop_iteration()
             finally:
                 # wait for the next message
                 self.__notified = False
                 self.__message = None
+            return
+        # if there is no message coming, skip, unless the wait has timed out.
+        if self.__suspension is None or not self.__suspension.is_over():
+            return
+        try:
+            self.__resume(None)
+        except StopIteration:  # pragma: nocover
+            self.__handle_stop_iteration()
 
     def __handle_tick(self) -> None:
         """Handle an 'act' tick."""
+        if self.__suspension is not None and not self.__suspension.is_over():
+            return
         try:
-            self.__get_generator_act().send(None)
+            self.__resume(None)
         except StopIteration:
             self.__handle_stop_iteration()
 
+    def __resume(self, value: Any) -> None:
+        """Resume the execution of 'async_act', and keep track of the reason for which it gets suspended."""
+        self.__suspension = None
+        yielded = self.__get_generator_act().send(value)
+        if isinstance(yielded, _Suspension):
+            self.__suspension = yielded
+
     def __handle_stop_iteration(self) -> None:
         """
         Handle 'StopIteration' exception.
@@ -666,8 +729,11 @@ class BaseBehaviour(
                 f"Should be in matching round ({round_id}) or last round ({self.round_sequence.last_round_id}), "
                 f"actual round {self.round_sequence.current_round_id}!"
             )
+        # the round height can only change on a new block, so the wait is resumed only then
         yield from self.wait_for_condition(
-            partial(self.check_round_height_has_changed, round_height), timeout=timeout
+            partial(self.check_round_height_has_changed, round_height),
+            timeout=timeout,
+            condition_key=lambda: self.round_sequence.current_round_height,
         )
 
     def wait_from_last_timestamp(self, seconds: float) -> Any:
@@ -686,11 +752,8 @@ class BaseBehaviour(
         deadline = self.round_sequence.abci_app.last_timestamp + datetime.timedelta(
             seconds=seconds
         )
-
-        def _wait_until() -> bool:
-            return datetime.datetime.now() > deadline
-
-        yield from self.wait_for_condition(_wait_until)
+        remaining = (deadline - datetime.datetime.now()).total_seconds()
+        yield from self.sleep(remaining)
 
     def is_done(self) -> bool:
         """Check whether the behaviour is done."""
@@ -1264,6 +1327,35 @@ class BaseBehaviour(
 
         return callback_request
 
+    def _wait_for_response(
+        self, request_nonce: str, timeout: Optional[float] = None
+    ) -> Generator[None, None, Message]:
+        """
+        Wait for the response to a request, which has been registered under the given nonce.
+
+        If the request times out, a response which arrives later is handled as a late message,
+        instead of being delivered to the next request that the behaviour waits for.
+
+        :param request_nonce: the nonce of the request.
+        :param timeout: seconds to wait for the response.
+        :yield: the suspension of the behaviour
+        :return: the response message
+        """
+        try:
+            response = yield from self.wait_for_message(timeout=timeout)
+        except TimeoutException:
+            callbacks = cast(Requests, self.context.requests).request_id_to_callback
+            if request_nonce in callbacks:
+                callbacks[request_nonce] = self._handle_late_response
+            raise
+        return response
+
+    def _handle_late_response(
+        self, message: Message, _current_behaviour: "BaseBehaviour"
+    ) -> None:
+        """Handle the response to a request which has timed out."""
+        self.handle_late_messages(self.behaviour_id, message)
+
     def get_http_response(
         self,
         method: str,
@@ -1328,7 +1420,7 @@ class BaseBehaviour(
             request_nonce
         ] = self.get_callback_request()
         # notify caller by propagating potential timeout exception.
-        response = yield from self.wait_for_message(timeout=timeout)
+        response = yield from self._wait_for_response(request_nonce, timeout)
         return response
 
     def _build_http_request_message(
@@ -1419,6 +1511,13 @@ class BaseBehaviour(
             self.params.max_attempts if max_attempts is None else max_attempts
         )
 
+        is_delivered_locally = (
+            yield from self._wait_until_transaction_delivered_locally(tx_hash, timeout)
+        )
+        if is_delivered_locally:
+            return True, None
+
+        # fall back to polling the Tendermint RPC
         response = None
         for _ in range(max_attempts):
             request_timeout = (
@@ -1445,6 +1544,42 @@ class BaseBehaviour(
 
         return False, response
 
+    def _wait_until_transaction_delivered_locally(
+        self, tx_hash: str, timeout: Optional[float] = None
+    ) -> Generator[None, None, bool]:
+        """
+        Wait until this agent's ABCI app delivers a transaction, if the deliveries are pushed to the behaviours.
+
+        The behaviour is resumed as soon as the transaction gets delivered,
+        but it does not wait for longer than the push timeout, so that it can fall back to polling the Tendermint RPC.
+
+        :param tx_hash: the transaction hash to check.
+        :param timeout: the time left to wait for the delivery.
+        :yield: None
+        :return: whether the transaction has been delivered successfully.
+            If not, or if it is not known, the delivery should be checked via the Tendermint RPC.
+        """
+        delivered_txs = self.shared_state.delivered_txs
+        push_timeout = self.params.tx_delivery_push_timeout
+        if delivered_txs is None or push_timeout is None:
+            return False
+        if timeout is not None:
+            push_timeout = min(push_timeout, timeout)
+
+        try:
+            yield from self.wait_for_condition(
+                lambda: delivered_txs.get(tx_hash) is not None,
+                timeout=push_timeout,
+                condition_key=lambda: delivered_txs.recorded,
+            )
+        except TimeoutException:
+            self.context.logger.info(
+                f"Tx {tx_hash} has not been delivered locally in {push_timeout}s. "
+                "Checking its delivery via the Tendermint RPC..."
+            )
+            return False
+        return delivered_txs.get(tx_hash) == OK_CODE
+
     @classmethod
     def _check_http_return_code_200(cls, response: HttpMessage) -> bool:
         """Check the HTTP response has return code 200."""
@@ -2018,20 +2153,70 @@ class BaseBehaviour(
                 **kwargs,
             )
             ipfs_message = yield from self._do_ipfs_request(dialogue, message, timeout)
-            if ipfs_message.performative != IpfsMessage.Performative.IPFS_HASH:
-                self.context.logger.error(
-                    f"Expected performative {IpfsMessage.Performative.IPFS_HASH} but got {ipfs_message.performative}."
-                )
-                return None
-            ipfs_hash = ipfs_message.ipfs_hash
-            self.context.logger.info(f"Successfully stored with IPFS hash: {ipfs_hash}")
-            return ipfs_hash
+            return self._parse_ipfs_hash(ipfs_message)
         except IPFSInteractionError as e:  # pragma: no cover
             self.context.logger.error(
                 f"An error occurred while trying to send a file to IPFS: {str(e)}"
             )
             return None
 
+    def send_many_to_ipfs(  # pylint: disable=too-many-arguments
+        self,
+        objects: Dict[str, SupportedObjectType],
+        multiple: bool = False,
+        filetype: Optional[SupportedFiletype] = None,
+        custom_storer: Optional[CustomStorerType] = None,
+        timeout: Optional[float] = None,
+        on_result: Optional[Callable[[str, Optional[str]], None]] = None,
+        **kwargs: Any,
+    ) -> Generator[None, None, Dict[str, Optional[str]]]:
+        """
+        Store several objects on IPFS concurrently.
+
+        All the requests are sent at once, and each one of them times out independently.
+
+        :param objects: the objects to store, by the file name to store them in.
+        :param multiple: whether the objects should be stored as multiple files, i.e. directories.
+        :param filetype: the file type of the objects being stored.
+        :param custom_storer: a custom serializer for the objects.
+        :param timeout: timeout for each one of the requests.
+        :param on_result: a callback called with the file name and the IPFS hash, as soon as each request completes.
+        :param kwargs: the keyword arguments to pass to the storer.
+        :returns: the IPFS hashes by file name, `None` for the objects which could not be stored.
+        """
+        requests = {}
+        results: Dict[str, Optional[str]] = {}
+        for filename, obj in objects.items():
+            try:
+                message, dialogue = self._build_ipfs_store_file_req(
+                    filename,
+                    obj,
+                    multiple,
+                    filetype,
+                    custom_storer,
+                    timeout,
+                    **kwargs,
+                )
+            except IPFSInteractionError as e:  # pragma: no cover
+                self.context.logger.error(
+                    f"An error occurred while trying to send a file to IPFS: {str(e)}"
+                )
+                results[filename] = None
+                continue
+            requests[filename] = (dialogue, message, timeout)
+
+        def on_response(filename: str, ipfs_message: Optional[IpfsMessage]) -> None:
+            """Handle the response to the request which stores a file."""
+            ipfs_hash = None
+            if ipfs_message is not None:
+                ipfs_hash = self._parse_ipfs_hash(ipfs_message)
+            results[filename] = ipfs_hash
+            if on_result is not None:
+                on_result(filename, ipfs_hash)
+
+        yield from self._do_ipfs_requests(requests, on_response)
+        return results
+
     def get_from_ipfs(  # pylint: disable=too-many-arguments
         self,
         ipfs_hash: str,
@@ -2051,25 +2236,90 @@ class BaseBehaviour(
         try:
             message, dialogue = self._build_ipfs_get_file_req(ipfs_hash, timeout)
             ipfs_message = yield from self._do_ipfs_request(dialogue, message, timeout)
-            if ipfs_message.performative != IpfsMessage.Performative.FILES:
-                self.context.logger.error(
-                    f"Expected performative {IpfsMessage.Performative.FILES} but got {ipfs_message.performative}."
-                )
-                return None
-            serialized_objects = ipfs_message.files
-            deserialized_objects = self._deserialize_ipfs_objects(
-                serialized_objects, filetype, custom_loader
-            )
-            self.context.logger.info(
-                f"Retrieved {len(ipfs_message.files)} objects from ipfs."
-            )
-            return deserialized_objects
+            return self._parse_ipfs_files(ipfs_message, filetype, custom_loader)
         except IPFSInteractionError as e:
             self.context.logger.error(
                 f"An error occurred while trying to fetch a file from IPFS: {str(e)}"
             )
             return None
 
+    def get_many_from_ipfs(  # pylint: disable=too-many-arguments
+        self,
+        ipfs_hashes: Iterable[str],
+        filetype: Optional[SupportedFiletype] = None,
+        custom_loader: CustomLoaderType = None,
+        timeout: Optional[float] = None,
+        on_result: Optional[
+            Callable[[str, Optional[SupportedObjectType]], None]
+        ] = None,
+    ) -> Generator[None, None, Dict[str, Optional[SupportedObjectType]]]:
+        """
+        Get several objects from IPFS concurrently.
+
+        All the requests are sent at once, and each one of them times out independently.
+
+        :param ipfs_hashes: the ipfs hashes of the files/dirs to download.
+        :param filetype: the file type of the objects being downloaded.
+        :param custom_loader: a custom deserializer for the objects received from IPFS.
+        :param timeout: timeout for each one of the requests.
+        :param on_result: a callback called with the ipfs hash and the object, as soon as each request completes.
+        :returns: the downloaded objects by ipfs hash, `None` for the ones which could not be fetched.
+        """
+        requests = {}
+        for ipfs_hash in ipfs_hashes:
+            message, dialogue = self._build_ipfs_get_file_req(ipfs_hash, timeout)
+            requests[ipfs_hash] = (dialogue, message, timeout)
+        results: Dict[str, Optional[SupportedObjectType]] = {}
+
+        def on_response(ipfs_hash: str, ipfs_message: Optional[IpfsMessage]) -> None:
+            """Handle the response to the request which gets a file."""
+            obj = None
+            if ipfs_message is not None:
+                try:
+                    obj = self._parse_ipfs_files(ipfs_message, filetype, custom_loader)
+                except IPFSInteractionError as e:
+                    self.context.logger.error(
+                        f"An error occurred while trying to fetch a file from IPFS: {str(e)}"
+                    )
+            results[ipfs_hash] = obj
+            if on_result is not None:
+                on_result(ipfs_hash, obj)
+
+        yield from self._do_ipfs_requests(requests, on_response)
+        return results
+
+    def _parse_ipfs_hash(self, ipfs_message: IpfsMessage) -> Optional[str]:
+        """Get the hash from the response to a request which stores a file on IPFS."""
+        if ipfs_message.performative != IpfsMessage.Performative.IPFS_HASH:
+            self.context.logger.error(
+                f"Expected performative {IpfsMessage.Performative.IPFS_HASH} but got {ipfs_message.performative}."
+            )
+            return None
+        ipfs_hash = ipfs_message.ipfs_hash
+        self.context.logger.info(f"Successfully stored with IPFS hash: {ipfs_hash}")
+        return ipfs_hash
+
+    def _parse_ipfs_files(
+        self,
+        ipfs_message: IpfsMessage,
+        filetype: Optional[SupportedFiletype] = None,
+        custom_loader: CustomLoaderType = None,
+    ) -> Optional[SupportedObjectType]:
+        """Get the object from the response to a request which gets a file from IPFS."""
+        if ipfs_message.performative != IpfsMessage.Performative.FILES:
+            self.context.logger.error(
+                f"Expected performative {IpfsMessage.Performative.FILES} but got {ipfs_message.performative}."
+            )
+            return None
+        serialized_objects = ipfs_message.files
+        deserialized_objects = self._deserialize_ipfs_objects(
+            serialized_objects, filetype, custom_loader
+        )
+        self.context.logger.info(
+            f"Retrieved {len(ipfs_message.files)} objects from ipfs."
+        )
+        return deserialized_objects
+
     def _do_ipfs_request(
         self,
         dialogue: IpfsDialogue,
@@ -2083,10 +2333,83 @@ class BaseBehaviour(
             request_nonce
         ] = self.get_callback_request()
         # notify caller by propagating potential timeout exception.
-        response = yield from self.wait_for_message(timeout=timeout)
+        response = yield from self._wait_for_response(request_nonce, timeout)
         ipfs_message = cast(IpfsMessage, response)
         return ipfs_message
 
+    def _do_ipfs_requests(
+        self,
+        requests: Dict[str, Tuple[IpfsDialogue, IpfsMessage, Optional[float]]],
+        on_response: Callable[[str, Optional[IpfsMessage]], None],
+    ) -> Generator[None, None, None]:
+        """
+        Performs several IPFS requests concurrently, and asynchronously waits for all of their responses.
+
+        The responses are correlated with the requests by the nonces of their dialogues.
+
+        :param requests: the dialogues, messages and timeouts of the requests, by key.
+        :param on_response: a callback called with the key and the response of each request as soon as it arrives,
+            or with `None` once the request times out.
+        :yield: the suspension of the behaviour
+        """
+        received: Dict[str, IpfsMessage] = {}
+        deadlines: Dict[str, float] = {}
+        nonces: Dict[str, str] = {}
+        callbacks = cast(Requests, self.context.requests).request_id_to_callback
+        now = time.monotonic()
+        for key, (dialogue, message, timeout) in requests.items():
+            request_nonce = self._get_request_nonce_from_dialogue(dialogue)
+            nonces[key] = request_nonce
+            callbacks[request_nonce] = self._get_ipfs_callback_request(key, received)
+            deadlines[key] = math.inf if timeout is None else now + timeout
+            self.context.outbox.put_message(message=message)
+
+        pending = set(requests)
+        while True:
+            now = time.monotonic()
+            for key in sorted(pending):
+                response = received.get(key, None)
+                if response is None and deadlines[key] > now:
+                    continue
+                if response is None:
+                    self.context.logger.error(f"IPFS request {key} timed out.")
+                    if nonces[key] in callbacks:
+                        callbacks[nonces[key]] = self._handle_late_response
+                pending.remove(key)
+                on_response(key, response)
+            if len(pending) == 0:
+                return
+
+            deadline = min(deadlines[key] for key in pending)
+            try:
+                yield from self.wait_for_condition(
+                    lambda n_received=len(received): len(received) > n_received,
+                    timeout=None if deadline == math.inf else deadline - now,
+                    condition_key=received.__len__,
+                )
+            except TimeoutException:
+                continue
+
+    def _get_ipfs_callback_request(
+        self, key: str, received: Dict[str, IpfsMessage]
+    ) -> Callable[[Message, "BaseBehaviour"], None]:
+        """Get the callback which collects the response to one of several concurrent IPFS requests."""
+
+        def callback_request(
+            message: Message, current_behaviour: BaseBehaviour
+        ) -> None:
+            """The callback request."""
+            if self.is_stopped:
+                self.context.logger.debug(
+                    "dropping message as behaviour has stopped: %s", message
+                )
+            elif self != current_behaviour:
+                self.handle_late_messages(self.behaviour_id, message)
+            else:
+                received[key] = cast(IpfsMessage, message)
+
+        return callback_request
+
 
 class TmManager(BaseBehaviour):
     """Util class to be used for managing the tendermint node."""
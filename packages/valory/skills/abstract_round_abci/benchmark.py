@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the streaming statistics and the rolled-up files of the benchmark tool."""
+
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+
+# each power of two is split into this many buckets, i.e., the bucket bounds grow by ~9%
+BUCKETS_PER_OCTAVE = 8
+# durations below this value all fall in the first bucket
+MIN_TRACKED_DURATION = 1e-6
+# durations above 2**40 microseconds (~12 days) all fall in the last bucket
+MAX_BUCKET = 40 * BUCKETS_PER_OCTAVE
+PERCENTILES = (50, 95, 99)
+DEFAULT_WINDOW_SIZE = 10
+DEFAULT_MAX_FILE_SIZE = 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+ROLLUP_FILENAME = "benchmark.jsonl"
+TOTAL_BLOCK = "total"
+
+
+class LatencyHistogram:
+    """
+    A streaming histogram of durations, with fixed, logarithmically spaced buckets.
+
+    The bucket of a duration depends only on the duration itself,
+    so the histograms of different periods and agents are merged by adding up their counts.
+    The percentiles are estimated with a relative error of less than 5%, using constant memory.
+    """
+
+    __slots__ = ("buckets", "count", "sum", "min", "max")
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @staticmethod
+    def bucket_of(duration: float) -> int:
+        """Get the index of the bucket of a duration."""
+        if duration < MIN_TRACKED_DURATION:
+            return 0
+        index = int(math.log2(duration / MIN_TRACKED_DURATION) * BUCKETS_PER_OCTAVE)
+        return min(index + 1, MAX_BUCKET)
+
+    @staticmethod
+    def bucket_value(index: int) -> float:
+        """Get the value which represents a bucket, i.e., the geometric middle of its bounds."""
+        if index == 0:
+            return 0.0
+        return MIN_TRACKED_DURATION * 2 ** ((index - 0.5) / BUCKETS_PER_OCTAVE)
+
+    def record(self, duration: float) -> None:
+        """Record a duration, in seconds."""
+        index = self.bucket_of(duration)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.sum += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add the recorded durations of another histogram to this one."""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @classmethod
+    def merged(cls, histograms: Iterable["LatencyHistogram"]) -> "LatencyHistogram":
+        """Get a new histogram with the recorded durations of the given ones."""
+        result = cls()
+        for histogram in histograms:
+            result.merge(histogram)
+        return result
+
+    def percentile(self, percent: float) -> float:
+        """Estimate a percentile of the recorded durations, or `0` if there are none."""
+        if self.count == 0:
+            return 0.0
+        rank = max(math.ceil(self.count * percent / 100), 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(max(self.bucket_value(index), self.min), self.max)
+        return self.max  # pragma: nocover
+
+    def summary(self) -> Dict[str, float]:
+        """Get the count, the mean, the maximum and the percentiles of the recorded durations."""
+        summary = {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "max": self.max,
+        }
+        for percent in PERCENTILES:
+            summary[f"p{percent}"] = self.percentile(percent)
+        return summary
+
+    def to_json(self) -> Dict[str, Any]:
+        """Get the compact json representation of the histogram, containing only the non-empty buckets."""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "buckets": {str(index): count for index, count in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        """Get a histogram from its json representation."""
+        histogram = cls()
+        histogram.buckets = {int(index): n for index, n in data["buckets"].items()}
+        histogram.count = data["count"]
+        histogram.sum = data["sum"]
+        histogram.min = data["min"] if histogram.count else math.inf
+        histogram.max = data["max"]
+        return histogram
+
+
+def append_rotating(
+    path: Path,
+    line: str,
+    max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+    backup_count: int = DEFAULT_BACKUP_COUNT,
+) -> None:
+    """
+    Append a line to a file, rotating the file first if the line would make it larger than the maximum size.
+
+    The rotated files are named `<name>.1` (the newest) up to `<name>.<backup_count>` (the oldest).
+    The oldest one is discarded on each rotation.
+
+    :param path: the path of the file.
+    :param line: the line to append, without the line separator.
+    :param max_file_size: the maximum size of the file, in bytes.
+    :param backup_count: the number of rotated files to keep.
+    """
+    data = (line + "\n").encode("utf-8")
+    if path.exists() and path.stat().st_size + len(data) > max_file_size:
+        for i in range(backup_count - 1, 0, -1):
+            rotated = path.with_name(f"{path.name}.{i}")
+            if rotated.exists():
+                rotated.replace(path.with_name(f"{path.name}.{i + 1}"))
+        if backup_count > 0:
+            path.replace(path.with_name(f"{path.name}.1"))
+        else:
+            path.unlink()
+    with open(path, "ab") as file_:
+        file_.write(data)
+
+
+def read_rollups(log_dir: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Read the rolled-up periods of all the agents which have saved benchmarks under a directory.
+
+    :param log_dir: the directory of the benchmarks, containing one directory per agent.
+    :yield: the rolled-up periods, oldest first for each agent.
+    """
+    for agent_dir in sorted(p for p in log_dir.iterdir() if p.is_dir()):
+        files = sorted(
+            agent_dir.glob(f"{ROLLUP_FILENAME}*"),
+            key=lambda file_: -int(file_.suffix[1:])
+            if file_.suffix[1:].isdigit()
+            else 0,
+        )
+        for file_ in files:
+            with open(file_, "r", encoding="utf-8") as lines:
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+class BenchmarkReport:
+    """Merges the rolled-up periods of all agents, to find the slowest behaviours and rounds."""
+
+    def __init__(self) -> None:
+        """Initialize the report."""
+        self.behaviours: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self.rounds: Dict[Tuple[int, str], float] = {}
+        self.agents: Set[str] = set()
+
+    def add(self, rollup: Dict[str, Any]) -> None:
+        """Add a rolled-up period of an agent to the report."""
+        self.agents.add(rollup["agent"])
+        period = rollup["period"]
+        for behaviour, blocks in rollup["behaviours"].items():
+            histograms = self.behaviours.setdefault(behaviour, {})
+            total = 0.0
+            for block_type, data in blocks.items():
+                histogram = LatencyHistogram.from_json(data)
+                histograms.setdefault(block_type, LatencyHistogram()).merge(histogram)
+                total += histogram.sum
+            histograms.setdefault(TOTAL_BLOCK, LatencyHistogram()).record(total)
+            key = (period, behaviour)
+            # a round is as slow as its slowest agent
+            self.rounds[key] = max(self.rounds.get(key, 0.0), total)
+
+    def slowest_behaviours(self, top: int) -> List[Tuple[str, Dict[str, float]]]:
+        """Get the behaviours with the highest p95 of their total time per period, along with their summaries."""
+        summaries = [
+            (behaviour, histograms[TOTAL_BLOCK].summary())
+            for behaviour, histograms in self.behaviours.items()
+        ]
+        summaries.sort(key=lambda item: item[1]["p95"], reverse=True)
+        return summaries[:top]
+
+    def slowest_rounds(self, top: int) -> List[Tuple[int, str, float]]:
+        """Get the periods and behaviours of the slowest rounds, along with the time of their slowest agent."""
+        rounds = sorted(self.rounds.items(), key=lambda item: item[1], reverse=True)
+        return [
+            (period, behaviour, time_) for (period, behaviour), time_ in rounds[:top]
+        ]
+
+    def format(self, top: int = 10) -> str:
+        """Format the report as text."""
+        lines = [
+            f"Agents: {len(self.agents)}, behaviours: {len(self.behaviours)}, rounds: {len(self.rounds)}",
+            "",
+            "Slowest behaviours (total time per period, seconds):",
+            f"{'behaviour':<48} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}",
+        ]
+        for behaviour, summary in self.slowest_behaviours(top):
+            lines.append(
+                f"{behaviour:<48} {summary['count']:>7} {summary['p50']:>9.3f} "
+                f"{summary['p95']:>9.3f} {summary['p99']:>9.3f} {summary['max']:>9.3f}"
+            )
+        lines.extend(
+            [
+                "",
+                "Slowest rounds (time of the slowest agent, seconds):",
+                f"{'period':>7} {'behaviour':<48} {'time':>9}",
+            ]
+        )
+        for period, behaviour, time_ in self.slowest_rounds(top):
+            lines.append(f"{period:>7} {behaviour:<48} {time_:>9.3f}")
+        return "\n".join(lines)
@@ -55,7 +55,7 @@ from packages.valory.skills.abstract_round_abci.base import (
     OffenseType,
     PendingOffense,
     SignatureNotValidError,
-    Transaction,
+    TransactionCache,
     TransactionNotValidError,
     TransactionTypeNotRecognizedError,
 )
@@ -78,6 +78,12 @@ class ABCIRoundHandler(ABCIHandler):
 
     SUPPORTED_PROTOCOL = AbciMessage.protocol_id
 
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the handler."""
+        super().__init__(**kwargs)
+        # the transactions verified in `check_tx` are not verified again in `deliver_tx`
+        self._transaction_cache = TransactionCache()
+
     def info(self, message: AbciMessage, dialogue: AbciDialogue) -> AbciMessage:
         """
         Handle the 'info' request.
@@ -158,8 +164,9 @@ class ABCIRoundHandler(ABCIHandler):
         transaction_bytes = message.tx
         # check we can decode the transaction
         try:
-            transaction = Transaction.decode(transaction_bytes)
-            transaction.verify(self.context.default_ledger_id)
+            self._transaction_cache.decode_and_verify(
+                transaction_bytes, self.context.default_ledger_id
+            )
             cast(SharedState, self.context.state).round_sequence.check_is_finished()
         except (
             SignatureNotValidError,
@@ -224,12 +231,22 @@ class ABCIRoundHandler(ABCIHandler):
 
     def deliver_tx(self, message: AbciMessage, dialogue: AbciDialogue) -> AbciMessage:
         """Handle the 'deliver_tx' request."""
+        reply = self._deliver_tx(message, dialogue)
+        delivered_txs = cast(SharedState, self.context.state).delivered_txs
+        if delivered_txs is not None:
+            # the behaviours which wait for their transactions get notified from here
+            delivered_txs.record(message.tx, reply.code)
+        return reply
+
+    def _deliver_tx(self, message: AbciMessage, dialogue: AbciDialogue) -> AbciMessage:
+        """Deliver a transaction to the round sequence, and get the response."""
         transaction_bytes = message.tx
         round_sequence = cast(SharedState, self.context.state).round_sequence
         payload_sender: Optional[str] = None
         try:
-            transaction = Transaction.decode(transaction_bytes)
-            transaction.verify(self.context.default_ledger_id)
+            transaction = self._transaction_cache.decode_and_verify(
+                transaction_bytes, self.context.default_ledger_id
+            )
             payload_sender = transaction.payload.sender
             round_sequence.check_is_finished()
             round_sequence.deliver_tx(transaction)
@@ -20,11 +20,15 @@
 """This module contains all the loading operations of the behaviours."""
 
 import json
+import os
+import tempfile
 from abc import ABC, abstractmethod
 from typing import Any, Callable, Dict, Optional
 
+from packages.valory.skills.abstract_round_abci.io_.paths import create_pathdirs
 from packages.valory.skills.abstract_round_abci.io_.store import (
     CustomObjectType,
+    DEFAULT_CHUNK_SIZE,
     NativelySupportedSingleObjectType,
     SupportedFiletype,
     SupportedObjectType,
@@ -45,6 +49,12 @@ class AbstractLoader(ABC):
     ) -> NativelySupportedSingleObjectType:
         """Load a single object."""
 
+    def load_single_file(
+        self, filename: str, serialized_object: str
+    ) -> SupportedSingleObjectType:
+        """Load a single object, given the name of the file it was received in."""
+        return self.load_single_object(serialized_object)
+
     def load(self, serialized_objects: Dict[str, str]) -> SupportedObjectType:
         """
         Load one or more serialized objects.
@@ -58,7 +68,7 @@ class AbstractLoader(ABC):
 
         objects = {}
         for filename, body in serialized_objects.items():
-            objects[filename] = self.load_single_object(body)
+            objects[filename] = self.load_single_file(filename, body)
 
         if len(objects) > 1:
             # multiple object are present
@@ -95,15 +105,80 @@ class JSONLoader(AbstractLoader):
             ) from e
 
 
+class FileLoader(AbstractLoader):
+    """
+    A loader which writes the received files to disk, instead of materializing them as objects.
+
+    The files are written in chunks, so that no encoded copy of a large file is held in memory at once.
+    """
+
+    def __init__(
+        self, path: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> None:
+        """
+        Initialize a `FileLoader`.
+
+        :param path: the directory to write the files in, defaults to a new temporary directory.
+        :param chunk_size: the number of characters to encode and write at once.
+        """
+        self._path = path
+        self._chunk_size = chunk_size
+
+    @property
+    def path(self) -> str:
+        """Get the directory in which the files are written, creating a temporary one if none was given."""
+        if self._path is None:
+            self._path = tempfile.mkdtemp()
+        return self._path
+
+    def load_single_object(self, serialized_object: str) -> str:
+        """
+        Write a file to a new path.
+
+        :param serialized_object: the content of the file.
+        :return: the path of the file.
+        """
+        fd, filepath = tempfile.mkstemp(dir=self.path)
+        os.close(fd)
+        self._write(filepath, serialized_object)
+        return filepath
+
+    def load_single_file(self, filename: str, serialized_object: str) -> str:
+        """
+        Write a file, under its name.
+
+        :param filename: the name of the file. Only its base name is used, so that it is never written outside the directory.
+        :param serialized_object: the content of the file.
+        :return: the path of the file.
+        """
+        filepath = os.path.join(self.path, os.path.basename(filename))
+        self._write(filepath, serialized_object)
+        return filepath
+
+    def _write(self, filepath: str, content: str) -> None:
+        """Write the content to a file, encoding one chunk at a time."""
+        create_pathdirs(filepath)
+        with open(filepath, "w", encoding="utf-8") as file:
+            for start in range(0, len(content), self._chunk_size):
+                file.write(content[start : start + self._chunk_size])
+
+
 class Loader(AbstractLoader):
     """Class which loads objects."""
 
-    def __init__(self, filetype: Optional[Any], custom_loader: CustomLoaderType):
+    def __init__(
+        self,
+        filetype: Optional[Any],
+        custom_loader: CustomLoaderType,
+        path: Optional[str] = None,
+    ):
         """Initialize a `Loader`."""
         self._filetype = filetype
         self._custom_loader = custom_loader
+        self._file_loader = FileLoader(path)
         self.__filetype_to_loader: Dict[SupportedFiletype, SupportedLoaderType] = {
             SupportedFiletype.JSON: JSONLoader().load_single_object,
+            SupportedFiletype.FILE: self._file_loader.load_single_object,
         }
 
     def load_single_object(self, serialized_object: str) -> SupportedSingleObjectType:
@@ -111,6 +186,14 @@ class Loader(AbstractLoader):
         loader = self._get_single_loader_from_filetype()
         return loader(serialized_object)
 
+    def load_single_file(
+        self, filename: str, serialized_object: str
+    ) -> SupportedSingleObjectType:
+        """Load a single file, given its name."""
+        if self._filetype == SupportedFiletype.FILE:
+            return self._file_loader.load_single_file(filename, serialized_object)
+        return self.load_single_object(serialized_object)
+
     def _get_single_loader_from_filetype(self) -> SupportedLoaderType:
         """Get an object loader from a given filetype or keep a custom loader."""
         if self._filetype is not None:
@@ -20,11 +20,13 @@
 """This module contains all the storing operations of the behaviours."""
 
 
+import codecs
 import json
+import mmap
 import os.path
 from abc import ABC, abstractmethod
 from enum import Enum, auto
-from typing import Any, Callable, Dict, Optional, TypeVar, Union, cast
+from typing import Any, Callable, Dict, Iterable, Optional, TypeVar, Union, cast
 
 from packages.valory.skills.abstract_round_abci.io_.paths import create_pathdirs
 
@@ -45,12 +47,17 @@ SupportedStorerType = Union[NativelySupportedStorerType, CustomStorerType]
 NativelySupportedJSONStorerType = Callable[
     [str, Union[StoredJSONType, Dict[str, StoredJSONType]], Any], None
 ]
+StreamedFileType = Union[str, os.PathLike, Iterable[Union[str, bytes]]]
+NativelySupportedFileStorerType = Callable[[str, StreamedFileType, Any], None]
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
 
 
 class SupportedFiletype(Enum):
     """Enum for the supported filetypes of the IPFS interacting methods."""
 
     JSON = auto()
+    FILE = auto()
 
 
 class AbstractStorer(ABC):
@@ -114,6 +121,65 @@ class JSONStorer(AbstractStorer):
             raise IOError(str(e)) from e
 
 
+class FileStorer(AbstractStorer):
+    """
+    A storer for files on disk and chunked streams.
+
+    The content is never materialized as an object, but it is decoded straight into the string
+    which the IPFS protocol requires, so that no intermediate copies of large files are made.
+    """
+
+    def serialize_object(
+        self, filename: str, obj: StreamedFileType, **kwargs: Any
+    ) -> Dict[str, str]:
+        """
+        Serialize a file.
+
+        :param filename: under which name the provided file should be serialized. Note that it will appear in IPFS with this name.
+        :param obj: the path of the file, or an iterable of its chunks, either `str` or utf-8 encoded `bytes`.
+        :returns: a dict mapping the name to the content of the file.
+        """
+        try:
+            if isinstance(obj, (str, os.PathLike)):
+                return {filename: read_mapped(obj)}
+            return {filename: join_chunks(obj)}
+        except (TypeError, UnicodeDecodeError) as e:  # pragma: no cover
+            raise IOError(str(e)) from e
+
+
+def read_mapped(path: Union[str, os.PathLike]) -> str:
+    """
+    Read a utf-8 encoded file, decoding it straight from its memory map.
+
+    Reading a file in text mode holds both the raw bytes and the decoded string in memory,
+    while the memory map is backed by the file and its pages can be reclaimed by the OS.
+
+    :param path: the path of the file.
+    :return: the content of the file.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            # empty files cannot be mapped
+            return ""
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return str(mapped, "utf-8")
+
+
+def join_chunks(chunks: Iterable[Union[str, bytes]]) -> str:
+    """
+    Join the chunks of a stream, decoding the `bytes` ones incrementally.
+
+    :param chunks: the chunks, either `str` or utf-8 encoded `bytes`. A multibyte character may be split across chunks.
+    :return: the content of the stream.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    decoded = [
+        chunk if isinstance(chunk, str) else decoder.decode(chunk) for chunk in chunks
+    ]
+    decoded.append(decoder.decode(b"", final=True))
+    return "".join(decoded)
+
+
 class Storer(AbstractStorer):
     """Class which serializes objects."""
 
@@ -131,6 +197,9 @@ class Storer(AbstractStorer):
             SupportedFiletype.JSON: cast(
                 NativelySupportedJSONStorerType, JSONStorer(path).serialize_object
             ),
+            SupportedFiletype.FILE: cast(
+                NativelySupportedFileStorerType, FileStorer(path).serialize_object
+            ),
         }
 
     def serialize_object(
@@ -22,7 +22,7 @@
 import inspect
 import json
 from abc import ABC, ABCMeta
-from collections import Counter
+from collections import Counter, deque
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
@@ -30,6 +30,7 @@ from time import time
 from typing import (
     Any,
     Callable,
+    Deque,
     Dict,
     List,
     Optional,
@@ -49,12 +50,24 @@ from packages.valory.skills.abstract_round_abci.base import (
     AbciApp,
     AbciAppDB,
     BaseSynchronizedData,
+    BaseTxPayload,
+    BlockRetention,
+    DeliveredTxIndex,
     OffenceStatus,
+    PayloadCodec,
     ROUND_COUNT_DEFAULT,
     RoundSequence,
     VALUE_NOT_PROVIDED,
     get_name,
 )
+from packages.valory.skills.abstract_round_abci.benchmark import (
+    DEFAULT_BACKUP_COUNT,
+    DEFAULT_MAX_FILE_SIZE,
+    DEFAULT_WINDOW_SIZE,
+    LatencyHistogram,
+    ROLLUP_FILENAME,
+    append_rotating,
+)
 from packages.valory.skills.abstract_round_abci.utils import (
     check,
     check_type,
@@ -318,6 +331,24 @@ class BaseParams(
             "serious_slash_unit_amount", kwargs, int
         )
         self.setup_params: Dict[str, Any] = self._ensure("setup", kwargs, dict)
+        # optional, as the skills which modify the values they get from the db need to be adapted first
+        self.use_copy_on_write_db: bool = kwargs.pop("use_copy_on_write_db", False)
+        # optional, as it changes the app hash, so all the agents of a service need to enable it together
+        self.use_incremental_db_hash: bool = kwargs.pop(
+            "use_incremental_db_hash", False
+        )
+        # optional, the agents which do not support the binary codec cannot decode the payloads of the ones using it
+        self.use_binary_payload_codec: bool = kwargs.pop(
+            "use_binary_payload_codec", False
+        )
+        # optional, the delivery of the transactions is only confirmed by polling the Tendermint RPC by default
+        self.tx_delivery_push_timeout: Optional[float] = kwargs.pop(
+            "tx_delivery_push_timeout", None
+        )
+        # optional, all the blocks are kept in memory by default
+        self.block_retention: BlockRetention = BlockRetention(
+            **kwargs.pop("block_retention", {})
+        )
 
         # we sanitize for null values as these are just kept for schema definitions
         skill_id = kwargs["skill_context"].skill_id
@@ -438,6 +469,8 @@ class SharedState(Model, ABC, metaclass=_MetaSharedState):  # type: ignore
         self.tm_recovery_params: TendermintRecoveryParams = TendermintRecoveryParams(
             self.abci_app_cls.initial_round_cls.auto_round_id()
         )
+        # the results of the delivered transactions, if their delivery is pushed to the behaviours
+        self.delivered_txs: Optional[DeliveredTxIndex] = None
         kwargs["skill_context"] = skill_context
         super().__init__(*args, **kwargs)
 
@@ -495,20 +528,30 @@ class SharedState(Model, ABC, metaclass=_MetaSharedState):  # type: ignore
     def setup(self) -> None:
         """Set up the model."""
         self._round_sequence = RoundSequence(self.context, self.abci_app_cls)
-        setup_params = cast(BaseParams, self.context.params).setup_params
+        params = cast(BaseParams, self.context.params)
         self.round_sequence.setup(
             BaseSynchronizedData(
                 AbciAppDB(
-                    setup_data=AbciAppDB.data_to_lists(setup_params),
+                    setup_data=AbciAppDB.data_to_lists(params.setup_params),
                     cross_period_persisted_keys=self.abci_app_cls.cross_period_persisted_keys,
+                    copy_on_write=params.use_copy_on_write_db,
+                    incremental_hash=params.use_incremental_db_hash,
                 )
             ),
             self.context.logger,
         )
         if not self.context.is_abstract_component:
+            self.round_sequence.set_block_retention(params.block_retention)
+            BaseTxPayload.codec = (
+                PayloadCodec.BINARY
+                if params.use_binary_payload_codec
+                else PayloadCodec.JSON
+            )
             self.initial_tm_configs = dict.fromkeys(
                 self.synchronized_data.all_participants
             )
+            if params.tx_delivery_push_timeout is not None:
+                self.delivered_txs = DeliveredTxIndex()
 
     @property
     def round_sequence(self) -> RoundSequence:
@@ -761,17 +804,25 @@ class BenchmarkBlock:
 
     This class represents logic to measure the code block using a
     context manager.
+
+    The total time of the block adds up all its measurements in the current period,
+    while its histograms keep the distribution of the measurements over the last periods.
     """
 
     start: float
     total_time: float
     block_type: str
+    histogram: LatencyHistogram
+    history: Deque[LatencyHistogram]
 
-    def __init__(self, block_type: str) -> None:
+    def __init__(self, block_type: str, window_size: int = DEFAULT_WINDOW_SIZE) -> None:
         """Benchmark for single round."""
         self.block_type = block_type
         self.start = 0
         self.total_time = 0
+        self.histogram = LatencyHistogram()
+        # the histograms of the previous periods in the sliding window
+        self.history = deque(maxlen=max(window_size - 1, 0))
 
     def __enter__(
         self,
@@ -781,7 +832,20 @@ class BenchmarkBlock:
 
     def __exit__(self, *args: List, **kwargs: Dict) -> None:
         """Exit context"""
-        self.total_time = time() - self.start
+        elapsed = time() - self.start
+        self.total_time += elapsed
+        self.histogram.record(elapsed)
+
+    @property
+    def window(self) -> LatencyHistogram:
+        """Get the histogram of the measurements in the sliding window, including the current period."""
+        return LatencyHistogram.merged((*self.history, self.histogram))
+
+    def roll(self) -> None:
+        """Move the measurements of the current period to the sliding window, and start a new period."""
+        self.history.append(self.histogram)
+        self.histogram = LatencyHistogram()
+        self.total_time = 0
 
 
 class BenchmarkBehaviour:
@@ -793,11 +857,10 @@ class BenchmarkBehaviour:
 
     local_data: Dict[str, BenchmarkBlock]
 
-    def __init__(
-        self,
-    ) -> None:
+    def __init__(self, window_size: int = DEFAULT_WINDOW_SIZE) -> None:
         """Initialize Benchmark behaviour object."""
         self.local_data = {}
+        self.window_size = window_size
 
     def _measure(self, block_type: str) -> BenchmarkBlock:
         """
@@ -808,7 +871,7 @@ class BenchmarkBehaviour:
         """
 
         if block_type not in self.local_data:
-            self.local_data[block_type] = BenchmarkBlock(block_type)
+            self.local_data[block_type] = BenchmarkBlock(block_type, self.window_size)
 
         return self.local_data[block_type]
 
@@ -824,12 +887,26 @@ class BenchmarkBehaviour:
         """Measure consensus block."""
         return self._measure(BenchmarkBlockTypes.CONSENSUS.value)
 
+    @property
+    def measured(self) -> bool:
+        """Check whether the behaviour has been measured in the current period."""
+        return any(block.histogram.count for block in self.local_data.values())
+
+    def roll(self) -> None:
+        """Start a new period for all the blocks of the behaviour."""
+        for block in self.local_data.values():
+            block.roll()
+
 
 class BenchmarkTool(Model, TypeCheckMixin, FrozenMixin):
     """
     BenchmarkTool
 
     Tool to benchmark ABCI apps.
+
+    The data of each period are saved in the agent's `<period>.json` file.
+    Each period is also rolled up into a single line of the agent's `benchmark.jsonl` file,
+    holding the histograms of the behaviours' blocks, which is rotated once it reaches its maximum size.
     """
 
     benchmark_data: Dict[str, BenchmarkBehaviour]
@@ -840,31 +917,66 @@ class BenchmarkTool(Model, TypeCheckMixin, FrozenMixin):
         self.benchmark_data = {}
         log_dir_ = self._ensure("log_dir", kwargs, str)
         self.log_dir = Path(log_dir_)
+        # optional, the number of periods over which the percentiles are reported
+        self.window_size: int = kwargs.pop("window_size", DEFAULT_WINDOW_SIZE)
+        # optional, the size in bytes after which the rolled-up file is rotated
+        self.max_file_size: int = kwargs.pop("max_file_size", DEFAULT_MAX_FILE_SIZE)
+        # optional, the number of rotated files to keep
+        self.backup_count: int = kwargs.pop("backup_count", DEFAULT_BACKUP_COUNT)
         super().__init__(*args, **kwargs)
         self._frozen = True
 
     def measure(self, behaviour: str) -> BenchmarkBehaviour:
         """Measure time to complete round."""
         if behaviour not in self.benchmark_data:
-            self.benchmark_data[behaviour] = BenchmarkBehaviour()
+            self.benchmark_data[behaviour] = BenchmarkBehaviour(self.window_size)
         return self.benchmark_data[behaviour]
 
     @property
     def data(
         self,
     ) -> List:
-        """Returns formatted data."""
+        """Returns formatted data of the current period."""
 
         behavioural_data = []
         for behaviour, tool in self.benchmark_data.items():
-            data = {k: v.total_time for k, v in tool.local_data.items()}
+            if not tool.measured:
+                continue
+            data = {
+                k: v.total_time for k, v in tool.local_data.items() if v.histogram.count
+            }
             data[BenchmarkBlockTypes.TOTAL.value] = sum(data.values())
             behavioural_data.append({"behaviour": behaviour, "data": data})
 
         return behavioural_data
 
+    @property
+    def stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Get the percentiles of each behaviour's blocks over the sliding window, including the current period."""
+        return {
+            behaviour: {k: v.window.summary() for k, v in tool.local_data.items()}
+            for behaviour, tool in self.benchmark_data.items()
+        }
+
+    def rollup(self, period: int) -> Dict[str, Any]:
+        """Get the compact roll-up of the current period, with a histogram per behaviour and block."""
+        behaviours = {
+            behaviour: {
+                block_type: block.histogram.to_json()
+                for block_type, block in tool.local_data.items()
+                if block.histogram.count
+            }
+            for behaviour, tool in self.benchmark_data.items()
+            if tool.measured
+        }
+        return {
+            "agent": self.context.agent_address,
+            "period": period,
+            "behaviours": behaviours,
+        }
+
     def save(self, period: int = 0, reset: bool = True) -> None:
-        """Save logs to a file."""
+        """Save logs to a file, and append the roll-up of the period to the agent's benchmark file."""
 
         try:
             self.log_dir.mkdir(exist_ok=True)
@@ -874,6 +986,12 @@ class BenchmarkTool(Model, TypeCheckMixin, FrozenMixin):
 
             with open(str(filepath), "w+", encoding="utf-8") as outfile:
                 json.dump(self.data, outfile)
+
+            rollup_filepath = agent_dir / ROLLUP_FILENAME
+            line = json.dumps(self.rollup(period), separators=(",", ":"))
+            append_rotating(
+                rollup_filepath, line, self.max_file_size, self.backup_count
+            )
             self.context.logger.info(f"Saving benchmarking data for period: {period}")
 
         except PermissionError as e:  # pragma: nocover
@@ -885,5 +1003,6 @@ class BenchmarkTool(Model, TypeCheckMixin, FrozenMixin):
     def reset(
         self,
     ) -> None:
-        """Reset benchmark data"""
-        self.benchmark_data.clear()
+        """Reset the benchmark data of the current period, keeping the previous periods in the sliding window."""
+        for tool in self.benchmark_data.values():
+            tool.roll()
@@ -21,13 +21,15 @@
 
 import dataclasses
 import datetime
+import hashlib
 import json
 import logging
+import random
 import re
 import shutil
 from abc import ABC
 from calendar import timegm
-from collections import deque
+from collections import Counter, deque
 from contextlib import suppress
 from copy import copy, deepcopy
 from dataclasses import dataclass
@@ -100,23 +102,35 @@ from packages.valory.skills.abstract_round_abci.base import (
     BaseTxPayload,
     Block,
     BlockBuilder,
+    BlockRetention,
+    BlockSpillLog,
     Blockchain,
     CollectionRound,
+    DeliveredTxIndex,
+    ERROR_CODE,
     EventType,
+    FrozenDict,
+    FrozenList,
     LateArrivingTransaction,
+    MIN_TIMEOUTS_COMPACTION_SIZE,
+    OK_CODE,
     OffenceStatus,
     OffenseStatusDecoder,
     OffenseStatusEncoder,
     OffenseType,
+    PayloadCodec,
+    PayloadCollection,
     RoundSequence,
     SignatureNotValidError,
     SlashingNotConfiguredError,
     Timeouts,
     Transaction,
+    TransactionCache,
     TransactionTypeNotRecognizedError,
     _MetaAbciApp,
     _MetaAbstractRound,
     _MetaPayload,
+    freeze,
     get_name,
     light_offences,
     serious_offences,
@@ -344,6 +358,78 @@ class TestTransactions:
         _MetaPayload.registry = self.old_value
 
 
+class TestBinaryPayloadCodec:
+    """Test the binary codec of the payloads and the transactions."""
+
+    def setup(self) -> None:
+        """Set up the test."""
+        BaseTxPayload.codec = PayloadCodec.BINARY
+
+    def teardown(self) -> None:
+        """Tear down the test."""
+        BaseTxPayload.codec = PayloadCodec.JSON
+
+    def test_encode_decode(self) -> None:
+        """Test encoding and decoding of payloads."""
+        payload = DummyPayload(sender="sender", dummy_attribute=2**70)
+        object.__setattr__(payload, "round_count", 3)
+        encoded = payload.encode()
+        assert encoded.startswith(b"\xa0\x01")
+        assert len(encoded) < len(json.dumps(payload.json).encode())
+
+        decoded = BaseTxPayload.decode(encoded)
+        assert decoded == payload
+        assert (decoded.round_count, decoded.id_) == (3, payload.id_)
+        assert decoded.encode() == encoded
+
+    def test_encode_is_deterministic(self) -> None:
+        """Test that equal payloads are encoded to the same bytes."""
+        payload = DummyPayload(sender="sender", dummy_attribute=1)
+        copied = BaseTxPayload.from_json(payload.json)
+        assert copied.encode() == payload.encode()
+
+    def test_encode_is_memoized(self) -> None:
+        """Test that the encoding is memoized until the round count changes."""
+        payload = PayloadA(sender="sender")
+        with mock.patch.object(
+            PayloadA, "_encode_binary", wraps=payload._encode_binary
+        ) as encode_binary:
+            encoded = payload.encode()
+            assert payload.encode() is encoded
+            assert encode_binary.call_count == 1
+            object.__setattr__(payload, "round_count", 1)
+            assert payload.encode() != encoded
+            assert encode_binary.call_count == 2
+
+    def test_encode_decode_transaction(self) -> None:
+        """Test encode/decode of a transaction."""
+        transaction = Transaction(PayloadA("sender"), "signature")
+        encoded = transaction.encode()
+        assert encoded.startswith(b"\xa1\x01")
+        decoded = Transaction.decode(encoded)
+        assert decoded == transaction
+        assert decoded.encode() == encoded
+
+    def test_unsupported_version(self) -> None:
+        """Test that an unsupported version cannot be decoded."""
+        encoded = PayloadA("sender").encode()
+        with pytest.raises(ValueError, match="Unsupported binary payload version"):
+            BaseTxPayload.decode(encoded[:1] + b"\x02" + encoded[2:])
+
+    @pytest.mark.parametrize("signing_codec", PayloadCodec)
+    def test_sign_verify_transaction(self, signing_codec: PayloadCodec) -> None:
+        """Test that a transaction is verified with the codec it was signed with."""
+        crypto = EthereumCrypto()
+        BaseTxPayload.codec = signing_codec
+        payload = PayloadA(crypto.address)
+        signature = crypto.sign_message(payload.encode())
+        encoded = Transaction(payload, signature).encode()
+
+        for verifying_codec in PayloadCodec:
+            BaseTxPayload.codec = verifying_codec
+            Transaction.decode(encoded).verify(crypto.identifier)
+
+
 @mock.patch(
     "aea.crypto.ledger_apis.LedgerApis.recover_message", return_value={"wrong_sender"}
 )
@@ -356,6 +442,97 @@ def test_verify_transaction_negative_case(*_mocks: Any) -> None:
         transaction.verify("")
 
 
+class TestTransactionCache:
+    """Test `TransactionCache`."""
+
+    @staticmethod
+    def _signed_transaction_bytes(
+        crypto: EthereumCrypto, payload: BaseTxPayload
+    ) -> bytes:
+        """Get the bytes of a signed transaction."""
+        signature = crypto.sign_message(payload.encode())
+        return Transaction(payload, signature).encode()
+
+    def test_decode_and_verify(self) -> None:
+        """Test that a transaction is decoded and verified only once."""
+        crypto = EthereumCrypto()
+        transaction_bytes = self._signed_transaction_bytes(
+            crypto, PayloadA(crypto.address)
+        )
+        cache = TransactionCache()
+        first = cache.decode_and_verify(transaction_bytes, crypto.identifier)
+        with mock.patch.object(Transaction, "verify") as mock_verify:
+            second = cache.decode_and_verify(transaction_bytes, crypto.identifier)
+            mock_verify.assert_not_called()
+        assert first is second
+        assert first.payload.sender == crypto.address
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    @mock.patch(
+        "aea.crypto.ledger_apis.LedgerApis.recover_message",
+        return_value={"wrong_sender"},
+    )
+    def test_invalid_transaction_not_cached(self, *_mocks: Any) -> None:
+        """Test that a transaction which fails to verify is not cached."""
+        crypto = EthereumCrypto()
+        transaction_bytes = self._signed_transaction_bytes(
+            crypto, PayloadA(crypto.address)
+        )
+        cache = TransactionCache()
+        for _ in range(2):
+            with pytest.raises(SignatureNotValidError):
+                cache.decode_and_verify(transaction_bytes, crypto.identifier)
+        assert len(cache) == 0
+        assert cache.misses == 2
+
+    def test_eviction(self) -> None:
+        """Test that the least recently used transaction gets evicted."""
+        crypto = EthereumCrypto()
+        transactions_bytes = [
+            self._signed_transaction_bytes(crypto, payload)
+            for payload in (PayloadA(crypto.address), PayloadB(crypto.address))
+        ]
+        cache = TransactionCache(max_size=1)
+        for transaction_bytes in transactions_bytes * 2:
+            cache.decode_and_verify(transaction_bytes, crypto.identifier)
+        assert len(cache) == 1
+        assert (cache.hits, cache.misses) == (0, 4)
+
+    def test_negative_size(self) -> None:
+        """Test that the size of the cache cannot be negative."""
+        with pytest.raises(ValueError, match="cannot be negative"):
+            TransactionCache(max_size=-1)
+
+
+class TestDeliveredTxIndex:
+    """Test `DeliveredTxIndex`."""
+
+    def test_record_and_get(self) -> None:
+        """Test that a delivery can be looked up by the hash which Tendermint reports."""
+        index = DeliveredTxIndex()
+        assert index.get(DeliveredTxIndex.tx_hash(b"tx")) is None
+        index.record(b"tx", OK_CODE)
+        tx_hash = hashlib.sha256(b"tx").hexdigest()
+        for reported_hash in (tx_hash, tx_hash.upper(), "0x" + tx_hash):
+            assert index.get(reported_hash) == OK_CODE
+        assert index.recorded == 1
+
+    def test_eviction(self) -> None:
+        """Test that the oldest delivery gets evicted."""
+        index = DeliveredTxIndex(max_size=1)
+        index.record(b"tx_1", OK_CODE)
+        index.record(b"tx_2", ERROR_CODE)
+        assert len(index) == 1
+        assert index.get(DeliveredTxIndex.tx_hash(b"tx_1")) is None
+        assert index.get(DeliveredTxIndex.tx_hash(b"tx_2")) == ERROR_CODE
+        assert index.recorded == 2
+
+    def test_non_positive_size(self) -> None:
+        """Test that the size of the index must be positive."""
+        with pytest.raises(ValueError, match="must be positive"):
+            DeliveredTxIndex(max_size=0)
+
+
 @dataclass(frozen=True)
 class SomeClass(BaseTxPayload):
     """Test class."""
@@ -363,6 +540,91 @@ class SomeClass(BaseTxPayload):
     content: Dict
 
 
+class TestPayloadCollection:
+    """Test `PayloadCollection`."""
+
+    @staticmethod
+    def _check_tally(collection: PayloadCollection) -> None:
+        """Check that the tally is the same as counting the votes from scratch."""
+        expected = Counter(payload.values for payload in collection.values())
+        assert collection.votes == expected
+        if not expected:
+            assert collection.most_voted == (None, 0)
+            return
+        assert collection.most_voted == expected.most_common()[0]
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_incremental_tally(self, seed: int) -> None:
+        """Test that the votes and the most voted values, including their ties, are kept up to date."""
+        rng = random.Random(seed)
+        collection = PayloadCollection()
+        self._check_tally(collection)
+        for i in range(30):
+            value = rng.randint(0, 3)
+            collection[f"agent_{i}"] = DummyPayload(f"agent_{i}", value)
+            self._check_tally(collection)
+            assert collection.votes_for((value,)) == collection.votes[(value,)]
+
+    def test_removals_and_replacements(self) -> None:
+        """Test that the tally is recounted after the payloads are replaced or removed."""
+        collection = PayloadCollection(
+            {f"agent_{i}": DummyPayload(f"agent_{i}", i % 2) for i in range(4)}
+        )
+        self._check_tally(collection)
+        collection["agent_0"] = DummyPayload("agent_0", 1)
+        self._check_tally(collection)
+        del collection["agent_1"]
+        self._check_tally(collection)
+        collection.pop("agent_2")
+        self._check_tally(collection)
+        collection.popitem()
+        self._check_tally(collection)
+        collection.update(agent_4=DummyPayload("agent_4", 0))
+        self._check_tally(collection)
+        collection.setdefault("agent_4", DummyPayload("agent_4", 1))
+        self._check_tally(collection)
+        collection.clear()
+        self._check_tally(collection)
+
+    def test_copy(self) -> None:
+        """Test that a copy does not share its tally with the original collection."""
+        collection = PayloadCollection({"agent_0": DummyPayload("agent_0", 0)})
+        self._check_tally(collection)
+        copied = copy(collection)
+        copied["agent_1"] = DummyPayload("agent_1", 0)
+        assert collection.max_votes == 1
+        assert copied.max_votes == 2
+
+    def test_serialized(self) -> None:
+        """Test that the serialized collection is cached, and replaced instead of mutated on changes."""
+        payload = DummyPayload("agent_0", 0)
+        collection = PayloadCollection({"agent_0": payload})
+        serialized = collection.serialized
+        assert serialized == {"agent_0": payload.json}
+        assert collection.serialized is serialized
+        assert CollectionRound.serialize_collection(collection) is serialized
+
+        collection["agent_1"] = DummyPayload("agent_1", 0)
+        assert list(serialized) == ["agent_0"]
+        assert list(collection.serialized) == ["agent_0", "agent_1"]
+
+    def test_unhashable_values(self) -> None:
+        """Test the collection of payloads with unhashable values."""
+        content = {"key": "value"}
+        payload = SomeClass("agent_0", content)
+        assert payload.values[0] is content
+        assert payload.json["content"] is content
+
+        collection = PayloadCollection({"agent_0": DummyPayload("agent_0", 0)})
+        self._check_tally(collection)
+        collection["agent_1"] = payload
+        assert collection.votes_for((content,)) == 1
+        with pytest.raises(TypeError):
+            collection.votes  # pylint: disable=pointless-statement
+        with pytest.raises(TypeError):
+            collection.votes  # pylint: disable=pointless-statement
+
+
 @given(
     dictionaries(
         keys=text(),
@@ -425,6 +687,69 @@ class TestBlockchain:
         """Test 'blocks' property getter."""
         assert self.blockchain.blocks == tuple()
 
+    @staticmethod
+    def add_blocks(blockchain: Blockchain, n_blocks: int) -> List[Block]:
+        """Add blocks, one second apart, to a blockchain."""
+        start = datetime.datetime(2023, 1, 1)
+        blocks = []
+        for _ in range(n_blocks):
+            height = blockchain.height + 1
+            timestamp = start + datetime.timedelta(seconds=height)
+            block = Block(MagicMock(height=height, timestamp=timestamp), [])
+            blockchain.add_block(block)
+            blocks.append(block)
+        return blocks
+
+    @pytest.mark.parametrize(
+        "retention",
+        (BlockRetention(max_blocks=3), BlockRetention(max_age=2.0)),
+    )
+    def test_retention(self, retention: BlockRetention) -> None:
+        """Test that only the latest blocks are kept, while the height tracks all of them."""
+        blockchain = Blockchain(height_offset=10, retention=retention)
+        blocks = self.add_blocks(blockchain, 10)
+        assert blockchain.length == 10
+        assert blockchain.height == 20
+        assert blockchain.blocks == tuple(blocks[-3:])
+        assert blockchain.first_retained_height == 18
+        assert blockchain.get_block(18) is blocks[-3]
+        assert blockchain.last_block is blocks[-1]
+        with pytest.raises(ValueError, match="Block 17 is not kept in memory"):
+            blockchain.get_block(17)
+
+    def test_set_retention(self) -> None:
+        """Test that setting a retention policy drops the old blocks."""
+        blocks = self.add_blocks(self.blockchain, 5)
+        self.blockchain.set_retention(BlockRetention(max_blocks=2))
+        assert self.blockchain.retention == BlockRetention(max_blocks=2)
+        assert self.blockchain.blocks == tuple(blocks[-2:])
+        assert self.blockchain.height == 5
+
+    def test_spill(self, tmp_path: Path) -> None:
+        """Test that the dropped blocks are spilled to the log."""
+        spill_path = str(tmp_path / "blocks.log")
+        blockchain = Blockchain(
+            retention=BlockRetention(max_blocks=1, spill_path=spill_path)
+        )
+        blocks = self.add_blocks(blockchain, 4)
+        spilled = list(BlockSpillLog(spill_path))
+        assert [(height, timestamp) for height, timestamp, _ in spilled] == [
+            (block.header.height, block.timestamp) for block in blocks[:-1]
+        ]
+        assert all(transactions == () for *_, transactions in spilled)
+
+    @pytest.mark.parametrize(
+        "kwargs, match",
+        (
+            ({"max_blocks": 0}, "At least one block must be retained"),
+            ({"max_age": -1.0}, "The max age cannot be negative"),
+        ),
+    )
+    def test_invalid_retention(self, kwargs: Dict[str, Any], match: str) -> None:
+        """Test that an invalid retention policy raises."""
+        with pytest.raises(ValueError, match=match):
+            BlockRetention(**kwargs)
+
 
 class TestBlockBuilder:
     """Test block builder."""
@@ -992,6 +1317,166 @@ class TestAbciAppDB:
         assert self.db.hash() == expected_hash
 
 
+def test_freeze() -> None:
+    """Test `freeze`."""
+    value = {"a": [1, {"b": 2}], "c": (3, [4]), "d": "e"}
+    frozen = freeze(value)
+
+    assert frozen == value
+    assert isinstance(frozen, FrozenDict)
+    assert isinstance(frozen["a"], FrozenList)
+    assert isinstance(frozen["a"][1], FrozenDict)
+    assert isinstance(frozen["c"][1], FrozenList)
+    assert json.dumps(frozen) == json.dumps(value)
+
+    # already frozen values are shared instead of being converted again
+    assert freeze(frozen) is frozen
+    assert freeze([frozen])[0] is frozen
+    assert copy(frozen) is frozen
+    assert deepcopy(frozen) is frozen
+
+    # mutable copies can still be taken
+    assert type(list(frozen["a"])) is list
+    assert type(dict(frozen)) is dict
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    (
+        lambda frozen: frozen.__setitem__("d", 0),
+        lambda frozen: frozen.__delitem__("d"),
+        lambda frozen: frozen.update(d=0),
+        lambda frozen: frozen.pop("d"),
+        lambda frozen: frozen.setdefault("f", 0),
+        lambda frozen: frozen["a"].append(0),
+        lambda frozen: frozen["a"].extend([0]),
+        lambda frozen: frozen["a"].__setitem__(0, 0),
+        lambda frozen: frozen["a"].sort(),
+        lambda frozen: frozen["a"][1].clear(),
+    ),
+)
+def test_frozen_containers_are_immutable(mutate: Callable[[Any], None]) -> None:
+    """Test that the frozen containers cannot be mutated."""
+    frozen = freeze({"a": [1, {"b": 2}], "d": "e"})
+    with pytest.raises(TypeError, match="is immutable"):
+        mutate(frozen)
+    assert frozen == {"a": [1, {"b": 2}], "d": "e"}
+
+
+class TestCopyOnWriteAbciAppDB:
+    """Test 'AbciAppDB' class in copy-on-write mode."""
+
+    def setup(self) -> None:
+        """Set up the tests."""
+        self.db = AbciAppDB(
+            setup_data=dict(participants=[["a", "b"]]),
+            copy_on_write=True,
+        )
+
+    def test_copy_on_write(self) -> None:
+        """Test the `copy_on_write` property."""
+        assert self.db.copy_on_write
+        assert not AbciAppDB(setup_data={}).copy_on_write
+
+    def test_update_and_get(self) -> None:
+        """Test that the values are frozen on write and are not copied on read."""
+        tasks = [{"request_id": 0, "data": [1, 2]}]
+        self.db.update(done_tasks=tasks)
+        # modifying the written value does not affect the db
+        tasks[0]["data"].append(3)
+
+        stored = self.db.get("done_tasks")
+        assert stored == [{"request_id": 0, "data": [1, 2]}]
+        assert stored is self.db.get("done_tasks")
+        assert self.db.get_latest()["done_tasks"] is stored
+        with pytest.raises(TypeError):
+            stored[0]["data"].append(3)
+
+        # a value built out of retrieved values shares them with the stored one
+        self.db.update(done_tasks=[*stored, {"request_id": 1, "data": []}])
+        assert self.db.get("done_tasks")[0] is stored[0]
+
+    def test_setup_data(self) -> None:
+        """Test that the setup data cannot be modified through the property."""
+        setup_data = self.db.setup_data
+        setup_data["participants"].append(["c"])
+        assert self.db.setup_data == {"participants": [["a", "b"]]}
+        assert isinstance(self.db.setup_data["participants"][0], FrozenList)
+
+    def test_create(self) -> None:
+        """Test that the values of a new period are frozen."""
+        self.db.update(consensus_threshold=None, safe_contract_address="0x0")
+        self.db.update(all_participants=["a", "b"])
+        self.db.create(done_tasks=[{"request_id": 0}])
+        assert self.db.reset_index == 1
+        assert isinstance(self.db.get("done_tasks")[0], FrozenDict)
+        assert isinstance(self.db.get("all_participants"), FrozenList)
+
+    def test_sync(self) -> None:
+        """Test that the synced values are frozen and are serialized as the original ones."""
+        self.db.update(done_tasks=[{"request_id": 0}])
+        serialized = self.db.serialize()
+        db = AbciAppDB(setup_data={}, copy_on_write=True)
+        db.sync(serialized)
+        assert isinstance(db.get("done_tasks"), FrozenList)
+        assert db.serialize() == serialized
+        assert db.hash() == self.db.hash()
+
+
+class TestIncrementalHashAbciAppDB:
+    """Test 'AbciAppDB' class with incremental hashing."""
+
+    def setup(self) -> None:
+        """Set up the tests."""
+        self.db = AbciAppDB(
+            setup_data=dict(participants=[["a", "b"]]),
+            incremental_hash=True,
+        )
+
+    def assert_hash_is_consistent(self) -> None:
+        """Assert that the incremental hash is the same as the one of a db synced from scratch."""
+        synced = AbciAppDB(setup_data={}, incremental_hash=True)
+        synced.sync(self.db.serialize())
+        assert self.db.hash() == synced.hash()
+
+    def test_hash_differs_from_legacy(self) -> None:
+        """Test that the incremental hash is not the legacy one."""
+        legacy = AbciAppDB(setup_data=dict(participants=[["a", "b"]]))
+        assert self.db.hash() != legacy.hash()
+        self.assert_hash_is_consistent()
+
+    def test_hash_on_update(self) -> None:
+        """Test that the hash changes and stays consistent on update."""
+        hashes = {self.db.hash()}
+        for value in ({"a": 1}, {"a": 1}, [1, 2]):
+            self.db.update(value=value)
+            hashes.add(self.db.hash())
+            self.assert_hash_is_consistent()
+        assert len(hashes) == 4
+
+    def test_hash_on_create_and_cleanup(self) -> None:
+        """Test that the hash stays consistent on create and cleanup."""
+        self.db.update(all_participants=["a", "b"], consensus_threshold=None)
+        self.db.update(safe_contract_address="0x0")
+        for period in range(3):
+            self.db.create(value=period)
+            for round_ in range(3):
+                self.db.update(value=round_)
+            self.assert_hash_is_consistent()
+
+        before_cleanup = self.db.hash()
+        self.db.cleanup(2, 1)
+        assert self.db.hash() != before_cleanup
+        self.assert_hash_is_consistent()
+
+    def test_hash_on_slashing_config(self) -> None:
+        """Test that the hash depends on the slashing config."""
+        before = self.db.hash()
+        self.db.slashing_config = "config"
+        assert self.db.hash() != before
+        self.assert_hash_is_consistent()
+
+
 class TestBaseSynchronizedData:
     """Test 'BaseSynchronizedData' class."""
 
@@ -1598,6 +2083,75 @@ class TestTimeouts:
         # test that pop_timeout removes elements
         assert self.timeouts.size == 1
 
+    def test_cancel_timeout_twice(self) -> None:
+        """Test that a timeout which is cancelled twice is counted once."""
+        entry_count = self.timeouts.add_timeout(datetime.datetime.now(), MagicMock())
+        self.timeouts.cancel_timeout(entry_count)
+        self.timeouts.cancel_timeout(entry_count)
+        assert self.timeouts.metrics == {
+            "size": 1,
+            "pending": 0,
+            "cancelled": 1,
+            "compactions": 0,
+            "compacted": 0,
+        }
+        self.timeouts.pop_earliest_cancelled_timeouts()
+        assert self.timeouts.cancelled == 0
+
+    def test_compaction(self) -> None:
+        """Test that the heap is rebuilt once the cancelled timeouts pass the threshold."""
+        timeouts: Timeouts = Timeouts(compaction_threshold=0.5, min_compaction_size=4)
+        now = datetime.datetime.now()
+        entries = [
+            timeouts.add_timeout(now + datetime.timedelta(seconds=i), i)
+            for i in range(6)
+        ]
+        for entry_count in entries[:3]:
+            timeouts.cancel_timeout(entry_count)
+        assert timeouts.compactions == 0
+        assert timeouts.pending == 3
+
+        timeouts.cancel_timeout(entries[4])
+        assert timeouts.metrics == {
+            "size": 2,
+            "pending": 2,
+            "cancelled": 0,
+            "compactions": 1,
+            "compacted": 4,
+        }
+        # cancelling a removed timeout has no effect
+        timeouts.cancel_timeout(entries[0])
+        assert timeouts.cancelled == 0
+        assert [timeouts.pop_timeout()[1] for _ in range(2)] == [3, 5]
+
+    @pytest.mark.parametrize("compaction_threshold", (0, -0.5, 1.5))
+    def test_invalid_compaction_threshold(self, compaction_threshold: float) -> None:
+        """Test that the compaction threshold must be a fraction."""
+        with pytest.raises(ValueError, match="compaction threshold must be in"):
+            Timeouts(compaction_threshold=compaction_threshold)
+
+    def test_cancelled_timeouts_do_not_pile_up(self) -> None:
+        """Test that the cancelled timeouts of many rounds do not pile up under the pending ones."""
+        now = datetime.datetime.now()
+        current_entries: List[int] = []
+        max_size = 0
+        for round_ in range(20_000):
+            now += datetime.timedelta(seconds=1)
+            # the cancelled long timeouts are never at the top of the heap, as the short ones expire earlier
+            for entry_count in current_entries:
+                self.timeouts.cancel_timeout(entry_count)
+            current_entries = [
+                self.timeouts.add_timeout(now + datetime.timedelta(seconds=30), round_),
+                self.timeouts.add_timeout(now + datetime.timedelta(days=1), round_),
+            ]
+            self.timeouts.pop_earliest_cancelled_timeouts()
+            max_size = max(max_size, self.timeouts.size)
+
+        assert max_size <= 2 * MIN_TIMEOUTS_COMPACTION_SIZE
+        assert self.timeouts.pending == 2
+        assert len(self.timeouts._entry_finder) == self.timeouts.size
+        assert self.timeouts.compactions > 0
+
 
 STUB_TERMINATION_CONFIG = abci_base.BackgroundAppConfig(
     round_cls=ConcreteBackgroundRound,
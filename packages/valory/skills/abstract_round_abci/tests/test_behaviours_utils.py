@@ -75,6 +75,7 @@ from packages.valory.skills.abstract_round_abci.base import (
     BaseSynchronizedData,
     BaseTxPayload,
     DegenerateRound,
+    DeliveredTxIndex,
     LEDGER_API_ADDRESS,
     OK_CODE,
     Transaction,
@@ -371,6 +372,121 @@ def test_async_behaviour_sleep() -> None:
     ).total_seconds() > timedelta
 
 
+def test_async_behaviour_sleep_does_not_resume_before_deadline() -> None:
+    """Test that a sleeping behaviour is not resumed on every tick."""
+
+    class MyAsyncBehaviour(AsyncBehaviourTest):
+        def async_act(self) -> Generator:
+            yield from self.sleep(60)
+
+    behaviour = MyAsyncBehaviour()
+    behaviour.act()
+    with mock.patch.object(behaviour, "_AsyncBehaviour__resume") as resume_mock:
+        for _ in range(10):
+            behaviour.act()
+    resume_mock.assert_not_called()
+    assert behaviour.state == AsyncBehaviour.AsyncState.RUNNING
+
+
+def test_async_behaviour_wait_for_condition_with_key() -> None:
+    """Test 'wait_for_condition' with a condition key."""
+
+    evaluations = 0
+    key = 0
+
+    def condition() -> bool:
+        nonlocal evaluations
+        evaluations += 1
+        return key == 2
+
+    class MyAsyncBehaviour(AsyncBehaviourTest):
+        def async_act(self) -> Generator:
+            yield from self.wait_for_condition(condition, condition_key=lambda: key)
+
+    behaviour = MyAsyncBehaviour()
+    behaviour.act()
+    assert evaluations == 1
+
+    # the condition is not evaluated again, as long as its key does not change
+    for _ in range(10):
+        behaviour.act()
+    assert evaluations == 1
+    assert behaviour.state == AsyncBehaviour.AsyncState.RUNNING
+
+    key = 1
+    behaviour.act()
+    assert evaluations == 2
+    assert behaviour.state == AsyncBehaviour.AsyncState.RUNNING
+
+    key = 2
+    behaviour.act()
+    assert evaluations == 3
+    assert behaviour.state == AsyncBehaviour.AsyncState.READY
+
+
+def test_async_behaviour_wait_for_condition_with_key_and_timeout() -> None:
+    """Test that 'wait_for_condition' with a condition key times out, even if the key never changes."""
+
+    class MyAsyncBehaviour(AsyncBehaviourTest):
+        def async_act(self) -> Generator:
+            yield from self.wait_for_condition(
+                lambda: False, timeout=0.05, condition_key=lambda: 0
+            )
+
+    behaviour = MyAsyncBehaviour()
+    behaviour.act()
+    behaviour.act()
+    assert behaviour.state == AsyncBehaviour.AsyncState.RUNNING
+
+    time.sleep(0.1)
+    with pytest.raises(TimeoutException):
+        behaviour.act()
+
+
+def test_async_behaviour_wait_for_condition_poll_interval() -> None:
+    """Test that 'wait_for_condition' evaluates the condition again once the poll interval passes."""
+
+    evaluations = 0
+
+    def condition() -> bool:
+        nonlocal evaluations
+        evaluations += 1
+        return evaluations == 2
+
+    class MyAsyncBehaviour(AsyncBehaviourTest):
+        def async_act(self) -> Generator:
+            yield from self.wait_for_condition(
+                condition, condition_key=lambda: 0, poll_interval=0.05
+            )
+
+    behaviour = MyAsyncBehaviour()
+    behaviour.act()
+    behaviour.act()
+    assert evaluations == 1
+
+    time.sleep(0.1)
+    behaviour.act()
+    assert evaluations == 2
+    assert behaviour.state == AsyncBehaviour.AsyncState.READY
+
+
+def test_async_behaviour_wait_for_message_times_out_without_message() -> None:
+    """Test that 'wait_for_message' times out on a tick, even if no message arrives."""
+
+    class MyAsyncBehaviour(AsyncBehaviourTest):
+        def async_act(self) -> Generator:
+            yield from self.wait_for_message(timeout=0.05)
+
+    behaviour = MyAsyncBehaviour()
+    behaviour.act()
+    behaviour.act()
+    assert behaviour.state == AsyncBehaviour.AsyncState.WAITING_MESSAGE
+
+    time.sleep(0.1)
+    with pytest.raises(TimeoutException):
+        behaviour.act()
+
+
 def test_async_behaviour_without_yield() -> None:
     """Test AsyncBehaviour, async_act without yield/yield from."""
 
@@ -510,6 +626,7 @@ class TestBaseBehaviour:
             request_retry_delay=_DEFAULT_REQUEST_RETRY_DELAY,
             tx_timeout=_DEFAULT_TX_TIMEOUT,
             max_attempts=_DEFAULT_TX_MAX_ATTEMPTS,
+            tx_delivery_push_timeout=None,
         )
         self.context_mock.shared_state = {}
         self.context_state_synchronized_data_mock = MagicMock()
@@ -685,6 +802,170 @@ class TestBaseBehaviour:
             try_send(generator)
             assert expected_logs in caplog.text
 
+    def _ipfs_requests(self, count: int) -> List[Tuple[IpfsMessage, IpfsDialogue]]:
+        """Create IPFS requests, each one of them in a new dialogue."""
+        return [
+            cast(
+                Tuple[IpfsMessage, IpfsDialogue],
+                cast(IpfsDialogues, self.context_mock.ipfs_dialogues).create(
+                    str(IPFS_CONNECTION_ID), IpfsMessage.Performative.GET_FILES
+                ),
+            )
+            for _ in range(count)
+        ]
+
+    def _respond_to_ipfs_request(
+        self, dialogue: IpfsDialogue, response: IpfsMessage
+    ) -> None:
+        """Respond to an IPFS request, the way the handler does."""
+        request_nonce = dialogue.dialogue_label.dialogue_reference[0]
+        callback = self.context_mock.requests.request_id_to_callback.pop(request_nonce)
+        callback(response, self.behaviour)
+
+    def test_get_many_from_ipfs(self) -> None:
+        """Test that 'get_many_from_ipfs' sends all the requests at once, and collects the responses as they arrive."""
+        requests = self._ipfs_requests(2)
+        sent = []
+        self.context_mock.outbox.put_message = lambda message: sent.append(message)
+        on_result = MagicMock()
+        with mock.patch.object(
+            IPFSBehaviour, "_build_ipfs_get_file_req", side_effect=requests
+        ), mock.patch.object(
+            IPFSBehaviour,
+            "_deserialize_ipfs_objects",
+            side_effect=lambda files, *_: files,
+        ), mock.patch.object(
+            AsyncBehaviour, "is_stopped", new_callable=mock.PropertyMock
+        ) as is_stopped:
+            is_stopped.return_value = False
+            gen = self.behaviour.get_many_from_ipfs(
+                ["hash_a", "hash_b"], on_result=on_result
+            )
+            gen.send(None)
+            assert sent == [message for message, _ in requests]
+
+            # the responses may arrive in any order
+            self._respond_to_ipfs_request(
+                requests[1][1],
+                MagicMock(
+                    performative=IpfsMessage.Performative.FILES, files={"b": "b"}
+                ),
+            )
+            gen.send(None)
+            on_result.assert_called_once_with("hash_b", {"b": "b"})
+
+            self._respond_to_ipfs_request(
+                requests[0][1],
+                MagicMock(performative=IpfsMessage.Performative.ERROR),
+            )
+            with pytest.raises(StopIteration) as stop:
+                gen.send(None)
+        assert stop.value.value == {"hash_a": None, "hash_b": {"b": "b"}}
+        assert on_result.call_count == 2
+
+    def test_get_many_from_ipfs_timeout(self) -> None:
+        """Test that each one of the requests of 'get_many_from_ipfs' times out independently."""
+        requests = self._ipfs_requests(2)
+        with mock.patch.object(
+            IPFSBehaviour, "_build_ipfs_get_file_req", side_effect=requests
+        ), mock.patch.object(
+            IPFSBehaviour,
+            "_deserialize_ipfs_objects",
+            side_effect=lambda files, *_: files,
+        ), mock.patch.object(
+            AsyncBehaviour, "is_stopped", new_callable=mock.PropertyMock
+        ) as is_stopped, mock.patch.object(
+            self.behaviour, "handle_late_messages"
+        ) as handle_late_messages:
+            is_stopped.return_value = False
+            gen = self.behaviour.get_many_from_ipfs(["hash_a", "hash_b"], timeout=0.05)
+            gen.send(None)
+            self._respond_to_ipfs_request(
+                requests[0][1],
+                MagicMock(
+                    performative=IpfsMessage.Performative.FILES, files={"a": "a"}
+                ),
+            )
+            gen.send(None)
+            time.sleep(0.1)
+            with pytest.raises(StopIteration) as stop:
+                gen.send(None)
+            # the response to the timed-out request is handled as a late message
+            late_response = MagicMock()
+            self._respond_to_ipfs_request(requests[1][1], late_response)
+            handle_late_messages.assert_called_once_with(
+                self.behaviour.behaviour_id, late_response
+            )
+        assert stop.value.value == {"hash_a": {"a": "a"}, "hash_b": None}
+
+    def test_do_request_late_response(self) -> None:
+        """Test that a response which arrives after its request has timed out is not delivered to the next request."""
+        (late_request, late_dialogue), (request, dialogue) = (
+            self.behaviour._build_http_request_message("GET", f"http://{url}")
+            for url in ("late", "next")
+        )
+        callbacks = self.context_mock.requests.request_id_to_callback
+        with mock.patch.object(
+            AsyncBehaviour, "is_stopped", new_callable=mock.PropertyMock
+        ) as is_stopped, mock.patch.object(
+            self.behaviour, "try_send"
+        ) as try_send, mock.patch.object(
+            self.behaviour, "handle_late_messages"
+        ) as handle_late_messages:
+            is_stopped.return_value = False
+            gen = self.behaviour._do_request(late_request, late_dialogue, timeout=0.05)
+            gen.send(None)
+            time.sleep(0.1)
+            with pytest.raises(TimeoutException):
+                gen.send(None)
+
+            gen = self.behaviour._do_request(request, dialogue)
+            gen.send(None)
+            # the responses are handled the way the handler does
+            late_response = MagicMock()
+            late_nonce = late_dialogue.dialogue_label.dialogue_reference[0]
+            callbacks.pop(late_nonce)(late_response, self.behaviour)
+            try_send.assert_not_called()
+            handle_late_messages.assert_called_once_with(
+                self.behaviour.behaviour_id, late_response
+            )
+
+            response = MagicMock()
+            nonce = dialogue.dialogue_label.dialogue_reference[0]
+            callbacks.pop(nonce)(response, self.behaviour)
+            try_send.assert_called_once_with(response)
+        assert callbacks == {}
+
+    def test_send_many_to_ipfs(self) -> None:
+        """Test 'send_many_to_ipfs'."""
+        requests = self._ipfs_requests(2)
+        with mock.patch.object(
+            IPFSBehaviour, "_build_ipfs_store_file_req", side_effect=requests
+        ), mock.patch.object(
+            AsyncBehaviour, "is_stopped", new_callable=mock.PropertyMock
+        ) as is_stopped:
+            is_stopped.return_value = False
+            gen = self.behaviour.send_many_to_ipfs({"file_a": {}, "file_b": {}})
+            gen.send(None)
+            for (_, dialogue), ipfs_hash in zip(requests, ("hash_a", "hash_b")):
+                self._respond_to_ipfs_request(
+                    dialogue,
+                    MagicMock(
+                        performative=IpfsMessage.Performative.IPFS_HASH,
+                        ipfs_hash=ipfs_hash,
+                    ),
+                )
+            with pytest.raises(StopIteration) as stop:
+                gen.send(None)
+        assert stop.value.value == {"file_a": "hash_a", "file_b": "hash_b"}
+
+    def test_get_many_from_ipfs_no_requests(self) -> None:
+        """Test 'get_many_from_ipfs' without any hashes."""
+        gen = self.behaviour.get_many_from_ipfs([])
+        with pytest.raises(StopIteration) as stop:
+            gen.send(None)
+        assert stop.value.value == {}
+
     def test_params_property(self) -> None:
         """Test the 'params' property."""
         assert self.behaviour.params == self.context_params_mock
@@ -1415,6 +1696,51 @@ class TestBaseBehaviour:
             # trigger generator function
             try_send(gen, obj=None)
 
+    def test_wait_until_transaction_delivered_locally(self) -> None:
+        """Test that '_wait_until_transaction_delivered' learns about the delivery from the local ABCI app."""
+        delivered_txs = DeliveredTxIndex()
+        self.context_mock.state.delivered_txs = delivered_txs
+        self.behaviour.params.tx_delivery_push_timeout = 5.0  # type: ignore
+        tx_hash = DeliveredTxIndex.tx_hash(b"tx")
+        with mock.patch.object(BaseBehaviour, "_get_tx_info") as get_tx_info:
+            gen = self.behaviour._wait_until_transaction_delivered(tx_hash)
+            gen.send(None)
+            gen.send(None)
+            delivered_txs.record(b"tx", OK_CODE)
+            with pytest.raises(StopIteration) as stop:
+                gen.send(None)
+        get_tx_info.assert_not_called()
+        assert stop.value.value == (True, None)
+
+    @pytest.mark.parametrize("code", (None, OK_CODE + 1))
+    def test_wait_until_transaction_delivered_locally_falls_back(
+        self, code: Optional[int]
+    ) -> None:
+        """Test that '_wait_until_transaction_delivered' polls the RPC, if the tx is not delivered successfully in time."""
+        delivered_txs = DeliveredTxIndex()
+        if code is not None:
+            delivered_txs.record(b"tx", code)
+        self.context_mock.state.delivered_txs = delivered_txs
+        self.behaviour.params.tx_delivery_push_timeout = 0.01  # type: ignore
+        response = MagicMock(
+            status_code=200, body='{"result": {"tx_result": {"code": 0}}}'
+        )
+        with mock.patch.object(
+            BaseBehaviour,
+            "_get_tx_info",
+            side_effect=lambda *_, **__: dummy_generator_wrapper(response)(),
+        ) as get_tx_info:
+            gen = self.behaviour._wait_until_transaction_delivered(
+                DeliveredTxIndex.tx_hash(b"tx")
+            )
+            gen.send(None)
+            time.sleep(0.02)
+            with pytest.raises(StopIteration) as stop:
+                for _ in range(2):
+                    gen.send(None)
+        get_tx_info.assert_called_once()
+        assert stop.value.value == (True, response)
+
     @mock.patch.object(behaviour_utils, "Terms")
     def test_get_default_terms(self, *_: Any) -> None:
         """Test '_get_default_terms'."""
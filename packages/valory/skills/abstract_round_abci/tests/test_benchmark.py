@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the benchmark.py module of the skill."""
+
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from packages.valory.skills.abstract_round_abci.benchmark import (
+    BenchmarkReport,
+    LatencyHistogram,
+    MAX_BUCKET,
+    ROLLUP_FILENAME,
+    append_rotating,
+    read_rollups,
+)
+
+
+# pylint: skip-file
+
+
+class TestLatencyHistogram:
+    """Test `LatencyHistogram`."""
+
+    def test_empty(self) -> None:
+        """Test the summary of an empty histogram."""
+        summary = LatencyHistogram().summary()
+        assert summary == {
+            "count": 0,
+            "mean": 0.0,
+            "max": 0.0,
+            "p50": 0.0,
+            "p95": 0.0,
+            "p99": 0.0,
+        }
+
+    @pytest.mark.parametrize("percent", (50, 95, 99))
+    def test_percentile_error(self, percent: int) -> None:
+        """Test that the estimated percentiles are within 5% of the exact ones."""
+        rng = random.Random(0)
+        durations = [rng.lognormvariate(0, 1.5) for _ in range(10_000)]
+        histogram = LatencyHistogram()
+        for duration in durations:
+            histogram.record(duration)
+
+        exact = sorted(durations)[int(len(durations) * percent / 100) - 1]
+        assert histogram.percentile(percent) == pytest.approx(exact, rel=0.05)
+        assert histogram.count == len(durations)
+        assert histogram.max == max(durations)
+
+    def test_bucket_bounds(self) -> None:
+        """Test that the tiny and the huge durations fall in the first and the last buckets."""
+        assert LatencyHistogram.bucket_of(0) == 0
+        assert LatencyHistogram.bucket_of(1e-9) == 0
+        assert LatencyHistogram.bucket_of(1e12) == MAX_BUCKET
+        assert LatencyHistogram.bucket_of(1.0) < LatencyHistogram.bucket_of(1.1)
+
+    def test_merge(self) -> None:
+        """Test that merging histograms is the same as recording all the durations in one."""
+        first, second, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for i in range(1, 100):
+            (first if i % 2 else second).record(i / 10)
+            both.record(i / 10)
+
+        merged = LatencyHistogram.merged((first, second))
+        assert merged.buckets == both.buckets
+        assert (merged.count, merged.min, merged.max) == (
+            both.count,
+            both.min,
+            both.max,
+        )
+        assert merged.summary() == pytest.approx(both.summary())
+
+    def test_json(self) -> None:
+        """Test the json representation of a histogram."""
+        histogram = LatencyHistogram()
+        for duration in (0.1, 0.1, 2.5):
+            histogram.record(duration)
+
+        data = json.loads(json.dumps(histogram.to_json()))
+        assert len(data["buckets"]) == 2
+        assert LatencyHistogram.from_json(data).summary() == histogram.summary()
+        empty = LatencyHistogram.from_json(LatencyHistogram().to_json())
+        assert empty.min == LatencyHistogram().min
+
+
+def test_append_rotating(tmp_path: Path) -> None:
+    """Test that the file is rotated once it would exceed its maximum size, keeping the given number of backups."""
+    path = tmp_path / ROLLUP_FILENAME
+    for i in range(10):
+        append_rotating(path, f"line{i}", max_file_size=12, backup_count=2)
+
+    assert path.read_text() == "line8\nline9\n"
+    assert (tmp_path / f"{ROLLUP_FILENAME}.1").read_text() == "line6\nline7\n"
+    assert (tmp_path / f"{ROLLUP_FILENAME}.2").read_text() == "line4\nline5\n"
+    assert not (tmp_path / f"{ROLLUP_FILENAME}.3").exists()
+
+    append_rotating(path, "line10", max_file_size=6, backup_count=0)
+    assert path.read_text() == "line10\n"
+
+
+def _rollup(agent: str, period: int, durations: dict) -> dict:
+    """Get the roll-up of a period, with a local measurement per behaviour."""
+    behaviours = {}
+    for behaviour, duration in durations.items():
+        histogram = LatencyHistogram()
+        histogram.record(duration)
+        behaviours[behaviour] = {"local": histogram.to_json()}
+    return {"agent": agent, "period": period, "behaviours": behaviours}
+
+
+def test_report(tmp_path: Path) -> None:
+    """Test merging the rotated files of several agents into a report."""
+    for agent, slow in (("agent_0", 1.0), ("agent_1", 3.0)):
+        agent_dir = tmp_path / agent
+        agent_dir.mkdir()
+        for period in range(4):
+            line = json.dumps(_rollup(agent, period, {"fast": 0.1, "slow": slow}))
+            append_rotating(agent_dir / ROLLUP_FILENAME, line, max_file_size=200)
+    (tmp_path / "not_an_agent.txt").write_text("")
+
+    rollups = list(read_rollups(tmp_path))
+    assert [rollup["period"] for rollup in rollups] == [0, 1, 2, 3] * 2
+
+    report = BenchmarkReport()
+    for rollup in rollups:
+        report.add(rollup)
+
+    ((behaviour, summary), _) = report.slowest_behaviours(2)
+    assert behaviour == "slow"
+    assert summary["count"] == 8
+    assert summary["p95"] == pytest.approx(3.0, rel=0.05)
+    assert report.slowest_rounds(1) == [(0, "slow", 3.0)]
+
+    text = report.format(top=1)
+    assert "Agents: 2, behaviours: 2, rounds: 8" in text
+    assert "fast" not in text
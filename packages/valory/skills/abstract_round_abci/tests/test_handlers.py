@@ -25,7 +25,7 @@ import json
 import logging
 from dataclasses import asdict
 from datetime import datetime
-from typing import Any, Dict, cast
+from typing import Any, Dict, Optional, Type, cast
 from unittest import mock
 from unittest.mock import MagicMock
 
@@ -47,13 +47,15 @@ from packages.valory.protocols.abci.custom_types import (
 )
 from packages.valory.protocols.http import HttpMessage
 from packages.valory.protocols.tendermint import TendermintMessage
-from packages.valory.skills.abstract_round_abci import handlers
 from packages.valory.skills.abstract_round_abci.base import (
     ABCIAppInternalError,
     AddBlockError,
+    DeliveredTxIndex,
     ERROR_CODE,
     OK_CODE,
     SignatureNotValidError,
+    Transaction,
+    TransactionCache,
     TransactionNotValidError,
 )
 from packages.valory.skills.abstract_round_abci.dialogues import (
@@ -66,7 +68,6 @@ from packages.valory.skills.abstract_round_abci.handlers import (
     ABCIRoundHandler,
     AbstractResponseHandler,
     TendermintHandler,
-    Transaction,
     exception_to_info_msg,
 )
 from packages.valory.skills.abstract_round_abci.models import TendermintRecoveryParams
@@ -151,7 +152,7 @@ class TestABCIRoundHandler:
         )
         assert response.performative == AbciMessage.Performative.RESPONSE_BEGIN_BLOCK
 
-    @mock.patch.object(handlers, "Transaction")
+    @mock.patch.object(TransactionCache, "decode_and_verify")
     def test_check_tx(self, *_: Any) -> None:
         """Test the 'check_tx' handler method."""
         message, dialogue = self.dialogues.create(
@@ -185,7 +186,7 @@ class TestABCIRoundHandler:
         assert response.performative == AbciMessage.Performative.RESPONSE_CHECK_TX
         assert response.code == ERROR_CODE
 
-    @mock.patch.object(handlers, "Transaction")
+    @mock.patch.object(TransactionCache, "decode_and_verify")
     def test_deliver_tx(self, *_: Any) -> None:
         """Test the 'deliver_tx' handler method."""
         message, dialogue = self.dialogues.create(
@@ -204,6 +205,30 @@ class TestABCIRoundHandler:
         assert response.performative == AbciMessage.Performative.RESPONSE_DELIVER_TX
         assert response.code == OK_CODE
 
+    @pytest.mark.parametrize(
+        "decode_side_effect, expected_code",
+        ((None, OK_CODE), (SignatureNotValidError, ERROR_CODE)),
+    )
+    def test_deliver_tx_records_delivery(
+        self, decode_side_effect: Optional[Type[Exception]], expected_code: int
+    ) -> None:
+        """Test that the 'deliver_tx' handler method records the result of the delivery."""
+        self.context.state.delivered_txs = DeliveredTxIndex()
+        message, dialogue = self.dialogues.create(
+            counterparty="",
+            performative=AbciMessage.Performative.REQUEST_DELIVER_TX,
+            tx=b"tx",
+        )
+        with mock.patch.object(
+            TransactionCache, "decode_and_verify", side_effect=decode_side_effect
+        ):
+            response = self.handler.deliver_tx(
+                cast(AbciMessage, message), cast(AbciDialogue, dialogue)
+            )
+        assert response.code == expected_code
+        tx_hash = DeliveredTxIndex.tx_hash(b"tx")
+        assert self.context.state.delivered_txs.get(tx_hash) == expected_code
+
     @mock.patch.object(
         Transaction,
         "decode",
@@ -227,7 +252,7 @@ class TestABCIRoundHandler:
         assert response.performative == AbciMessage.Performative.RESPONSE_DELIVER_TX
         assert response.code == ERROR_CODE
 
-    @mock.patch.object(handlers, "Transaction")
+    @mock.patch.object(TransactionCache, "decode_and_verify")
     def test_deliver_bad_tx(self, *_: Any) -> None:
         """Test the 'deliver_tx' handler method, when the transaction is not ok."""
         message, dialogue = self.dialogues.create(
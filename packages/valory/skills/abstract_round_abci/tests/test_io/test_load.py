@@ -22,12 +22,15 @@
 # pylint: skip-file
 
 import json
+import os
+from pathlib import PosixPath
 from typing import Optional, cast
 
 import pytest
 
 from packages.valory.skills.abstract_round_abci.io_.load import (
     CustomLoaderType,
+    FileLoader,
     JSONLoader,
     Loader,
     SupportedLoaderType,
@@ -112,3 +115,34 @@ class TestLoader:
         }
         actual_objects = self.json_loader.load(serialized_objects)
         assert expected_objects == actual_objects
+
+
+class TestFileLoader:
+    """Tests for the `FileLoader`."""
+
+    def test_load(self, tmp_path: PosixPath) -> None:
+        """Test that the files are written in chunks, under their names."""
+        content = "héllo wörld\n" * 1000
+        loader = Loader(SupportedFiletype.FILE, None, str(tmp_path))
+        loader._file_loader._chunk_size = 7
+        filepath = loader.load({"file.txt": content})
+        assert filepath == os.path.join(str(tmp_path), "file.txt")
+        with open(filepath, encoding="utf-8") as file:
+            assert file.read() == content
+
+    def test_load_multiple(self, tmp_path: PosixPath) -> None:
+        """Test loading multiple files, which are never written outside the directory."""
+        loader = Loader(SupportedFiletype.FILE, None, str(tmp_path))
+        filepaths = loader.load({"a": "a", "../b": "b"})
+        assert filepaths == {
+            "a": os.path.join(str(tmp_path), "a"),
+            "../b": os.path.join(str(tmp_path), "b"),
+        }
+
+    def test_load_single_object(self) -> None:
+        """Test that a file without a name is written in a temporary directory."""
+        loader = FileLoader()
+        filepath = loader.load_single_object("content")
+        assert os.path.dirname(filepath) == loader.path
+        with open(filepath, encoding="utf-8") as file:
+            assert file.read() == "content"
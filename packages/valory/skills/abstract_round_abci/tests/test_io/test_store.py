@@ -29,6 +29,7 @@ import pytest
 
 from packages.valory.skills.abstract_round_abci.io_.store import (
     CustomStorerType,
+    FileStorer,
     JSONStorer,
     Storer,
     SupportedFiletype,
@@ -102,3 +103,45 @@ class TestStorer:
         expected_object = {expected_path: json.dumps(dummy_object, indent=4)}
         actual_object = self.json_storer.store({dummy_filename: dummy_object}, True)
         assert expected_object == actual_object
+
+
+class TestFileStorer:
+    """Tests for the `FileStorer`."""
+
+    def test_store_path(self, tmp_path: PosixPath) -> None:
+        """Test storing a file from its path."""
+        content = "héllo wörld\n" * 1000
+        filepath = tmp_path / "file.txt"
+        filepath.write_text(content, encoding="utf-8")
+        storer = Storer(SupportedFiletype.FILE, None, str(tmp_path / "stored"))
+        assert storer.store(str(filepath), False) == {str(tmp_path / "stored"): content}
+
+    def test_store_empty_file(self, tmp_path: PosixPath) -> None:
+        """Test storing an empty file, which cannot be memory mapped."""
+        filepath = tmp_path / "empty.txt"
+        filepath.touch()
+        assert FileStorer(str(tmp_path)).serialize_object("empty", filepath) == {
+            "empty": ""
+        }
+
+    def test_store_chunks(self, tmp_path: PosixPath) -> None:
+        """Test storing a stream of chunks, with a multibyte character split across two of them."""
+        encoded = "wörld".encode("utf-8")
+        chunks = ["hello ", encoded[:2], encoded[2:]]
+        assert FileStorer(str(tmp_path)).serialize_object("file", iter(chunks)) == {
+            "file": "hello wörld"
+        }
+
+    def test_store_multiple(self, tmp_path: PosixPath) -> None:
+        """Test storing multiple files."""
+        (tmp_path / "a.txt").write_text("a")
+        (tmp_path / "b.txt").write_text("b")
+        path = str(tmp_path / "stored")
+        storer = Storer(SupportedFiletype.FILE, None, path)
+        actual = storer.store(
+            {"a": str(tmp_path / "a.txt"), "b": str(tmp_path / "b.txt")}, True
+        )
+        assert actual == {
+            str(Path(path) / "a"): "a",
+            str(Path(path) / "b"): "b",
+        }
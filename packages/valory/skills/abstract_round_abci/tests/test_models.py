@@ -46,6 +46,7 @@ from packages.valory.skills.abstract_round_abci.base import (
     OffenseStatusEncoder,
     ROUND_COUNT_DEFAULT,
 )
+from packages.valory.skills.abstract_round_abci.benchmark import ROLLUP_FILENAME
 from packages.valory.skills.abstract_round_abci.models import (
     ApiSpecs,
     BaseParams,
@@ -672,6 +673,57 @@ class TestBenchmarkTool:
             behaviour_data = json.loads(benchmark_file.read_text())
             self._check_behaviour_data(behaviour_data, agent_name)
 
+            rollup_file = benchmark_dir / ROLLUP_FILENAME
+            (rollup,) = map(json.loads, rollup_file.read_text().splitlines())
+            assert rollup["agent"] == agent_name
+            assert rollup["period"] == 0
+            assert set(rollup["behaviours"][agent_name]) == {"local", "consensus"}
+            assert benchmark.data == []
+
+    def test_sliding_window(self) -> None:
+        """Test that the measurements are added up per period, and the percentiles cover the sliding window."""
+
+        agent_name = "agent"
+        skill_context = MagicMock(
+            agent_address=agent_name, logger=MagicMock(info=logging.info)
+        )
+
+        with TemporaryDirectory() as temp_dir:
+            benchmark = BenchmarkTool(
+                name=agent_name,
+                skill_context=skill_context,
+                log_dir=temp_dir,
+                window_size=2,
+                max_file_size=1,
+                backup_count=1,
+            )
+
+            for period, durations in enumerate(((1.0, 2.0), (3.0,), (4.0,))):
+                with mock.patch(
+                    "packages.valory.skills.abstract_round_abci.models.time",
+                    side_effect=[t for duration in durations for t in (0, duration)],
+                ):
+                    for _ in durations:
+                        with benchmark.measure(agent_name).local():
+                            pass
+
+                (behaviour_data,) = benchmark.data
+                assert behaviour_data["data"]["local"] == sum(durations)
+                stats = benchmark.stats[agent_name]["local"]
+                benchmark.save(period)
+
+            assert stats["count"] == 2
+            assert stats["max"] == 4.0
+
+            # each roll-up exceeds the maximum size, so only the last two are kept
+            benchmark_dir = Path(temp_dir, agent_name)
+            assert sorted(
+                path.name for path in benchmark_dir.glob(f"{ROLLUP_FILENAME}*")
+            ) == [ROLLUP_FILENAME, f"{ROLLUP_FILENAME}.1"]
+            assert all(
+                (benchmark_dir / f"{period}.json").is_file() for period in range(3)
+            )
+
 
 def test_requests_model_initialization() -> None:
     """Test initialization of the 'Requests(Model)' class."""
@@ -35,6 +35,8 @@ from packages.valory.skills.abstract_round_abci.utils import (
     MAX_UINT64,
     ValueType,
     VerifyDrand,
+    canonical_decode,
+    canonical_encode,
     consensus_threshold,
     filter_negative,
     get_data_from_nested_dict,
@@ -305,3 +307,54 @@ def test_inverse(
 ) -> None:
     """Test `inverse`."""
     assert inverse(dict_) == expected
+
+
+@given(
+    st.recursive(
+        st.none()
+        | st.booleans()
+        | st.integers()
+        | st.floats(allow_nan=False)
+        | st.text()
+        | st.binary(),
+        lambda children: st.lists(children)
+        | st.dictionaries(st.text() | st.integers(), children),
+    )
+)
+def test_canonical_encode_decode(value: Any) -> None:
+    """Test that `canonical_decode` reverses `canonical_encode`."""
+    encoded = canonical_encode(value)
+    assert canonical_decode(encoded) == value
+    assert canonical_encode(canonical_decode(encoded)) == encoded
+
+
+def test_canonical_encode_is_deterministic() -> None:
+    """Test that equal values are encoded to the same bytes."""
+    assert canonical_encode({"a": 1, "b": [2, 3]}) == canonical_encode(
+        {"b": (2, 3), "a": 1}
+    )
+    assert canonical_encode(1) != canonical_encode(True)
+    assert canonical_encode(2**256) != canonical_encode(-(2**256))
+
+
+@pytest.mark.parametrize("value", (object(), {1, 2}, 1j))
+def test_canonical_encode_unsupported(value: Any) -> None:
+    """Test that unsupported values cannot be encoded."""
+    with pytest.raises(TypeError, match="Cannot encode value of type"):
+        canonical_encode(value)
+
+
+@pytest.mark.parametrize(
+    "data, match",
+    (
+        (b"", "Truncated value."),
+        (b"\x03\x80", "Truncated varint."),
+        (b"\x05\x05ab", "Truncated value."),
+        (b"\x09", "Unknown type 9 at offset 0."),
+        (b"\x00\x00", "Unexpected 1 trailing bytes."),
+    ),
+)
+def test_canonical_decode_malformed(data: bytes, match: str) -> None:
+    """Test that malformed data cannot be decoded."""
+    with pytest.raises(ValueError, match=match):
+        canonical_decode(data)
@@ -22,6 +22,7 @@
 import builtins
 import collections
 import dataclasses
+import struct
 import sys
 import types
 import typing
@@ -502,3 +503,165 @@ def inverse(dict_: Dict[KeyType, ValueType]) -> Dict[ValueType, List[KeyType]]:
     for key, value in dict_.items():
         inverse_[value].append(key)
     return inverse_
+
+
+_CANONICAL_NONE = 0x00
+_CANONICAL_FALSE = 0x01
+_CANONICAL_TRUE = 0x02
+_CANONICAL_INT = 0x03
+_CANONICAL_FLOAT = 0x04
+_CANONICAL_STR = 0x05
+_CANONICAL_BYTES = 0x06
+_CANONICAL_LIST = 0x07
+_CANONICAL_DICT = 0x08
+
+_FLOAT_STRUCT = struct.Struct(">d")
+
+
+def _encode_varint(value: int, buffer: bytearray) -> None:
+    """Encode a non-negative integer as an unsigned LEB128 varint."""
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _encode_canonical(value: Any, buffer: bytearray) -> None:
+    """Encode a value in the canonical binary format, appending it to the buffer."""
+    # `bool` must be checked before `int`, since it is a subclass of it
+    if value is None:
+        buffer.append(_CANONICAL_NONE)
+    elif value is True:
+        buffer.append(_CANONICAL_TRUE)
+    elif value is False:
+        buffer.append(_CANONICAL_FALSE)
+    elif isinstance(value, int):
+        buffer.append(_CANONICAL_INT)
+        # zigzag encoding, so that the negative numbers are short too
+        _encode_varint(value * 2 if value >= 0 else -value * 2 - 1, buffer)
+    elif isinstance(value, float):
+        buffer.append(_CANONICAL_FLOAT)
+        buffer += _FLOAT_STRUCT.pack(value)
+    elif isinstance(value, str):
+        encoded = value.encode("utf-8")
+        buffer.append(_CANONICAL_STR)
+        _encode_varint(len(encoded), buffer)
+        buffer += encoded
+    elif isinstance(value, (bytes, bytearray)):
+        buffer.append(_CANONICAL_BYTES)
+        _encode_varint(len(value), buffer)
+        buffer += value
+    elif isinstance(value, (list, tuple)):
+        buffer.append(_CANONICAL_LIST)
+        _encode_varint(len(value), buffer)
+        for item in value:
+            _encode_canonical(item, buffer)
+    elif isinstance(value, dict):
+        # the entries are sorted by their encoded keys, so that the encoding does not depend on the insertion order
+        entries = []
+        for key, item in value.items():
+            encoded_key = bytearray()
+            _encode_canonical(key, encoded_key)
+            entries.append((bytes(encoded_key), item))
+        entries.sort(key=lambda entry: entry[0])
+        buffer.append(_CANONICAL_DICT)
+        _encode_varint(len(entries), buffer)
+        for encoded_key, item in entries:
+            buffer += encoded_key
+            _encode_canonical(item, buffer)
+    else:
+        raise TypeError(f"Cannot encode value of type {type(value)}: {value!r}")
+
+
+def canonical_encode(value: Any) -> bytes:
+    """
+    Encode a value in a compact, canonical binary format.
+
+    The supported values are `None`, booleans, integers, floats, strings, bytes, lists, tuples and dicts of them.
+    Equal values are always encoded to the same bytes. Tuples are encoded as lists, as in json.
+
+    :param value: the value to encode.
+    :return: the encoded value.
+    """
+    buffer = bytearray()
+    _encode_canonical(value, buffer)
+    return bytes(buffer)
+
+
+def _decode_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    """Decode an unsigned LEB128 varint, returning it and the offset after it."""
+    value, shift = 0, 0
+    while True:
+        if offset >= len(data):
+            raise ValueError("Truncated varint.")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def _decode_sized(data: bytes, offset: int) -> Tuple[bytes, int]:
+    """Decode a length-prefixed sequence of bytes, returning it and the offset after it."""
+    size, offset = _decode_varint(data, offset)
+    end = offset + size
+    if end > len(data):
+        raise ValueError("Truncated value.")
+    return data[offset:end], end
+
+
+def _decode_canonical(  # pylint: disable=too-many-return-statements
+    data: bytes, offset: int
+) -> Tuple[Any, int]:
+    """Decode a value in the canonical binary format, returning it and the offset after it."""
+    if offset >= len(data):
+        raise ValueError("Truncated value.")
+    type_, offset = data[offset], offset + 1
+    if type_ == _CANONICAL_NONE:
+        return None, offset
+    if type_ == _CANONICAL_TRUE:
+        return True, offset
+    if type_ == _CANONICAL_FALSE:
+        return False, offset
+    if type_ == _CANONICAL_INT:
+        zigzag, offset = _decode_varint(data, offset)
+        return (zigzag >> 1) ^ -(zigzag & 1), offset
+    if type_ == _CANONICAL_FLOAT:
+        end = offset + _FLOAT_STRUCT.size
+        if end > len(data):
+            raise ValueError("Truncated value.")
+        return _FLOAT_STRUCT.unpack_from(data, offset)[0], end
+    if type_ == _CANONICAL_STR:
+        encoded, offset = _decode_sized(data, offset)
+        return encoded.decode("utf-8"), offset
+    if type_ == _CANONICAL_BYTES:
+        return _decode_sized(data, offset)
+    if type_ == _CANONICAL_LIST:
+        size, offset = _decode_varint(data, offset)
+        items = []
+        for _ in range(size):
+            item, offset = _decode_canonical(data, offset)
+            items.append(item)
+        return items, offset
+    if type_ == _CANONICAL_DICT:
+        size, offset = _decode_varint(data, offset)
+        decoded = {}
+        for _ in range(size):
+            key, offset = _decode_canonical(data, offset)
+            decoded[key], offset = _decode_canonical(data, offset)
+        return decoded, offset
+    raise ValueError(f"Unknown type {type_} at offset {offset - 1}.")
+
+
+def canonical_decode(data: bytes) -> Any:
+    """
+    Decode a value encoded with `canonical_encode`.
+
+    :param data: the encoded value.
+    :return: the decoded value. Lists and tuples are decoded as lists.
+    """
+    value, offset = _decode_canonical(bytes(data), 0)
+    if offset != len(data):
+        raise ValueError(f"Unexpected {len(data) - offset} trailing bytes.")
+    return value
@@ -19,8 +19,8 @@
 
 """This package contains the implementation of ."""
 import json
-import threading
 import time
+from enum import Enum
 from typing import Any, Callable, Dict, List, Optional, Tuple, cast
 
 from aea.helpers.cid import to_v1
@@ -44,21 +44,40 @@ from packages.valory.protocols.contract_api import ContractApiMessage
 from packages.valory.protocols.ipfs import IpfsMessage
 from packages.valory.protocols.ipfs.dialogues import IpfsDialogue
 from packages.valory.skills.task_execution.models import Params
+from packages.valory.skills.task_execution.utils.acn import AcnDelivery
+from packages.valory.skills.task_execution.utils.done_tasks import DoneTaskStore
 from packages.valory.skills.task_execution.utils.ipfs import (
     get_ipfs_file_hash,
     to_multihash,
 )
+from packages.valory.skills.task_execution.utils.metrics import MetricsServer
 from packages.valory.skills.task_execution.utils.task import AnyToolAsTask
+from packages.valory.skills.task_execution.utils.uploads import PendingUpload
 
 
 PENDING_TASKS = "pending_tasks"
 DONE_TASKS = "ready_tasks"
-DONE_TASKS_LOCK = "lock"
+TOOLS_READINESS = "tools_readiness"
+FETCHED_DATA = "fetched_data"
+DIALOGUES_NAMES = (
+    "contract_dialogues",
+    "default_dialogues",
+    "ipfs_dialogues",
+    "acn_data_share_dialogues",
+)
 
 
 LEDGER_API_ADDRESS = str(LEDGER_CONNECTION_PUBLIC_ID)
 
 
+class ToolReadiness(Enum):
+    """The readiness of a tool."""
+
+    DOWNLOADING = "downloading"
+    WARMING_UP = "warming_up"
+    READY = "ready"
+
+
 class TaskExecutionBehaviour(SimpleBehaviour):
     """A class to execute tasks."""
 
@@ -68,10 +87,11 @@ class TaskExecutionBehaviour(SimpleBehaviour):
         self._executing_task: Optional[Dict[str, Any]] = None
         self._tools_to_file_hash: Dict[str, str] = {}
         self._all_tools: Dict[str, str] = {}
+        self._warming_up_tools: Dict[str, str] = {}
         self._inflight_tool_req: Optional[str] = None
-        self._done_task: Optional[Dict[str, Any]] = None
         self._last_polling: Optional[float] = None
         self._invalid_request = False
+        self._metrics_server: Optional[MetricsServer] = None
 
     def setup(self) -> None:
         """Implement the setup."""
@@ -81,17 +101,63 @@ class TaskExecutionBehaviour(SimpleBehaviour):
             for key, values in self.params.file_hash_to_tools.items()
             for value in values
         }
+        self.context.shared_state[TOOLS_READINESS] = {}
+        for tool in self._tools_to_file_hash:
+            self._set_tool_readiness(tool, ToolReadiness.DOWNLOADING)
+        for dialogues_name in DIALOGUES_NAMES:
+            # the dialogues opened by counterparties are not tracked, sweep them instead
+            self.params.dialogue_cleaner.register(getattr(self.context, dialogues_name))
+        self.params.metrics.registry.add_collector(self._collect_metrics)
+        if self.params.metrics_port is not None:
+            self._metrics_server = MetricsServer(
+                self.params.metrics.registry,
+                self.params.metrics_host,
+                self.params.metrics_port,
+            )
+            self._metrics_server.start()
+            self.context.logger.info(
+                f"Serving metrics on {self.params.metrics_host}:{self._metrics_server.port}"
+            )
+
+    def teardown(self) -> None:
+        """Implement the teardown."""
+        if self._metrics_server is not None:
+            self._metrics_server.stop()
+            self._metrics_server = None
+
+    def _collect_metrics(self) -> None:
+        """Update the gauges of the metrics, before they get scraped."""
+        metrics = self.params.metrics
+        metrics.pending_tasks.set(len(self.pending_tasks))
+        metrics.done_tasks.set(len(self.done_tasks))
+        metrics.queued_uploads.set(self.params.result_uploader.queued)
+        metrics.acn_outstanding.set(self.params.acn_delivery_queue.outstanding)
+        metrics.live_dialogues.set(self.params.dialogue_cleaner.live_dialogues)
 
     def act(self) -> None:
         """Implement the act."""
         self._download_tools()
+        self._check_warmups()
         self._execute_task()
+        self._upload_results()
+        self._deliver_acn_data()
         self._check_for_new_reqs()
+        self._cleanup_dialogues()
 
     @property
-    def done_tasks_lock(self) -> threading.Lock:
-        """Get done_tasks_lock."""
-        return self.context.shared_state[DONE_TASKS_LOCK]
+    def tools_readiness(self) -> Dict[str, ToolReadiness]:
+        """Get the readiness of each tool."""
+        return self.context.shared_state[TOOLS_READINESS]
+
+    def _set_tool_readiness(self, tool: str, readiness: ToolReadiness) -> None:
+        """Set the readiness of a tool."""
+        self.tools_readiness[tool] = readiness
+        is_ready = float(readiness == ToolReadiness.READY)
+        self.params.metrics.tools_ready.set(is_ready, tool)
+
+    def _is_tool_ready(self, tool: str) -> bool:
+        """Check whether a tool is ready to execute tasks."""
+        return self.tools_readiness.get(tool, None) == ToolReadiness.READY
 
     @property
     def params(self) -> Params:
@@ -104,10 +170,21 @@ class TaskExecutionBehaviour(SimpleBehaviour):
         return self.context.shared_state[PENDING_TASKS]
 
     @property
-    def done_tasks(self) -> List[Dict[str, Any]]:
+    def done_tasks(self) -> DoneTaskStore:
         """Get done_tasks."""
         return self.context.shared_state[DONE_TASKS]
 
+    def _cleanup_dialogues(self) -> None:
+        """Retire a bounded number of terminated or expired dialogues."""
+        cleaner = self.params.dialogue_cleaner
+        retired = cleaner.step()
+        if retired > 0:
+            self.context.logger.debug(
+                f"Retired {retired} dialogues. "
+                f"Live dialogues: {cleaner.live_dialogues}, "
+                f"reclaimed messages so far: {cleaner.reclaimed_messages}."
+            )
+
     def _should_poll(self) -> bool:
         """If we should poll the contract."""
         if self._last_polling is None:
@@ -168,10 +245,41 @@ class TaskExecutionBehaviour(SimpleBehaviour):
         local_namespace: Dict[str, Any] = globals().copy()
         if "run" in local_namespace:
             del local_namespace["run"]
+        if "warmup" in local_namespace:
+            del local_namespace["warmup"]
         exec(tool_py, local_namespace)  # pylint: disable=W0122  # nosec
         self._all_tools[tool_req] = local_namespace["run"]
         self._inflight_tool_req = None
 
+        warmup = local_namespace.get("warmup", None)
+        if not self.params.warmup_tools or not callable(warmup):
+            self._set_tool_readiness(tool_req, ToolReadiness.READY)
+            return
+
+        # warm the tool up in the execution backend,
+        # so that its first task does not pay for the imports and the model loading
+        self.context.logger.info(f"Warming up tool {tool_req}.")
+        task_id = self.context.task_manager.enqueue_task(
+            AnyToolAsTask(), kwargs={"method": warmup}
+        )
+        self._warming_up_tools[tool_req] = task_id
+        self._set_tool_readiness(tool_req, ToolReadiness.WARMING_UP)
+
+    def _check_warmups(self) -> None:
+        """Mark the tools which finished warming up as ready."""
+        for tool, task_id in list(self._warming_up_tools.items()):
+            task_result = self.context.task_manager.get_task_result(task_id)
+            if not task_result.ready():
+                continue
+            try:
+                task_result.get()
+                self.context.logger.info(f"Tool {tool} warmed up.")
+            except Exception as e:  # pylint: disable=broad-except
+                # warming up is best effort, the tool can still be used
+                self.context.logger.warning(f"Warming up tool {tool} failed: {e}")
+            del self._warming_up_tools[tool]
+            self._set_tool_readiness(tool, ToolReadiness.READY)
+
     def _check_for_new_reqs(self) -> None:
         """Check for new reqs."""
         if self.params.in_flight_req or not self._should_poll():
@@ -179,7 +287,7 @@ class TaskExecutionBehaviour(SimpleBehaviour):
             # or if we should not poll yet
             return
 
-        contract_api_msg, _ = self.context.contract_dialogues.create(
+        contract_api_msg, contract_dialogue = self.context.contract_dialogues.create(
             performative=ContractApiMessage.Performative.GET_STATE,
             contract_address=self.params.agent_mech_contract_address,
             contract_id=str(AgentMechContract.contract_id),
@@ -189,6 +297,9 @@ class TaskExecutionBehaviour(SimpleBehaviour):
             ledger_id=self.context.default_ledger_id,
         )
         self.context.outbox.put_message(message=contract_api_msg)
+        self.params.dialogue_cleaner.track(
+            self.context.contract_dialogues, contract_dialogue
+        )
         self.params.in_flight_req = True
         self._last_polling = time.time()
 
@@ -206,12 +317,26 @@ class TaskExecutionBehaviour(SimpleBehaviour):
                 self._handle_timeout_task()
             return
 
-        if len(self.pending_tasks) == 0:
-            # not tasks (requests) to execute
+        if self.params.acn_delivery_queue.is_full:
+            # apply backpressure, do not take new tasks until the outstanding deliveries are drained
+            return
+
+        task_data = self._pop_next_task()
+        if task_data is None:
+            # no tasks (requests) to execute
+            return
+
+        fetched_data = task_data.pop(FETCHED_DATA, None)
+        if fetched_data is not None:
+            # the data was fetched before the tool was ready
+            self._executing_task = task_data
+            self._prepare_task(fetched_data)
             return
 
         # create new task
-        task_data = self.pending_tasks.pop(0)
+        received_at = task_data.get("received_at", None)
+        if received_at is not None:
+            self.params.metrics.queue_seconds.observe(time.time() - received_at)
         self.context.logger.info(f"Preparing task with data: {task_data}")
         self._executing_task = task_data
         task_data_ = task_data["data"]
@@ -220,39 +345,127 @@ class TaskExecutionBehaviour(SimpleBehaviour):
         ipfs_msg, message = self._build_ipfs_get_file_req(ipfs_hash)
         self.send_message(ipfs_msg, message, self._handle_get_task)
 
+    def _pop_next_task(self) -> Optional[Dict[str, Any]]:
+        """Pop the first pending task which does not wait for its tool to get ready."""
+        for index, task in enumerate(self.pending_tasks):
+            fetched_data = task.get(FETCHED_DATA, None)
+            if fetched_data is None or self._is_tool_ready(fetched_data["tool"]):
+                return self.pending_tasks.pop(index)
+        return None
+
     def send_message(
-        self, msg: Message, dialogue: Dialogue, callback: Callable
+        self,
+        msg: Message,
+        dialogue: Dialogue,
+        callback: Callable,
+        blocking: bool = True,
     ) -> None:
-        """Send message."""
+        """
+        Send message.
+
+        :param msg: the message to send.
+        :param dialogue: the dialogue of the message.
+        :param callback: the callback to call with the response.
+        :param blocking: whether no other request should be sent until the response is received.
+        """
         self.context.outbox.put_message(message=msg)
+        self.params.dialogue_cleaner.track(self.context.ipfs_dialogues, dialogue)
         nonce = dialogue.dialogue_label.dialogue_reference[0]
-        self.params.req_to_callback[nonce] = callback
-        self.params.in_flight_req = True
+        sent_at = time.time()
+        performative = msg.performative.value
+
+        def timed_callback(message: IpfsMessage, dialogue: Dialogue) -> None:
+            """Record the latency of the request and call the callback."""
+            self.params.metrics.ipfs_seconds.observe(
+                time.time() - sent_at, performative
+            )
+            callback(message, dialogue)
+
+        self.params.req_to_callback[nonce] = timed_callback
+        if blocking:
+            self.params.in_flight_req = True
 
     def _handle_done_task(self) -> None:
         """Handle done tasks"""
         executing_task = cast(Dict[str, Any], self._executing_task)
         req_id = executing_task.get("requestId", None)
         task_result = self._get_executing_task_result()
+        self._observe_execution(executing_task, task_result)
         response = {"requestId": req_id, "result": "Invalid response"}
-        self._done_task = {"request_id": req_id}
+        done_task: Dict[str, Any] = {"request_id": req_id}
         if task_result is not None:
             # task succeeded
             deliver_msg, transaction = task_result
             response = {**response, "result": deliver_msg}
-            self._done_task["transaction"] = transaction
+            done_task["transaction"] = transaction
 
         self.context.logger.info(f"Task result for request {req_id}: {task_result}")
-        msg, dialogue = self._build_ipfs_store_file_req(
-            {str(req_id): json.dumps(response)}
+        # the result is stored on IPFS with the next batch,
+        # the next task can be executed in the meantime
+        upload = PendingUpload(
+            request_id=str(req_id),
+            sender=executing_task["sender"],
+            done_task=done_task,
+            content=json.dumps(response),
+            task=executing_task,
+        )
+        self.params.result_uploader.add(upload)
+        # reset tasks
+        self._executing_task = None
+        self._invalid_request = False
+
+    def _observe_execution(
+        self, executing_task: Dict[str, Any], task_result: Any
+    ) -> None:
+        """Record the metrics of a finished task."""
+        metrics = self.params.metrics
+        started_at = executing_task.get("started_at", None)
+        if started_at is not None:
+            metrics.execution_seconds.observe(
+                time.time() - started_at, executing_task["tool"]
+            )
+        status = "success" if task_result is not None else "invalid"
+        metrics.tasks_finished.inc(status)
+
+    def _upload_results(self) -> None:
+        """Upload the next batch of task results, if it is ready."""
+        uploader = self.params.result_uploader
+        for nonce in uploader.expire():
+            self.context.logger.warning(
+                f"Storing a task result on IPFS timed out (nonce {nonce})."
+            )
+            self.params.req_to_callback.pop(nonce, None)
+        for upload in uploader.take_dropped():
+            self.context.logger.error(
+                f"Could not store the result of request {upload.request_id} on IPFS "
+                f"after {upload.attempts} attempts. Executing it again."
+            )
+            if upload.task is not None:
+                # added to end of queue
+                self.pending_tasks.append(upload.task)
+
+        batch = uploader.take_batch()
+        if len(batch) == 0:
+            return
+
+        self.context.logger.info(
+            f"Storing the results of {len(batch)} tasks on IPFS. "
+            f"Upload throughput so far: {uploader.throughput:.2f} files/s."
         )
-        self.send_message(msg, dialogue, self._handle_store_response)
+        for upload in batch:
+            msg, dialogue = self._build_ipfs_store_file_req(upload.files)
+            self.send_message(
+                msg, dialogue, self._handle_store_response, blocking=False
+            )
+            nonce = dialogue.dialogue_label.dialogue_reference[0]
+            uploader.mark_sent(nonce, upload)
 
     def _handle_timeout_task(self) -> None:
         """Handle timeout tasks"""
         executing_task = cast(Dict[str, Any], self._executing_task)
         req_id = executing_task.get("requestId", None)
         self.context.logger.info(f"Task timed out for request {req_id}")
+        self.params.metrics.tasks_finished.inc("timeout")
         # added to end of queue
         self.pending_tasks.append(executing_task)
         self._executing_task = None
@@ -267,7 +480,16 @@ class TaskExecutionBehaviour(SimpleBehaviour):
             and "tool" in task_data
         )  # pylint: disable=C0301
         if is_data_valid and task_data["tool"] in self._tools_to_file_hash:
-            self._prepare_task(task_data)
+            if self._is_tool_ready(task_data["tool"]):
+                self._prepare_task(task_data)
+                return
+            # keep the task queued until the tool is ready, instead of starting it and timing out
+            tool = task_data["tool"]
+            self.context.logger.info(f"Tool {tool} is not ready yet.")
+            executing_task = cast(Dict[str, Any], self._executing_task)
+            executing_task[FETCHED_DATA] = task_data
+            self.pending_tasks.insert(0, executing_task)
+            self._executing_task = None
         elif is_data_valid:
             tool = task_data["tool"]
             self.context.logger.warning(f"Tool {tool} is not valid.")
@@ -284,7 +506,13 @@ class TaskExecutionBehaviour(SimpleBehaviour):
         task_id = self.context.task_manager.enqueue_task(tool_task, kwargs=task_data)
         executing_task = cast(Dict[str, Any], self._executing_task)
         executing_task["async_task_id"] = task_id
-        executing_task["timeout_deadline"] = time.time() + self.params.task_deadline
+        started_at = time.time()
+        executing_task["tool"] = task_data["tool"]
+        executing_task["started_at"] = started_at
+        executing_task["timeout_deadline"] = started_at + self.params.task_deadline
+        received_at = executing_task.get("received_at", None)
+        if received_at is not None:
+            self.params.metrics.pickup_seconds.observe(started_at - received_at)
         self._async_result = self.context.task_manager.get_task_result(task_id)
 
     def _build_ipfs_message(
@@ -339,27 +567,26 @@ class TaskExecutionBehaviour(SimpleBehaviour):
 
     def _handle_store_response(self, message: IpfsMessage, dialogue: Dialogue) -> None:
         """Handle the response from ipfs for a store response request."""
-        executing_task = cast(Dict[str, Any], self._executing_task)
-        req_id, sender = (
-            executing_task["requestId"],
-            executing_task["sender"],
-        )
+        nonce = dialogue.dialogue_label.dialogue_reference[0]
+        upload = self.params.result_uploader.on_success(nonce)
+        if upload is None:
+            # the upload has already been retried
+            return
+        req_id = upload.request_id
         self.context.logger.info(f"Response for request {req_id} stored on IPFS.")
         ipfs_hash = to_v1(message.ipfs_hash)
         self.send_data_via_acn(
-            sender_address=sender,
-            request_id=str(req_id),
+            sender_address=upload.sender,
+            request_id=req_id,
             data=ipfs_hash,
         )
-        done_task = cast(Dict[str, Any], self._done_task)
+        done_task = upload.done_task
         done_task["task_result"] = to_multihash(ipfs_hash)
-        # add to done tasks, in thread safe way
-        with self.done_tasks_lock:
-            self.done_tasks.append(done_task)
-        # reset tasks
-        self._executing_task = None
-        self._done_task = None
-        self._invalid_request = False
+        # add to done tasks, the store is thread safe
+        if not self.done_tasks.add(done_task):
+            self.context.logger.warning(
+                f"Request {req_id} has already been delivered. Not delivering it again."
+            )
 
     def send_data_via_acn(
         self,
@@ -367,19 +594,41 @@ class TaskExecutionBehaviour(SimpleBehaviour):
         request_id: str,
         data: Any,
     ) -> None:
-        """Handle callbacks."""
-        self.context.logger.info(
-            f"Sending data to {sender_address} via ACN for request ID {request_id}"
+        """Queue the data to be sent via the ACN."""
+        delivery = AcnDelivery(
+            request_id=request_id, counterparty=sender_address, content=data
         )
-        response, _ = cast(
+        self.params.acn_delivery_queue.put(delivery)
+
+    def _deliver_acn_data(self) -> None:
+        """Send the queued ACN deliveries which are due, grouped by counterparty."""
+        delivery_queue = self.params.acn_delivery_queue
+        acn_data_share_dialogues = cast(
             AcnDataShareDialogues, self.context.acn_data_share_dialogues
-        ).create(
-            counterparty=sender_address,
-            performative=AcnDataShareMessage.Performative.DATA,
-            request_id=request_id,
-            content=data,
-        )
-        self.context.outbox.put_message(
-            message=response,
-            context=EnvelopeContext(connection_id=P2P_CLIENT_PUBLIC_ID),
         )
+        for counterparty, deliveries in delivery_queue.ready().items():
+            self.context.logger.info(
+                f"Sending data to {counterparty} via ACN for request IDs "
+                f"{[delivery.request_id for delivery in deliveries]}"
+            )
+            for delivery in deliveries:
+                response, dialogue = acn_data_share_dialogues.create(
+                    counterparty=counterparty,
+                    performative=AcnDataShareMessage.Performative.DATA,
+                    request_id=delivery.request_id,
+                    content=delivery.content,
+                )
+                try:
+                    self.context.outbox.put_message(
+                        message=response,
+                        context=EnvelopeContext(connection_id=P2P_CLIENT_PUBLIC_ID),
+                    )
+                except Exception as e:  # pylint: disable=broad-except
+                    retrying = delivery_queue.mark_failed(delivery)
+                    self.context.logger.warning(
+                        f"Could not send the data for request ID {delivery.request_id} via ACN: {e}. "
+                        f"{'Retrying' if retrying else 'Giving up'}."
+                    )
+                    continue
+                self.params.dialogue_cleaner.track(acn_data_share_dialogues, dialogue)
+                delivery_queue.mark_sent(delivery)
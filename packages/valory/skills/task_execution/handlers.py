@@ -18,7 +18,7 @@
 # ------------------------------------------------------------------------------
 
 """This package contains a scaffold of a handler."""
-import threading
+import time
 from typing import Any, Dict, List, cast
 
 from aea.protocols.base import Message
@@ -31,11 +31,11 @@ from packages.valory.protocols.acn_data_share import AcnDataShareMessage
 from packages.valory.protocols.contract_api import ContractApiMessage
 from packages.valory.protocols.ipfs import IpfsMessage
 from packages.valory.skills.task_execution.models import Params
+from packages.valory.skills.task_execution.utils.done_tasks import DoneTaskStore
 
 
 PENDING_TASKS = "pending_tasks"
 DONE_TASKS = "ready_tasks"
-DONE_TASKS_LOCK = "lock"
 
 LEDGER_API_ADDRESS = str(LEDGER_CONNECTION_PUBLIC_ID)
 
@@ -47,13 +47,6 @@ class BaseHandler(Handler):
         """Set up the handler."""
         self.context.logger.info(f"{self.__class__.__name__}: setup method called.")
 
-    def cleanup_dialogues(self) -> None:
-        """Clean up all dialogues."""
-        for handler_name in self.context.handlers.__dict__.keys():
-            dialogues_name = handler_name.replace("_handler", "_dialogues")
-            dialogues = getattr(self.context, dialogues_name)
-            dialogues.cleanup()
-
     @property
     def params(self) -> Params:
         """Get the parameters."""
@@ -66,11 +59,6 @@ class BaseHandler(Handler):
     def on_message_handled(self, _message: Message) -> None:
         """Callback after a message has been handled."""
         self.params.request_count += 1
-        if self.params.request_count % self.params.cleanup_freq == 0:
-            self.context.logger.info(
-                f"{self.params.request_count} requests processed. Cleaning up dialogues."
-            )
-            self.cleanup_dialogues()
 
 
 class AcnHandler(BaseHandler):
@@ -82,6 +70,16 @@ class AcnHandler(BaseHandler):
         """Handle the message."""
         # we don't respond to ACN messages at this point
         self.context.logger.info(f"Received message: {message}")
+        acn_msg = cast(AcnDataShareMessage, message)
+        if acn_msg.performative == AcnDataShareMessage.Performative.DATA:
+            # requesters acknowledge a delivery by echoing its request id
+            delivery_queue = self.params.acn_delivery_queue
+            if delivery_queue.acknowledge(acn_msg.request_id, acn_msg.sender):
+                self.context.logger.info(
+                    f"Delivery for request ID {acn_msg.request_id} acknowledged. "
+                    f"Average delivery latency: {delivery_queue.average_latency:.2f}s, "
+                    f"failed deliveries: {delivery_queue.failed}."
+                )
         self.on_message_handled(message)
 
 
@@ -98,18 +96,44 @@ class IpfsHandler(BaseHandler):
         """
         self.context.logger.info(f"Received message: {message}")
         ipfs_msg = cast(IpfsMessage, message)
+        nonce = ipfs_msg.dialogue_reference[0]
+        uploader = self.params.result_uploader
+        is_upload = uploader.is_uploading(nonce)
         if ipfs_msg.performative == IpfsMessage.Performative.ERROR:
             self.context.logger.warning(
                 f"IPFS Message performative not recognized: {ipfs_msg.performative}"
             )
-            self.params.in_flight_req = False
+            callback = self.params.req_to_callback.pop(nonce, None)
+            if is_upload:
+                # uploads are not blocking, retry them with the next batch
+                uploader.on_failure(nonce)
+                return
+            if callback is not None:
+                # a late error, e.g., of an expired upload, must not unblock the request in flight
+                self.params.in_flight_req = False
             return
 
         dialogue = self.context.ipfs_dialogues.update(ipfs_msg)
-        nonce = dialogue.dialogue_label.dialogue_reference[0]
-        callback = self.params.req_to_callback.pop(nonce)
+        if dialogue is None:
+            # the dialogue has already been retired, e.g., its ttl expired
+            self.context.logger.warning(
+                f"Could not find the dialogue of IPFS message: {ipfs_msg}"
+            )
+            callback = self.params.req_to_callback.pop(nonce, None)
+            if is_upload:
+                uploader.on_failure(nonce)
+                return
+            if callback is not None:
+                self.params.in_flight_req = False
+            return
+
+        callback = self.params.req_to_callback.pop(nonce, None)
+        if callback is None:
+            # a late response to an upload which has already been retried
+            return
         callback(ipfs_msg, dialogue)
-        self.params.in_flight_req = False
+        if not is_upload:
+            self.params.in_flight_req = False
         self.on_message_handled(message)
 
 
@@ -121,8 +145,7 @@ class ContractHandler(BaseHandler):
     def setup(self) -> None:
         """Setup the contract handler."""
         self.context.shared_state[PENDING_TASKS] = []
-        self.context.shared_state[DONE_TASKS] = []
-        self.context.shared_state[DONE_TASKS_LOCK] = threading.Lock()
+        self.context.shared_state[DONE_TASKS] = DoneTaskStore()
         super().setup()
 
     @property
@@ -164,6 +187,10 @@ class ContractHandler(BaseHandler):
             if req["block_number"] % self.params.num_agents == self.params.agent_index
         ]
         self.context.logger.info(f"Processing only {len(reqs)} of the new requests.")
+        received_at = time.time()
+        for req in reqs:
+            req["received_at"] = received_at
+        self.params.metrics.requests_received.inc(amount=len(reqs))
         self.pending_tasks.extend(reqs)
         self.context.logger.info(
             f"Monitoring new reqs from block {self.params.from_block}"
@@ -18,11 +18,19 @@
 # ------------------------------------------------------------------------------
 
 """This module contains the shared state for the abci skill of Mech."""
-from typing import Any, Callable, Dict, List, cast
+from typing import Any, Callable, Dict, List, Optional, cast
 
 from aea.exceptions import enforce
 from aea.skills.base import Model
 
+from packages.valory.skills.task_execution.utils.acn import AcnDeliveryQueue
+from packages.valory.skills.task_execution.utils.cleanup import DialogueCleaner
+from packages.valory.skills.task_execution.utils.metrics import (
+    MetricsRegistry,
+    TaskExecutionMetrics,
+)
+from packages.valory.skills.task_execution.utils.uploads import ResultUploader
+
 
 class Params(Model):
     """A model to represent params for multiple abci apps."""
@@ -51,9 +59,35 @@ class Params(Model):
         )
         self.polling_interval = kwargs.get("polling_interval", 30.0)
         self.task_deadline = kwargs.get("task_deadline", 240.0)
+        self.warmup_tools = kwargs.get("warmup_tools", True)
         self.num_agents = kwargs.get("num_agents", None)
         self.request_count: int = 0
-        self.cleanup_freq = kwargs.get("cleanup_freq", 50)
+        self.metrics_host = kwargs.get("metrics_host", "127.0.0.1")
+        self.metrics_port: Optional[int] = kwargs.get("metrics_port", None)
+        self.metrics = TaskExecutionMetrics(MetricsRegistry())
+        self.dialogue_ttl = kwargs.get("dialogue_ttl", 300.0)
+        self.max_dialogue_cleanups_per_tick = kwargs.get(
+            "max_dialogue_cleanups_per_tick", 10
+        )
+        self.dialogue_cleaner = DialogueCleaner(
+            ttl=self.dialogue_ttl,
+            max_cleanups_per_tick=self.max_dialogue_cleanups_per_tick,
+        )
+        self.result_uploader = ResultUploader(
+            max_batch_size=kwargs.get("result_upload_batch_size", 10),
+            max_batch_age=kwargs.get("result_upload_window", 2.0),
+            max_retries=kwargs.get("result_upload_max_retries", 3),
+            upload_timeout=kwargs.get("result_upload_timeout", 30.0),
+        )
+        self.acn_delivery_queue = AcnDeliveryQueue(
+            max_outstanding=kwargs.get("max_outstanding_acn_deliveries", 100),
+            require_ack=kwargs.get("acn_require_ack", False),
+            ack_timeout=kwargs.get("acn_ack_timeout", 30.0),
+            max_retries=kwargs.get("acn_max_retries", 3),
+            backoff_factor=kwargs.get("acn_backoff_factor", 2.0),
+            on_delivered=self.metrics.acn_delivery_seconds.observe,
+            on_failed=self.metrics.acn_failed.inc,
+        )
         enforce(self.num_agents is not None, "num_agents must be set!")
         self.agent_index = kwargs.get("agent_index", None)
         enforce(self.agent_index is not None, "agent_index must be set!")
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the utils/acn.py module of the skill."""
+
+# pylint: skip-file
+
+import time
+from typing import List
+
+from packages.valory.skills.task_execution.utils.acn import (
+    AcnDelivery,
+    AcnDeliveryQueue,
+)
+
+
+MAX_OUTSTANDING = 2
+ACK_TIMEOUT = 30.0
+MAX_RETRIES = 1
+BACKOFF_FACTOR = 2.0
+
+
+def _queue(require_ack: bool = False) -> AcnDeliveryQueue:
+    """Get a delivery queue."""
+    return AcnDeliveryQueue(
+        max_outstanding=MAX_OUTSTANDING,
+        require_ack=require_ack,
+        ack_timeout=ACK_TIMEOUT,
+        max_retries=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+    )
+
+
+def _delivery(request_id: int, counterparty: str = "requester") -> AcnDelivery:
+    """Get the delivery of a request."""
+    return AcnDelivery(str(request_id), counterparty, f"hash_{request_id}")
+
+
+def _request_ids(deliveries: List[AcnDelivery]) -> List[str]:
+    """Get the request ids of deliveries."""
+    return [delivery.request_id for delivery in deliveries]
+
+
+class TestAcnDeliveryQueue:
+    """Test `AcnDeliveryQueue`."""
+
+    def test_grouped_by_counterparty(self) -> None:
+        """Test that the due deliveries are grouped by counterparty, in the order in which they were queued."""
+        queue = _queue()
+        for request_id, counterparty in ((1, "a"), (2, "b"), (3, "a")):
+            queue.put(_delivery(request_id, counterparty))
+
+        ready = queue.ready()
+        assert {key: _request_ids(value) for key, value in ready.items()} == {
+            "a": ["1", "3"],
+            "b": ["2"],
+        }
+        assert queue.ready() == {}
+
+    def test_backpressure(self) -> None:
+        """Test that the queue reports being full, instead of discarding deliveries."""
+        queue = _queue()
+        latencies: List[float] = []
+        queue._on_delivered = latencies.append
+        for request_id in range(MAX_OUTSTANDING + 1):
+            queue.put(_delivery(request_id))
+        assert queue.is_full
+        assert queue.outstanding == MAX_OUTSTANDING + 1
+        assert queue.failed == 0
+
+        deliveries = queue.ready()["requester"]
+        assert _request_ids(deliveries) == ["0", "1", "2"]
+        for delivery in deliveries:
+            queue.mark_sent(delivery)
+        assert not queue.is_full
+        assert queue.delivered == MAX_OUTSTANDING + 1
+        assert len(latencies) == MAX_OUTSTANDING + 1
+
+    def test_retry_send_failure_without_ack(self) -> None:
+        """Test that a delivery which could not be sent is retried with a backoff, even without acknowledgements."""
+        queue = _queue(require_ack=False)
+        queue.put(_delivery(1))
+        now = time.time()
+        (delivery,) = queue.ready(now)["requester"]
+
+        assert queue.mark_failed(delivery, now)
+        assert queue.retried == 1
+        assert queue.outstanding == 1
+        assert queue.ready(now) == {}
+
+        (delivery,) = queue.ready(now + BACKOFF_FACTOR)["requester"]
+        assert not queue.mark_failed(delivery, now + BACKOFF_FACTOR)
+        assert queue.failed == 1
+        assert queue.outstanding == 0
+
+    def test_retry_unacknowledged(self) -> None:
+        """Test that an unacknowledged delivery is retried, and completed once acknowledged."""
+        queue = _queue(require_ack=True)
+        queue.put(_delivery(1))
+        now = time.time()
+        (delivery,) = queue.ready(now)["requester"]
+        queue.mark_sent(delivery, now)
+        assert queue.outstanding == 1
+        assert queue.delivered == 0
+
+        later = now + ACK_TIMEOUT
+        assert queue.ready(later) == {}
+        assert queue.retried == 1
+        (delivery,) = queue.ready(later + BACKOFF_FACTOR)["requester"]
+        queue.mark_sent(delivery, later + BACKOFF_FACTOR)
+
+        assert not queue.acknowledge("1", "someone else")
+        assert queue.acknowledge("1", "requester")
+        assert not queue.acknowledge("1", "requester")
+        assert queue.delivered == 1
+        assert queue.outstanding == 0
+        assert queue.average_latency >= 0
+
+    def test_unacknowledged_run_out_of_retries(self) -> None:
+        """Test that an unacknowledged delivery fails once it runs out of retries."""
+        queue = _queue(require_ack=True)
+        failures = []
+        queue._on_failed = lambda: failures.append(None)
+        queue.put(_delivery(1))
+        now = time.time()
+        (delivery,) = queue.ready(now)["requester"]
+        queue.mark_sent(delivery, now)
+
+        now += ACK_TIMEOUT
+        assert queue.ready(now) == {}
+        now += BACKOFF_FACTOR
+        (delivery,) = queue.ready(now)["requester"]
+        queue.mark_sent(delivery, now)
+
+        assert queue.ready(now + ACK_TIMEOUT) == {}
+        assert queue.retried == MAX_RETRIES
+        assert queue.failed == 1
+        assert len(failures) == 1
+        assert queue.outstanding == 0
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the behaviours.py module of the skill."""
+
+# pylint: skip-file
+
+import json
+from typing import Any, Dict
+from unittest.mock import MagicMock, patch
+
+from packages.valory.skills.task_execution.behaviours import (
+    DONE_TASKS,
+    FETCHED_DATA,
+    PENDING_TASKS,
+    TOOLS_READINESS,
+    TaskExecutionBehaviour,
+    ToolReadiness,
+)
+from packages.valory.skills.task_execution.utils.done_tasks import DoneTaskStore
+from packages.valory.skills.task_execution.utils.uploads import (
+    PendingUpload,
+    ResultUploader,
+)
+
+
+TOOL = "prediction-sentence-embedding-conservative"
+TASK_ID = "warmup_task_id"
+
+
+def _run(**_kwargs: Any) -> None:
+    """A tool's `run`."""
+
+
+def _behaviour() -> TaskExecutionBehaviour:
+    """Get a behaviour whose tool has been downloaded and is warming up."""
+    context = MagicMock()
+    context.shared_state = {
+        PENDING_TASKS: [],
+        DONE_TASKS: DoneTaskStore(),
+        TOOLS_READINESS: {},
+    }
+    context.params.in_flight_req = False
+    context.params.acn_delivery_queue.is_full = False
+    context.params.task_deadline = 240.0
+    behaviour = TaskExecutionBehaviour(name="task_execution", skill_context=context)
+    behaviour._tools_to_file_hash = {TOOL: "tool_hash"}
+    behaviour._all_tools = {TOOL: _run}
+    behaviour._warming_up_tools = {TOOL: TASK_ID}
+    behaviour._set_tool_readiness(TOOL, ToolReadiness.WARMING_UP)
+    return behaviour
+
+
+def _task_data_message() -> MagicMock:
+    """Get the IPFS response with the data of a task."""
+    task_data: Dict[str, Any] = {"prompt": "Will it rain?", "tool": TOOL}
+    return MagicMock(files={"task.json": json.dumps(task_data)})
+
+
+def test_task_held_back_until_tool_ready() -> None:
+    """Test that a task is held back while its tool warms up, and executed once the tool reports ready."""
+    behaviour = _behaviour()
+    task_manager = behaviour.context.task_manager
+    warmup_result = MagicMock()
+    warmup_result.ready.return_value = False
+    task_manager.get_task_result.return_value = warmup_result
+    task = {"requestId": 1, "data": b"data", "sender": "sender"}
+    behaviour.pending_tasks.append(task)
+
+    with patch(
+        "packages.valory.skills.task_execution.behaviours.get_ipfs_file_hash"
+    ), patch.object(
+        behaviour, "_build_ipfs_get_file_req", return_value=(MagicMock(), MagicMock())
+    ), patch.object(
+        behaviour, "send_message"
+    ) as send_message:
+        behaviour._execute_task()
+        send_message.assert_called_once()
+
+        # the data of the task is fetched, but the tool is not ready yet
+        behaviour._handle_get_task(_task_data_message(), MagicMock())
+        assert behaviour._executing_task is None
+        assert behaviour.pending_tasks == [task]
+        assert task[FETCHED_DATA]["tool"] == TOOL
+
+        # the task is held back, without fetching its data again
+        behaviour._check_warmups()
+        behaviour._execute_task()
+        assert behaviour._executing_task is None
+        assert behaviour.pending_tasks == [task]
+        send_message.assert_called_once()
+        task_manager.enqueue_task.assert_not_called()
+
+        # the tool reports ready
+        warmup_result.ready.return_value = True
+        behaviour._check_warmups()
+        assert behaviour.tools_readiness[TOOL] == ToolReadiness.READY
+        assert behaviour._warming_up_tools == {}
+
+        behaviour._execute_task()
+        assert behaviour.pending_tasks == []
+        assert behaviour._executing_task is task
+        send_message.assert_called_once()
+
+    task_manager.enqueue_task.assert_called_once()
+    kwargs = task_manager.enqueue_task.call_args.kwargs["kwargs"]
+    assert kwargs["method"] is _run
+    assert kwargs["prompt"] == "Will it rain?"
+    assert FETCHED_DATA not in task
+
+
+def test_no_new_tasks_while_acn_deliveries_are_full() -> None:
+    """Test that no new tasks are taken while the outstanding ACN deliveries are at their bound."""
+    behaviour = _behaviour()
+    behaviour.params.acn_delivery_queue.is_full = True
+    behaviour.pending_tasks.append({"requestId": 1, "data": b"data"})
+
+    with patch.object(behaviour, "send_message") as send_message:
+        behaviour._execute_task()
+    send_message.assert_not_called()
+    assert len(behaviour.pending_tasks) == 1
+
+
+def test_dropped_upload_is_executed_again() -> None:
+    """Test that a task is executed again when its result cannot be stored on IPFS."""
+    behaviour = _behaviour()
+    uploader = ResultUploader(
+        max_batch_size=1, max_batch_age=0.0, max_retries=0, upload_timeout=0.0
+    )
+    behaviour.params.result_uploader = uploader
+    task = {"requestId": 1, "data": b"data", "sender": "sender"}
+    uploader.add(
+        PendingUpload(
+            request_id="1",
+            sender="sender",
+            done_task={"request_id": 1},
+            content="result",
+            task=task,
+        )
+    )
+    (upload,) = uploader.take_batch()
+    uploader.mark_sent("nonce", upload)
+
+    with patch.object(behaviour, "send_message") as send_message:
+        behaviour._upload_results()
+    send_message.assert_not_called()
+    assert uploader.dropped_uploads == 1
+    assert behaviour.pending_tasks == [task]
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the utils/cleanup.py module of the skill."""
+
+# pylint: skip-file
+
+import time
+from typing import List
+
+from aea.common import Address
+from aea.protocols.base import Message
+from aea.protocols.dialogue.base import Dialogue
+
+from packages.valory.protocols.default.dialogues import (
+    DefaultDialogue,
+    DefaultDialogues,
+)
+from packages.valory.protocols.default.message import DefaultMessage
+from packages.valory.skills.task_execution.utils.cleanup import DialogueCleaner
+
+
+AGENT = "agent"
+COUNTERPARTY = "counterparty"
+TTL = 10.0
+
+
+def _role_from_first_message(  # pylint: disable=unused-argument
+    message: Message, receiver_address: Address
+) -> Dialogue.Role:
+    """Infer the role of the agent from an incoming/outgoing first message."""
+    return DefaultDialogue.Role.AGENT
+
+
+def _dialogues(self_address: str) -> DefaultDialogues:
+    """Get an empty dialogues' store."""
+    return DefaultDialogues(
+        self_address=self_address,
+        role_from_first_message=_role_from_first_message,
+    )
+
+
+def _open(dialogues: DefaultDialogues, n: int) -> List[Dialogue]:
+    """Open `n` dialogues with the counterparty."""
+    opened = []
+    for _ in range(n):
+        _, dialogue = dialogues.create(
+            counterparty=COUNTERPARTY,
+            performative=DefaultMessage.Performative.BYTES,
+            content=b"data",
+        )
+        opened.append(dialogue)
+    return opened
+
+
+def _open_by_counterparty(dialogues: DefaultDialogues, n: int) -> None:
+    """Receive `n` dialogues opened by the counterparty."""
+    counterparty_dialogues = _dialogues(COUNTERPARTY)
+    for _ in range(n):
+        message, _ = counterparty_dialogues.create(
+            counterparty=AGENT,
+            performative=DefaultMessage.Performative.BYTES,
+            content=b"data",
+        )
+        assert dialogues.update(message) is not None
+
+
+def _stored(dialogues: DefaultDialogues) -> int:
+    """Get the number of dialogues held by the store."""
+    storage = dialogues._dialogues_storage
+    return len(storage._dialogues_by_dialogue_label)
+
+
+class TestDialogueCleaner:
+    """Test `DialogueCleaner`."""
+
+    def test_ttl_expiry(self) -> None:
+        """Test that the tracked dialogues are retired only once their ttl expires."""
+        cleaner = DialogueCleaner(ttl=TTL, max_cleanups_per_tick=10)
+        dialogues = _dialogues(AGENT)
+        for dialogue in _open(dialogues, 3):
+            cleaner.track(dialogues, dialogue)
+        assert cleaner.live_dialogues == 3
+
+        assert cleaner.step(time.time()) == 0
+        assert _stored(dialogues) == 3
+
+        assert cleaner.step(time.time() + TTL) == 3
+        assert cleaner.retired_on_expiry == 3
+        assert cleaner.live_dialogues == 0
+        assert cleaner.reclaimed_messages == 3
+        assert _stored(dialogues) == 0
+
+    def test_bounded_step(self) -> None:
+        """Test that a step retires at most `max_cleanups_per_tick` dialogues."""
+        cleaner = DialogueCleaner(ttl=TTL, max_cleanups_per_tick=2)
+        dialogues = _dialogues(AGENT)
+        for dialogue in _open(dialogues, 5):
+            cleaner.track(dialogues, dialogue)
+
+        expired = time.time() + TTL
+        assert [cleaner.step(expired) for _ in range(4)] == [2, 2, 1, 0]
+        assert _stored(dialogues) == 0
+
+    def test_sweep_counterparty_dialogues(self) -> None:
+        """Test that the dialogues opened by counterparties are swept from the registered stores."""
+        cleaner = DialogueCleaner(ttl=TTL, max_cleanups_per_tick=2)
+        dialogues = _dialogues(AGENT)
+        cleaner.register(dialogues)
+        cleaner.register(dialogues)
+        _open_by_counterparty(dialogues, 3)
+        assert cleaner.live_dialogues == 0
+
+        # the first sweep only sees the dialogues
+        now = time.time()
+        assert cleaner.step(now) == 0
+        assert cleaner.step(now) == 0
+        assert _stored(dialogues) == 3
+
+        # they are removed once seen for longer than the ttl, within the budget of each step
+        later = now + TTL
+        assert [cleaner.step(later) for _ in range(3)] == [2, 1, 0]
+        assert cleaner.retired_on_sweep == 3
+        assert _stored(dialogues) == 0
+
+    def test_sweep_skips_removed_dialogues(self) -> None:
+        """Test that the sweep ignores dialogues which have already been retired."""
+        cleaner = DialogueCleaner(ttl=TTL, max_cleanups_per_tick=10)
+        dialogues = _dialogues(AGENT)
+        cleaner.register(dialogues)
+        for dialogue in _open(dialogues, 2):
+            cleaner.track(dialogues, dialogue)
+
+        now = time.time()
+        assert cleaner.step(now) == 0
+        assert cleaner.step(now + TTL) == 2
+        assert cleaner.retired_on_expiry == 2
+        assert cleaner.retired_on_sweep == 0
+        assert cleaner.step(now + 2 * TTL) == 0
+
+    def test_sweep_forgets_removed_dialogues(self) -> None:
+        """Test that the sweep forgets the dialogues which have been removed from their store by other means."""
+        cleaner = DialogueCleaner(ttl=TTL, max_cleanups_per_tick=10)
+        dialogues = _dialogues(AGENT)
+        cleaner.register(dialogues)
+        _open_by_counterparty(dialogues, 2)
+
+        now = time.time()
+        assert cleaner.step(now) == 0
+        storage = dialogues._dialogues_storage
+        removed, kept = list(storage._dialogues_by_dialogue_label)
+        storage.remove(removed)
+
+        # the next sweep sees the kept dialogue again, but not the removed one
+        assert cleaner.step(now) == 0
+        assert removed not in cleaner._first_seen
+        assert removed not in cleaner._seen_before
+        assert kept in cleaner._seen_before
+
+        assert cleaner.step(now + TTL) == 1
+        assert _stored(dialogues) == 0
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the utils/done_tasks.py module of the skill."""
+
+# pylint: skip-file
+
+from packages.valory.skills.task_execution.utils.done_tasks import DoneTaskStore
+
+
+class TestDoneTaskStore:
+    """Test `DoneTaskStore`."""
+
+    def test_add_and_remove(self) -> None:
+        """Test adding and removing tasks."""
+        store = DoneTaskStore()
+        assert not store.has_tasks()
+        for request_id in (1, 2, 3):
+            store.add({"request_id": request_id})
+        assert store.has_tasks()
+        assert len(store) == 3
+        store.add({"request_id": 1})
+        assert store.added == 3
+
+        store.remove([1, 3, 4])
+        assert [task["request_id"] for task in store.snapshot()] == [2]
+        assert store.has_tasks()
+
+        store.remove([2])
+        assert len(store) == 0
+        assert not store.has_tasks()
+
+    def test_snapshot(self) -> None:
+        """Test that snapshots are bounded and share the tasks with the store."""
+        store = DoneTaskStore()
+        tasks = [{"request_id": request_id} for request_id in range(5)]
+        for task in tasks:
+            store.add(task)
+
+        snapshot = store.snapshot(max_count=2)
+        assert snapshot == tasks[:2]
+        assert snapshot[0] is tasks[0]
+        assert len(store.snapshot()) == 5
+
+        snapshot.clear()
+        assert len(store) == 5
+
+    def test_batches(self) -> None:
+        """Test assigning tasks to a batch, and settling or releasing it."""
+        store = DoneTaskStore()
+        for request_id in (1, 2, 3):
+            store.add({"request_id": request_id})
+
+        store.assign([1, 2], batch_id=0)
+        assert store.assigned == 2
+        assert [task["request_id"] for task in store.snapshot()] == [3]
+
+        store.assign([3], batch_id=1)
+        assert not store.has_tasks()
+
+        store.settle([1])
+        assert store.release(batch_id=0) == 1
+        assert [task["request_id"] for task in store.snapshot()] == [2]
+        assert store.release() == 1
+        assert len(store.snapshot()) == 2
+
+    def test_never_delivered_twice(self) -> None:
+        """Test that the tasks of settled requests are not added again."""
+        store = DoneTaskStore(delivered_history=1)
+        store.add({"request_id": 1})
+        store.settle([1])
+        assert not store.add({"request_id": 1})
+        assert len(store) == 0
+
+        # the oldest delivered requests are forgotten
+        store.settle([2])
+        assert store.add({"request_id": 1})
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the utils/metrics.py module of the skill."""
+
+# pylint: skip-file
+
+import urllib.request
+from typing import Generator
+
+import pytest
+
+from packages.valory.skills.task_execution.utils.metrics import (
+    CONTENT_TYPE,
+    MetricsRegistry,
+    MetricsServer,
+    TaskExecutionMetrics,
+)
+
+
+class TestMetricsRegistry:
+    """Test `MetricsRegistry`."""
+
+    def test_counter(self) -> None:
+        """Test a counter."""
+        registry = MetricsRegistry()
+        counter = registry.counter("dummy_total", "A counter.", ("status",))
+        counter.inc("success")
+        counter.inc("success", amount=2)
+        assert counter.value("success") == 3
+        assert counter.value("failure") == 0
+        with pytest.raises(ValueError, match="can only be incremented"):
+            counter.inc("success", amount=-1)
+        with pytest.raises(ValueError, match="expects labels"):
+            counter.inc()
+        assert 'dummy_total{status="success"} 3.0' in registry.render()
+
+    def test_gauge(self) -> None:
+        """Test a gauge."""
+        registry = MetricsRegistry()
+        gauge = registry.gauge("dummy", "A gauge.")
+        gauge.set(5)
+        gauge.set(2)
+        assert gauge.value() == 2
+        assert "# TYPE dummy gauge\ndummy 2.0" in registry.render()
+
+    def test_histogram(self) -> None:
+        """Test a histogram."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("dummy_seconds", "A histogram.", buckets=(1, 2))
+        for value in (0.5, 1, 1.5, 3):
+            histogram.observe(value)
+        assert histogram.count() == 4
+        rendered = registry.render()
+        assert 'dummy_seconds_bucket{le="1.0"} 2' in rendered
+        assert 'dummy_seconds_bucket{le="2.0"} 3' in rendered
+        assert 'dummy_seconds_bucket{le="+Inf"} 4' in rendered
+        assert "dummy_seconds_sum 6.0" in rendered
+        assert "dummy_seconds_count 4" in rendered
+
+    def test_register_twice(self) -> None:
+        """Test registering a metric with the same name twice."""
+        registry = MetricsRegistry()
+        counter = registry.counter("dummy", "A counter.")
+        assert registry.counter("dummy", "A counter.") is counter
+        with pytest.raises(ValueError, match="already registered"):
+            registry.gauge("dummy", "A gauge.")
+
+    def test_collectors(self) -> None:
+        """Test that the collectors are called before rendering."""
+        registry = MetricsRegistry()
+        gauge = registry.gauge("dummy", "A gauge.")
+        registry.add_collector(lambda: gauge.set(7))
+        assert "dummy 7.0" in registry.render()
+
+
+class TestMetricsServer:
+    """Test `MetricsServer`."""
+
+    @pytest.fixture
+    def server(self) -> Generator[MetricsServer, None, None]:
+        """Serve the task execution metrics on a free port."""
+        metrics = TaskExecutionMetrics(MetricsRegistry())
+        metrics.requests_received.inc(amount=3)
+        metrics.execution_seconds.observe(0.2, "openai-gpt-4")
+        metrics.pending_tasks.set(2)
+        metrics.acn_failed.inc()
+        server = MetricsServer(metrics.registry, "127.0.0.1", 0)
+        server.start()
+        yield server
+        server.stop()
+
+    def test_scrape(self, server: MetricsServer) -> None:
+        """Test scraping the metrics."""
+        url = f"http://127.0.0.1:{server.port}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:  # nosec
+            assert response.status == 200
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+            body = response.read().decode("utf-8")
+
+        assert "# TYPE mech_requests_received_total counter" in body
+        assert "mech_requests_received_total 3.0" in body
+        assert (
+            'mech_tool_execution_seconds_bucket{tool="openai-gpt-4",le="0.25"} 1'
+            in body
+        )
+        assert "mech_pending_tasks 2.0" in body
+        assert "# TYPE mech_acn_failed_deliveries_total counter" in body
+        assert "mech_acn_failed_deliveries_total 1.0" in body
+
+    def test_not_found(self, server: MetricsServer) -> None:
+        """Test that only the metrics path is served."""
+        url = f"http://127.0.0.1:{server.port}/other"
+        with pytest.raises(urllib.error.HTTPError, match="404"):
+            urllib.request.urlopen(url, timeout=5)  # nosec
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the utils/uploads.py module of the skill."""
+
+# pylint: skip-file
+
+import time
+from typing import List
+
+from packages.valory.skills.task_execution.utils.uploads import (
+    PendingUpload,
+    ResultUploader,
+)
+
+
+MAX_BATCH_SIZE = 3
+MAX_BATCH_AGE = 2.0
+MAX_RETRIES = 1
+UPLOAD_TIMEOUT = 30.0
+
+
+def _uploader() -> ResultUploader:
+    """Get an uploader."""
+    return ResultUploader(
+        max_batch_size=MAX_BATCH_SIZE,
+        max_batch_age=MAX_BATCH_AGE,
+        max_retries=MAX_RETRIES,
+        upload_timeout=UPLOAD_TIMEOUT,
+    )
+
+
+def _upload(request_id: int) -> PendingUpload:
+    """Get the pending upload of a request."""
+    return PendingUpload(
+        request_id=str(request_id),
+        sender="sender",
+        done_task={"request_id": request_id},
+        content=f"result {request_id}",
+    )
+
+
+def _send(uploader: ResultUploader) -> List[str]:
+    """Take the next batch and send all of it at once, returns the nonces of the requests."""
+    nonces = []
+    for upload in uploader.take_batch():
+        nonce = f"nonce_{upload.request_id}_{upload.attempts}"
+        uploader.mark_sent(nonce, upload)
+        nonces.append(nonce)
+    return nonces
+
+
+class TestResultUploader:
+    """Test `ResultUploader`."""
+
+    def test_batch_size(self) -> None:
+        """Test that a batch is taken once enough results are waiting."""
+        uploader = _uploader()
+        for request_id in range(MAX_BATCH_SIZE - 1):
+            uploader.add(_upload(request_id))
+        assert not uploader.should_flush()
+        assert uploader.take_batch() == []
+
+        for request_id in range(MAX_BATCH_SIZE - 1, 2 * MAX_BATCH_SIZE):
+            uploader.add(_upload(request_id))
+        batch = uploader.take_batch()
+        assert [upload.request_id for upload in batch] == ["0", "1", "2"]
+        assert uploader.queued == MAX_BATCH_SIZE
+
+    def test_batch_age(self) -> None:
+        """Test that a partial batch is taken once its oldest result is old enough."""
+        uploader = _uploader()
+        uploader.add(_upload(0))
+        now = time.time()
+        assert not uploader.should_flush(now)
+        assert uploader.should_flush(now + MAX_BATCH_AGE)
+        assert len(uploader.take_batch(now + MAX_BATCH_AGE)) == 1
+
+    def test_concurrent_uploads(self) -> None:
+        """Test that the uploads of a batch are in flight at once, and complete in any order."""
+        uploader = _uploader()
+        for request_id in range(MAX_BATCH_SIZE):
+            uploader.add(_upload(request_id))
+
+        nonces = _send(uploader)
+        assert uploader.in_flight == MAX_BATCH_SIZE
+        assert all(uploader.is_uploading(nonce) for nonce in nonces)
+
+        for nonce in reversed(nonces):
+            assert uploader.on_success(nonce) is not None
+        assert uploader.in_flight == 0
+        assert uploader.uploaded_files == MAX_BATCH_SIZE
+        assert uploader.uploaded_bytes == sum(len(f"result {i}") for i in range(3))
+        assert uploader.average_latency >= 0
+        assert not uploader.is_uploading(nonces[0])
+
+        # a late or unknown response is ignored
+        assert uploader.on_success(nonces[0]) is None
+        assert uploader.on_failure(nonces[0]) is None
+        assert uploader.uploaded_files == MAX_BATCH_SIZE
+
+    def test_retry(self) -> None:
+        """Test that a failed upload is retried first, and dropped once it runs out of retries."""
+        uploader = _uploader()
+        for request_id in range(MAX_BATCH_SIZE):
+            uploader.add(_upload(request_id))
+        first, *others = _send(uploader)
+
+        assert uploader.on_failure(first) is None
+        assert uploader.failed_attempts == 1
+        assert uploader.queued == 1
+        for nonce in others:
+            uploader.on_success(nonce)
+
+        uploader.add(_upload(MAX_BATCH_SIZE))
+        uploader.add(_upload(MAX_BATCH_SIZE + 1))
+        (retry, *_) = _send(uploader)
+        assert retry == "nonce_0_1"
+
+        dropped = uploader.on_failure(retry)
+        assert dropped is not None
+        assert dropped.request_id == "0"
+        assert dropped.attempts == MAX_RETRIES + 1
+        assert uploader.dropped_uploads == 1
+        assert uploader.take_dropped() == [dropped]
+        assert uploader.take_dropped() == []
+
+    def test_expiry(self) -> None:
+        """Test that the uploads without a response are failed once the upload timeout passes."""
+        uploader = _uploader()
+        for request_id in range(MAX_BATCH_SIZE):
+            uploader.add(_upload(request_id))
+        nonces = _send(uploader)
+        uploader.on_success(nonces[0])
+
+        now = time.time()
+        assert uploader.expire(now) == []
+        assert sorted(uploader.expire(now + UPLOAD_TIMEOUT)) == sorted(nonces[1:])
+        assert uploader.in_flight == 0
+        assert uploader.queued == 2
+        assert uploader.failed_attempts == 2
+        assert uploader.throughput >= 0
+
+    def test_expiry_drops_upload(self) -> None:
+        """Test that an upload which keeps timing out is dropped, along with its task."""
+        uploader = _uploader()
+        task = {"requestId": 0}
+        uploader.add(
+            PendingUpload(
+                request_id="0",
+                sender="sender",
+                done_task={"request_id": 0},
+                content="result 0",
+                task=task,
+            )
+        )
+
+        for attempt in range(MAX_RETRIES + 1):
+            (upload,) = uploader.take_batch(time.time() + MAX_BATCH_AGE)
+            uploader.mark_sent(f"nonce_{attempt}", upload)
+            assert uploader.expire(time.time() + UPLOAD_TIMEOUT) == [f"nonce_{attempt}"]
+
+        assert uploader.queued == 0
+        assert uploader.dropped_uploads == 1
+        (dropped,) = uploader.take_dropped()
+        assert dropped.task is task
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""This module contains an outbound delivery queue for ACN data."""
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+
+class AcnDelivery:  # pylint: disable=too-few-public-methods
+    """Data to be delivered to a requester via the ACN."""
+
+    def __init__(self, request_id: str, counterparty: str, content: str) -> None:
+        """Initialize the delivery."""
+        self.request_id = request_id
+        self.counterparty = counterparty
+        self.content = content
+        self.enqueued_at = time.time()
+        self.next_attempt_at = self.enqueued_at
+        self.sent_at: Optional[float] = None
+        self.attempts = 0
+
+
+class AcnDeliveryQueue:  # pylint: disable=too-many-instance-attributes
+    """
+    Queue the data to be delivered via the ACN.
+
+    The deliveries are sent grouped by counterparty, in the order in which they were queued.
+    A delivery which could not be sent is retried with an exponential backoff, until it runs out of retries.
+    If acknowledgements are required, a delivery is also retried
+    until the requester acknowledges it by echoing the request id.
+    No delivery is ever discarded to make room for another one. Instead, once `max_outstanding` deliveries
+    are queued or waiting for an acknowledgement, the queue is full and no new tasks should be taken.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        max_outstanding: int,
+        require_ack: bool,
+        ack_timeout: float,
+        max_retries: int,
+        backoff_factor: float,
+        on_delivered: Optional[Callable[[float], None]] = None,
+        on_failed: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Initialize the queue."""
+        self._max_outstanding = max_outstanding
+        self._require_ack = require_ack
+        self._ack_timeout = ack_timeout
+        self._max_retries = max_retries
+        self._backoff_factor = backoff_factor
+        self._on_delivered = on_delivered
+        self._on_failed = on_failed
+        self._queue: Deque[AcnDelivery] = deque()
+        self._awaiting_ack: Dict[str, AcnDelivery] = {}
+        self.delivered = 0
+        self.failed = 0
+        self.retried = 0
+        self._total_latency = 0.0
+
+    @property
+    def outstanding(self) -> int:
+        """Get the number of deliveries which are queued or waiting for an acknowledgement."""
+        return len(self._queue) + len(self._awaiting_ack)
+
+    @property
+    def is_full(self) -> bool:
+        """Check whether the outstanding deliveries have reached the bound, i.e., no new tasks should be taken."""
+        return self.outstanding >= self._max_outstanding
+
+    @property
+    def average_latency(self) -> float:
+        """Get the average time from queueing a delivery until it completed, in seconds."""
+        if self.delivered == 0:
+            return 0.0
+        return self._total_latency / self.delivered
+
+    def put(self, delivery: AcnDelivery) -> None:
+        """
+        Queue a delivery.
+
+        The delivery is queued even if the queue is full, as its task has already been executed.
+        The bound is enforced by not taking new tasks while `is_full`.
+
+        :param delivery: the delivery to queue.
+        """
+        self._queue.append(delivery)
+
+    def _complete(self, delivery: AcnDelivery, now: float) -> None:
+        """Mark a delivery as completed."""
+        latency = now - delivery.enqueued_at
+        self.delivered += 1
+        self._total_latency += latency
+        if self._on_delivered is not None:
+            self._on_delivered(latency)
+
+    def _retry_unacknowledged(self, now: float) -> None:
+        """Requeue the deliveries whose acknowledgement timed out."""
+        timed_out = [
+            request_id
+            for request_id, delivery in self._awaiting_ack.items()
+            if now - float(delivery.sent_at) >= self._ack_timeout
+        ]
+        for request_id in timed_out:
+            self._retry(self._awaiting_ack.pop(request_id), now)
+
+    def _retry(self, delivery: AcnDelivery, now: float) -> bool:
+        """Requeue a delivery with a backoff, returns whether it has not run out of retries."""
+        if delivery.attempts > self._max_retries:
+            self.failed += 1
+            if self._on_failed is not None:
+                self._on_failed()
+            return False
+        self.retried += 1
+        backoff = self._backoff_factor * 2 ** (delivery.attempts - 1)
+        delivery.next_attempt_at = now + backoff
+        self._queue.append(delivery)
+        return True
+
+    def ready(self, now: Optional[float] = None) -> Dict[str, List[AcnDelivery]]:
+        """
+        Take the deliveries which are due, grouped by counterparty.
+
+        :param now: the current timestamp, defaults to `time.time()`.
+        :return: the due deliveries, grouped by counterparty.
+        """
+        now = time.time() if now is None else now
+        if self._require_ack:
+            self._retry_unacknowledged(now)
+
+        due: Dict[str, List[AcnDelivery]] = {}
+        not_due: Deque[AcnDelivery] = deque()
+        for delivery in self._queue:
+            if delivery.next_attempt_at > now:
+                not_due.append(delivery)
+                continue
+            due.setdefault(delivery.counterparty, []).append(delivery)
+        self._queue = not_due
+        return due
+
+    def mark_sent(self, delivery: AcnDelivery, now: Optional[float] = None) -> None:
+        """Mark a delivery as sent."""
+        now = time.time() if now is None else now
+        delivery.attempts += 1
+        delivery.sent_at = now
+        if self._require_ack:
+            self._awaiting_ack[delivery.request_id] = delivery
+            return
+        self._complete(delivery, now)
+
+    def mark_failed(self, delivery: AcnDelivery, now: Optional[float] = None) -> bool:
+        """
+        Mark a delivery as failed to be sent, so that it gets retried regardless of whether acknowledgements are required.
+
+        :param delivery: the delivery which could not be sent.
+        :param now: the current timestamp, defaults to `time.time()`.
+        :return: whether the delivery will be retried, i.e., it has not run out of retries.
+        """
+        now = time.time() if now is None else now
+        delivery.attempts += 1
+        return self._retry(delivery, now)
+
+    def acknowledge(self, request_id: str, counterparty: str) -> bool:
+        """
+        Acknowledge a delivery.
+
+        :param request_id: the id of the request whose data was delivered.
+        :param counterparty: the address of the requester acknowledging the delivery.
+        :return: whether a delivery was waiting for this acknowledgement.
+        """
+        delivery = self._awaiting_ack.get(request_id, None)
+        if delivery is None or delivery.counterparty != counterparty:
+            return False
+        del self._awaiting_ack[request_id]
+        self._complete(delivery, time.time())
+        return True
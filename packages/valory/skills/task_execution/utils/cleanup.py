@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""This module contains an incremental garbage collector for dialogues."""
+import time
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from aea.protocols.dialogue.base import Dialogue, DialogueLabel, Dialogues
+
+
+class _TrackedDialogue:  # pylint: disable=too-few-public-methods
+    """A dialogue tracked by the cleaner."""
+
+    __slots__ = ("dialogues", "dialogue", "expires_at", "retired")
+
+    def __init__(
+        self, dialogues: Dialogues, dialogue: Dialogue, expires_at: float
+    ) -> None:
+        """Initialize the tracked dialogue."""
+        self.dialogues = dialogues
+        self.dialogue = dialogue
+        self.expires_at = expires_at
+        self.retired = False
+
+
+class DialogueCleaner:
+    """
+    Retire dialogues incrementally.
+
+    A tracked dialogue is retired either when it reaches a terminal state or when its TTL expires.
+    The dialogues which are not tracked, e.g., the ones opened by counterparties,
+    are retired by sweeping the registered stores, once they have been seen for longer than the TTL.
+    The actual removal happens in `step`, which does a bounded amount of work per call,
+    so that the cleanup cost is spread across ticks instead of wiping every store at once.
+    """
+
+    def __init__(self, ttl: float, max_cleanups_per_tick: int) -> None:
+        """Initialize the cleaner."""
+        self._ttl = ttl
+        self._max_cleanups_per_tick = max_cleanups_per_tick
+        # the ttl is the same for every dialogue, so this is sorted by expiry
+        self._by_expiry: Deque[_TrackedDialogue] = deque()
+        self._terminated: Deque[_TrackedDialogue] = deque()
+        self._live_dialogues = 0
+        self._stores: List[Dialogues] = []
+        # the store being swept, and its labels left to visit
+        self._sweep_index = -1
+        self._to_sweep: Iterator[DialogueLabel] = iter(())
+        # when the dialogues were first seen, by the current and by the previous sweep,
+        # the ones which are not seen again by the current sweep have been removed
+        self._first_seen: Dict[DialogueLabel, float] = {}
+        self._seen_before: Dict[DialogueLabel, float] = {}
+        self.retired_on_termination = 0
+        self.retired_on_expiry = 0
+        self.retired_on_sweep = 0
+        self.reclaimed_messages = 0
+
+    @property
+    def live_dialogues(self) -> int:
+        """Get the number of tracked dialogues which have not been retired yet."""
+        return self._live_dialogues
+
+    @staticmethod
+    def _is_present(dialogues: Dialogues, dialogue: Dialogue) -> bool:
+        """Check whether the dialogue is still held by its dialogues' storage."""
+        storage = dialogues._dialogues_storage  # pylint: disable=protected-access
+        return storage.is_dialogue_present(dialogue.dialogue_label)
+
+    @staticmethod
+    def _count_messages(dialogue: Dialogue) -> int:
+        """Count the messages held by a dialogue, as a cheap estimate of its memory."""
+        return len(
+            dialogue._incoming_messages  # pylint: disable=protected-access
+        ) + len(
+            dialogue._outgoing_messages  # pylint: disable=protected-access
+        )
+
+    def register(self, dialogues: Dialogues) -> None:
+        """
+        Register a dialogues' store, to be swept for dialogues which are not tracked.
+
+        :param dialogues: the dialogues to sweep.
+        """
+        if all(store is not dialogues for store in self._stores):
+            self._stores.append(dialogues)
+
+    def track(self, dialogues: Dialogues, dialogue: Dialogue) -> None:
+        """
+        Start tracking a dialogue.
+
+        :param dialogues: the dialogues the dialogue belongs to.
+        :param dialogue: the dialogue to track.
+        """
+        if not self._is_present(dialogues, dialogue):
+            # the dialogue has already terminated and has been dropped by its storage
+            return
+
+        now = time.time()
+        tracked = _TrackedDialogue(dialogues, dialogue, now + self._ttl)
+        self._first_seen[dialogue.dialogue_label] = now
+
+        def on_terminal_state(_dialogue: Dialogue) -> None:
+            """Schedule the dialogue for removal once it terminates."""
+            self._terminated.append(tracked)
+
+        dialogue.add_terminal_state_callback(on_terminal_state)
+        self._by_expiry.append(tracked)
+        self._live_dialogues += 1
+
+    def _retire(self, tracked: _TrackedDialogue) -> bool:
+        """Retire a tracked dialogue, returns whether it was not retired before."""
+        if tracked.retired:
+            return False
+
+        tracked.retired = True
+        self._live_dialogues -= 1
+        label = tracked.dialogue.dialogue_label
+        self._first_seen.pop(label, None)
+        self._seen_before.pop(label, None)
+        self.reclaimed_messages += self._count_messages(tracked.dialogue)
+        if self._is_present(tracked.dialogues, tracked.dialogue):
+            storage = tracked.dialogues._dialogues_storage  # pylint: disable=W0212
+            storage.remove(tracked.dialogue.dialogue_label)
+        # drop the reference, so the dialogue can be garbage collected
+        # even if the entry is still waiting in one of the queues
+        tracked.dialogue = None  # type: ignore
+        return True
+
+    def step(self, now: Optional[float] = None) -> int:
+        """
+        Do a bounded amount of cleanup work.
+
+        :param now: the current timestamp, defaults to `time.time()`.
+        :return: the number of dialogues retired in this step.
+        """
+        now = time.time() if now is None else now
+        budget = self._max_cleanups_per_tick
+        retired = 0
+
+        while budget > 0 and len(self._terminated) > 0:
+            budget -= 1
+            if self._retire(self._terminated.popleft()):
+                self.retired_on_termination += 1
+                retired += 1
+
+        while (
+            budget > 0
+            and len(self._by_expiry) > 0
+            and (self._by_expiry[0].retired or self._by_expiry[0].expires_at <= now)
+        ):
+            budget -= 1
+            if self._retire(self._by_expiry.popleft()):
+                self.retired_on_expiry += 1
+                retired += 1
+
+        if budget > 0:
+            retired += self._sweep(now, budget)
+
+        return retired
+
+    def _next_to_sweep(self) -> Optional[Tuple[Dialogues, DialogueLabel]]:
+        """Get the next dialogue to visit along with its store, or `None` once a sweep of all the stores is complete."""
+        while True:
+            label = next(self._to_sweep, None)
+            if label is not None:
+                return self._stores[self._sweep_index], label
+
+            self._sweep_index += 1
+            if self._sweep_index >= len(self._stores):
+                # the sweep is complete, forget the dialogues which have not been seen again
+                self._sweep_index = -1
+                self._seen_before, self._first_seen = self._first_seen, {}
+                return None
+            dialogues = self._stores[self._sweep_index]
+            storage = dialogues._dialogues_storage  # pylint: disable=W0212
+            # the store changes between the steps, so its labels are visited from a snapshot
+            self._to_sweep = iter(
+                tuple(storage._dialogues_by_dialogue_label)  # pylint: disable=W0212
+            )
+
+    def _sweep(self, now: float, budget: int) -> int:
+        """
+        Visit at most `budget` dialogues of the registered stores, and remove the ones seen for longer than the TTL.
+
+        The sweep resumes from where the previous step left it, and a step does not go past the end of a sweep.
+
+        :param now: the current timestamp.
+        :param budget: the maximum number of dialogues to visit.
+        :return: the number of dialogues removed.
+        """
+        removed = 0
+        while budget > 0:
+            to_sweep = self._next_to_sweep()
+            if to_sweep is None:
+                break
+            budget -= 1
+            dialogues, label = to_sweep
+            first_seen = self._seen_before.pop(label, None)
+            if first_seen is None:
+                first_seen = self._first_seen.get(label, now)
+            if first_seen + self._ttl > now:
+                self._first_seen[label] = first_seen
+                continue
+            self._first_seen.pop(label, None)
+            storage = dialogues._dialogues_storage  # pylint: disable=W0212
+            dialogue = storage.get(label)
+            if dialogue is None:
+                continue
+            self.reclaimed_messages += self._count_messages(dialogue)
+            storage.remove(label)
+            self.retired_on_sweep += 1
+            removed += 1
+
+        return removed
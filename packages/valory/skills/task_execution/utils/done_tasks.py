@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""This module contains the store of the done tasks, shared between skills."""
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set
+
+
+DEFAULT_DELIVERED_HISTORY = 1000
+
+
+class DoneTaskStore:
+    """
+    A thread safe store of the done tasks, indexed by request id.
+
+    The tasks are kept in the order in which they were done.
+    The stored tasks must not be mutated once added, so that snapshots can share them instead of copying them.
+
+    Each task is either available, or assigned to the batch which is being settled.
+    Assigned tasks are excluded from the snapshots, until their batch is either settled or released,
+    and the request ids of the settled tasks are remembered, so that the same request is never delivered twice.
+    """
+
+    def __init__(self, delivered_history: int = DEFAULT_DELIVERED_HISTORY) -> None:
+        """Initialize the store."""
+        self._tasks: Dict[Any, Dict[str, Any]] = {}
+        self._added_at: Dict[Any, float] = {}
+        self._batches: Dict[Any, int] = {}
+        self._delivered: Set[Any] = set()
+        self._delivered_order: Deque[Any] = deque()
+        self._delivered_history = delivered_history
+        self._lock = threading.Lock()
+        self._not_empty = threading.Event()
+        # the number of tasks which got done so far, released tasks are not counted again
+        self.added = 0
+
+    def __len__(self) -> int:
+        """Get the number of done tasks."""
+        return len(self._tasks)
+
+    @property
+    def assigned(self) -> int:
+        """Get the number of done tasks which are assigned to a batch."""
+        return len(self._batches)
+
+    def _update_signal(self) -> None:
+        """Signal whether there are available tasks. Must be called while holding the lock."""
+        if len(self._tasks) > len(self._batches):
+            self._not_empty.set()
+            return
+        self._not_empty.clear()
+
+    def has_tasks(self) -> bool:
+        """Check whether there are any available tasks. This is the wake-up signal for whoever waits for tasks."""
+        return self._not_empty.is_set()
+
+    def add(self, task: Dict[str, Any]) -> bool:
+        """Add a done task, returns `False` if its request has already been delivered."""
+        with self._lock:
+            request_id = task["request_id"]
+            if request_id in self._delivered:
+                return False
+            if request_id not in self._tasks:
+                self.added += 1
+            self._tasks[request_id] = task
+            self._added_at.setdefault(request_id, time.time())
+            self._update_signal()
+            return True
+
+    def remove(self, request_ids: Iterable[Any]) -> None:
+        """Remove the tasks with the given request ids, if present."""
+        with self._lock:
+            for request_id in request_ids:
+                self._tasks.pop(request_id, None)
+                self._added_at.pop(request_id, None)
+                self._batches.pop(request_id, None)
+            self._update_signal()
+
+    def assign(self, request_ids: Iterable[Any], batch_id: int) -> None:
+        """Assign the tasks with the given request ids to a batch."""
+        with self._lock:
+            for request_id in request_ids:
+                if request_id in self._tasks:
+                    self._batches[request_id] = batch_id
+            self._update_signal()
+
+    def settle(self, request_ids: Iterable[Any]) -> None:
+        """Remove the tasks with the given request ids, and remember that their requests have been delivered."""
+        with self._lock:
+            for request_id in request_ids:
+                self._tasks.pop(request_id, None)
+                self._added_at.pop(request_id, None)
+                self._batches.pop(request_id, None)
+                if request_id in self._delivered:
+                    continue
+                self._delivered.add(request_id)
+                self._delivered_order.append(request_id)
+                if len(self._delivered_order) > self._delivered_history:
+                    self._delivered.discard(self._delivered_order.popleft())
+            self._update_signal()
+
+    def release(self, batch_id: Optional[int] = None) -> int:
+        """
+        Make the tasks of a batch available again, because they were not delivered.
+
+        :param batch_id: the batch to release, defaults to all of them.
+        :return: the number of released tasks.
+        """
+        with self._lock:
+            released = [
+                request_id
+                for request_id, assigned_to in self._batches.items()
+                if batch_id is None or assigned_to == batch_id
+            ]
+            for request_id in released:
+                del self._batches[request_id]
+            self._update_signal()
+            return len(released)
+
+    def available(self) -> int:
+        """Get the number of available done tasks."""
+        return len(self._tasks) - len(self._batches)
+
+    def oldest_added_at(self) -> Optional[float]:
+        """Get the time at which the oldest available task was done, if there are any."""
+        with self._lock:
+            for request_id in self._tasks:
+                if request_id not in self._batches:
+                    return self._added_at[request_id]
+            return None
+
+    def snapshot(self, max_count: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get the available done tasks, oldest first.
+
+        :param max_count: the maximum number of tasks to get.
+        :return: the tasks. The list is new, but the tasks are shared with the store.
+        """
+        with self._lock:
+            available = (
+                task
+                for request_id, task in self._tasks.items()
+                if request_id not in self._batches
+            )
+            return list(islice(available, max_count))
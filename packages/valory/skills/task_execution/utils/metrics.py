@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""This module contains an in-process metrics registry, exposed in the Prometheus text format."""
+import bisect
+import threading
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_PATH = "/metrics"
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(
+    label_names: Sequence[str],
+    label_values: Sequence[str],
+    extra: Optional[Tuple[str, str]] = None,
+) -> str:
+    """Format the labels of a sample."""
+    pairs = list(zip(label_names, label_values))
+    if extra is not None:
+        pairs.append(extra)
+    if len(pairs) == 0:
+        return ""
+    formatted = ",".join(
+        '{}="{}"'.format(
+            name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for name, value in pairs
+    )
+    return "{" + formatted + "}"
+
+
+def _format_value(value: float) -> str:
+    """Format the value of a sample."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    """A metric, with one value per combination of label values."""
+
+    type_ = ""
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Sequence[str] = ()
+    ) -> None:
+        """Initialize the metric."""
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Sequence[str]) -> LabelValues:
+        """Validate the given label values."""
+        if len(labels) != len(self.label_names):
+            raise ValueError(
+                f"Metric {self.name} expects labels {self.label_names}, got {labels}."
+            )
+        return tuple(str(label) for label in labels)
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Get the samples of the metric, in the text format."""
+
+    def render(self) -> str:
+        """Render the metric in the text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_}",
+        ]
+        with self._lock:
+            lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A monotonically increasing counter."""
+
+    type_ = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Sequence[str] = ()
+    ) -> None:
+        """Initialize the counter."""
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Increment the counter."""
+        if amount < 0:
+            raise ValueError("Counters can only be incremented.")
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        """Get the value of the counter."""
+        return self._values.get(self._label_values(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        """Get the samples of the counter."""
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(_Metric):
+    """A value that can go up and down."""
+
+    type_ = "gauge"
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Sequence[str] = ()
+    ) -> None:
+        """Initialize the gauge."""
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        """Set the gauge."""
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, *labels: str) -> float:
+        """Get the value of the gauge."""
+        return self._values.get(self._label_values(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        """Get the samples of the gauge."""
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Histogram(_Metric):
+    """A histogram with fixed buckets."""
+
+    type_ = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Initialize the histogram."""
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # per label values: the count of each bucket (non-cumulative, the last one is +Inf), the sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Observe a value."""
+        key = self._label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key, None)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def count(self, *labels: str) -> int:
+        """Get the number of observations."""
+        return sum(self._counts.get(self._label_values(labels), []))
+
+    def _samples(self) -> List[str]:
+        """Get the samples of the histogram."""
+        samples = []
+        for key, counts in self._counts.items():
+            cumulative = 0
+            upper_bounds = self.buckets + (float("inf"),)
+            for upper_bound, count in zip(upper_bounds, counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.label_names, key, ("le", _format_value(upper_bound))
+                )
+                samples.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            samples.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+            samples.append(f"{self.name}_count{labels} {cumulative}")
+        return samples
+
+
+class MetricsRegistry:
+    """A registry of metrics."""
+
+    def __init__(self) -> None:
+        """Initialize the registry."""
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Any) -> Any:
+        """Register a metric, or get the already registered one with the same name."""
+        with self._lock:
+            registered = self._metrics.get(metric.name, None)
+            if registered is None:
+                self._metrics[metric.name] = metric
+                return metric
+        if type(registered) is not type(metric):
+            raise ValueError(f"Metric {metric.name} is already registered.")
+        return registered
+
+    def counter(
+        self, name: str, documentation: str, label_names: Sequence[str] = ()
+    ) -> Counter:
+        """Get or create a counter."""
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(
+        self, name: str, documentation: str, label_names: Sequence[str] = ()
+    ) -> Gauge:
+        """Get or create a gauge."""
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Get or create a histogram."""
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Add a callable to be called before rendering, e.g., to update gauges that are cheap to read but costly to track."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all the metrics in the Prometheus text format."""
+        for collector in self._collectors:
+            collector()
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+class MetricsServer:
+    """A local HTTP server exposing a metrics registry."""
+
+    def __init__(self, registry: MetricsRegistry, host: str, port: int) -> None:
+        """Initialize the server."""
+        self._registry = registry
+        self._host = host
+        self._port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        """Get the port the server is listening on."""
+        if self._server is None:
+            return self._port
+        return self._server.server_address[1]
+
+    def start(self) -> None:
+        """Start serving in a daemon thread."""
+        registry = self._registry
+
+        class _Handler(BaseHTTPRequestHandler):
+            """Serve the metrics."""
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                """Handle a GET request."""
+                if self.path.split("?")[0] != METRICS_PATH:
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                """Do not log every scrape."""
+
+        self._server = ThreadingHTTPServer((self._host, self._port), _Handler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-server", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+
+
+class TaskExecutionMetrics:  # pylint: disable=too-few-public-methods
+    """The metrics of the task execution pipeline."""
+
+    def __init__(self, registry: MetricsRegistry) -> None:
+        """Initialize the metrics."""
+        self.registry = registry
+        self.requests_received = registry.counter(
+            "mech_requests_received_total",
+            "Requests assigned to this agent.",
+        )
+        self.tasks_finished = registry.counter(
+            "mech_tasks_finished_total",
+            "Tasks which finished executing, by status.",
+            ("status",),
+        )
+        self.queue_seconds = registry.histogram(
+            "mech_task_queue_seconds",
+            "Time a task spent in the pending queue before being picked up.",
+        )
+        self.pickup_seconds = registry.histogram(
+            "mech_task_pickup_seconds",
+            "Time from receiving a request until its tool started executing.",
+        )
+        self.execution_seconds = registry.histogram(
+            "mech_tool_execution_seconds",
+            "Time spent executing a tool.",
+            ("tool",),
+        )
+        self.ipfs_seconds = registry.histogram(
+            "mech_ipfs_request_seconds",
+            "Latency of the IPFS requests, by performative.",
+            ("performative",),
+        )
+        self.acn_delivery_seconds = registry.histogram(
+            "mech_acn_delivery_seconds",
+            "Time from queueing an ACN delivery until it completed.",
+        )
+        self.pending_tasks = registry.gauge(
+            "mech_pending_tasks", "Tasks waiting to be executed."
+        )
+        self.done_tasks = registry.gauge(
+            "mech_done_tasks", "Done tasks waiting to be delivered on-chain."
+        )
+        self.queued_uploads = registry.gauge(
+            "mech_queued_uploads", "Task results waiting to be stored on IPFS."
+        )
+        self.acn_outstanding = registry.gauge(
+            "mech_acn_outstanding_deliveries",
+            "ACN deliveries queued or waiting for an acknowledgement.",
+        )
+        self.acn_failed = registry.counter(
+            "mech_acn_failed_deliveries_total", "ACN deliveries which failed."
+        )
+        self.tools_ready = registry.gauge(
+            "mech_tool_ready", "Whether a tool is ready to execute tasks.", ("tool",)
+        )
+        self.live_dialogues = registry.gauge(
+            "mech_live_dialogues", "Tracked dialogues which have not been retired."
+        )
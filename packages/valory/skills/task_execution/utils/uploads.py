@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""This module contains a batching uploader for task results."""
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+
+class PendingUpload:  # pylint: disable=too-few-public-methods
+    """A task result waiting to be stored on IPFS."""
+
+    def __init__(
+        self,
+        request_id: str,
+        sender: str,
+        done_task: Dict[str, Any],
+        content: str,
+        task: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Initialize the pending upload."""
+        self.request_id = request_id
+        self.sender = sender
+        self.done_task = done_task
+        self.content = content
+        # the task which produced the result, it is executed again if its result cannot be stored
+        self.task = task
+        self.enqueued_at = time.time()
+        self.sent_at: Optional[float] = None
+        self.attempts = 0
+
+    @property
+    def files(self) -> Dict[str, str]:
+        """Get the files to store, one file per request, so that each result keeps its own CID."""
+        return {self.request_id: self.content}
+
+
+class ResultUploader:
+    """
+    Collect task results and upload them in batches.
+
+    Results are collected until either `max_batch_size` results are waiting,
+    or the oldest one has been waiting for `max_batch_age` seconds.
+    Then, the whole batch is sent at once, without waiting for each upload to finish before sending the next one.
+    IPFS is content addressed, so retrying a failed upload of the same content is idempotent.
+    The uploads which run out of retries are kept until they are taken, so that their tasks can be executed again.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int,
+        max_batch_age: float,
+        max_retries: int,
+        upload_timeout: float,
+    ) -> None:
+        """Initialize the uploader."""
+        self._max_batch_size = max_batch_size
+        self._max_batch_age = max_batch_age
+        self._max_retries = max_retries
+        self._upload_timeout = upload_timeout
+        self._queue: Deque[PendingUpload] = deque()
+        self._in_flight: Dict[str, PendingUpload] = {}
+        self._dropped: List[PendingUpload] = []
+        self.uploaded_files = 0
+        self.uploaded_bytes = 0
+        self.failed_attempts = 0
+        self.dropped_uploads = 0
+        self._total_latency = 0.0
+        self._first_sent_at: Optional[float] = None
+        self._last_uploaded_at: Optional[float] = None
+
+    @property
+    def queued(self) -> int:
+        """Get the number of results waiting to be sent."""
+        return len(self._queue)
+
+    @property
+    def in_flight(self) -> int:
+        """Get the number of uploads waiting for a response."""
+        return len(self._in_flight)
+
+    @property
+    def average_latency(self) -> float:
+        """Get the average latency of the successful uploads, in seconds."""
+        if self.uploaded_files == 0:
+            return 0.0
+        return self._total_latency / self.uploaded_files
+
+    @property
+    def throughput(self) -> float:
+        """Get the upload throughput, in files per second."""
+        if self._first_sent_at is None or self._last_uploaded_at is None:
+            return 0.0
+        elapsed = self._last_uploaded_at - self._first_sent_at
+        if elapsed <= 0:
+            return 0.0
+        return self.uploaded_files / elapsed
+
+    def add(self, upload: PendingUpload) -> None:
+        """Add a result to the next batch."""
+        self._queue.append(upload)
+
+    def is_uploading(self, nonce: str) -> bool:
+        """Check whether the request with the given nonce is an upload of this uploader."""
+        return nonce in self._in_flight
+
+    def should_flush(self, now: Optional[float] = None) -> bool:
+        """Check whether the waiting results should be sent."""
+        if len(self._queue) == 0:
+            return False
+        if len(self._queue) >= self._max_batch_size:
+            return True
+        now = time.time() if now is None else now
+        return now - self._queue[0].enqueued_at >= self._max_batch_age
+
+    def take_batch(self, now: Optional[float] = None) -> List[PendingUpload]:
+        """Take the next batch to upload, if the size or the age limit has been reached."""
+        if not self.should_flush(now):
+            return []
+        batch = [
+            self._queue.popleft()
+            for _ in range(min(self._max_batch_size, len(self._queue)))
+        ]
+        return batch
+
+    def mark_sent(self, nonce: str, upload: PendingUpload) -> None:
+        """Mark an upload as sent with the request of the given nonce."""
+        upload.attempts += 1
+        upload.sent_at = time.time()
+        if self._first_sent_at is None:
+            self._first_sent_at = upload.sent_at
+        self._in_flight[nonce] = upload
+
+    def on_success(self, nonce: str) -> Optional[PendingUpload]:
+        """Handle a successful upload, returns the upload or `None` if the nonce is unknown."""
+        upload = self._in_flight.pop(nonce, None)
+        if upload is None:
+            return None
+        now = time.time()
+        self.uploaded_files += 1
+        self.uploaded_bytes += len(upload.content)
+        self._total_latency += now - float(upload.sent_at)
+        self._last_uploaded_at = now
+        return upload
+
+    def on_failure(self, nonce: str) -> Optional[PendingUpload]:
+        """Handle a failed upload, returns the upload if it was dropped because it ran out of retries."""
+        upload = self._in_flight.pop(nonce, None)
+        if upload is None:
+            return None
+        self.failed_attempts += 1
+        if upload.attempts > self._max_retries:
+            self.dropped_uploads += 1
+            self._dropped.append(upload)
+            return upload
+        # retry it with the next batch
+        self._queue.appendleft(upload)
+        return None
+
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """Fail the uploads which have been waiting for longer than the upload timeout, returns their nonces."""
+        now = time.time() if now is None else now
+        expired = [
+            nonce
+            for nonce, upload in self._in_flight.items()
+            if now - float(upload.sent_at) >= self._upload_timeout
+        ]
+        for nonce in expired:
+            self.on_failure(nonce)
+        return expired
+
+    def take_dropped(self) -> List[PendingUpload]:
+        """Take the uploads which have run out of retries since the last call."""
+        dropped, self._dropped = self._dropped, []
+        return dropped
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the controller which decides when a batch of done tasks should be pooled."""
+
+import time
+from collections import deque
+from enum import Enum
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+DEFAULT_HISTORY_SIZE = 100
+
+
+class FlushReason(Enum):
+    """The reasons for flushing a batch."""
+
+    MAX_SIZE = "max_size"
+    TARGET_SIZE = "target_size"
+    MAX_AGE = "max_age"
+    NO_EXPECTED_GAIN = "no_expected_gain"
+    TIMEOUT = "timeout"
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    """Get a percentile of the values, using the nearest rank."""
+    ordered = sorted(values)
+    index = max(0, int(round(percentile / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+class BatchingController:
+    """
+    Decide whether to keep waiting for more done tasks, or to pool the ones which are available.
+
+    Every batch costs a full settlement cycle, so waiting for more tasks pays off,
+    as long as the next task is expected to be done before the oldest one reaches its maximum age.
+    The expectation is based on the rate at which tasks got done in the recent past.
+    """
+
+    def __init__(
+        self,
+        target_batch_size: int,
+        max_batch_size: int,
+        max_batch_age: float,
+        rate_window: float,
+        history_size: int = DEFAULT_HISTORY_SIZE,
+    ) -> None:
+        """Initialize the controller."""
+        self._target_batch_size = target_batch_size
+        self._max_batch_size = max_batch_size
+        self._max_batch_age = max_batch_age
+        self._rate_window = rate_window
+        self._arrivals: Deque[float] = deque()
+        self._last_added = 0
+        self._sizes: Deque[float] = deque(maxlen=history_size)
+        self._ages: Deque[float] = deque(maxlen=history_size)
+        self.flushes: Dict[FlushReason, int] = {reason: 0 for reason in FlushReason}
+
+    @property
+    def completion_rate(self) -> float:
+        """Get the recent rate at which tasks get done, in tasks per second."""
+        return len(self._arrivals) / self._rate_window
+
+    def observe(self, added: int, now: Optional[float] = None) -> None:
+        """
+        Observe the number of tasks which got done so far, to track the completion rate.
+
+        Only the tasks which got done count as arrivals,
+        not the ones which become available again because their batch was not delivered.
+
+        :param added: the total number of tasks added to the store of done tasks.
+        :param now: the current timestamp, defaults to `time.time()`.
+        """
+        now = time.time() if now is None else now
+        arrived = max(0, added - self._last_added)
+        self._arrivals.extend([now] * arrived)
+        self._last_added = added
+        while len(self._arrivals) > 0 and now - self._arrivals[0] > self._rate_window:
+            self._arrivals.popleft()
+
+    def flush_reason(
+        self,
+        available: int,
+        added: int,
+        oldest_added_at: Optional[float],
+        now: Optional[float] = None,
+    ) -> Optional[FlushReason]:
+        """
+        Decide whether the available tasks should be pooled now.
+
+        :param available: the number of available done tasks.
+        :param added: the total number of tasks added to the store of done tasks.
+        :param oldest_added_at: the time at which the oldest available task was done.
+        :param now: the current timestamp, defaults to `time.time()`.
+        :return: the reason to flush, or `None` if it pays off to keep waiting.
+        """
+        now = time.time() if now is None else now
+        self.observe(added, now)
+        if available == 0 or oldest_added_at is None:
+            return None
+        if available >= self._max_batch_size:
+            return FlushReason.MAX_SIZE
+        if available >= self._target_batch_size:
+            return FlushReason.TARGET_SIZE
+        age = now - oldest_added_at
+        if age >= self._max_batch_age:
+            return FlushReason.MAX_AGE
+        rate = self.completion_rate
+        if rate == 0 or age + 1 / rate > self._max_batch_age:
+            # the next task is not expected before the oldest one gets too old
+            return FlushReason.NO_EXPECTED_GAIN
+        return None
+
+    def record_flush(
+        self,
+        size: int,
+        oldest_added_at: Optional[float],
+        reason: FlushReason,
+        now: Optional[float] = None,
+    ) -> None:
+        """Record a pooled batch."""
+        now = time.time() if now is None else now
+        self.flushes[reason] += 1
+        if size == 0 or oldest_added_at is None:
+            return
+        self._sizes.append(size)
+        self._ages.append(now - oldest_added_at)
+
+    def distributions(self) -> Dict[str, Tuple[float, float, float]]:
+        """Get the median, the 90th percentile and the maximum of the recent batch sizes and ages."""
+        summary = {}
+        for name, values in (("size", list(self._sizes)), ("age", list(self._ages))):
+            if len(values) == 0:
+                continue
+            summary[name] = (
+                _percentile(values, 50),
+                _percentile(values, 90),
+                max(values),
+            )
+        return summary
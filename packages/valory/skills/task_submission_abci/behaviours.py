@@ -19,11 +19,10 @@
 
 """This package contains round behaviours of TaskExecutionAbciApp."""
 import abc
+import hashlib
 import json
-import threading
 import time
-from copy import deepcopy
-from typing import Any, Dict, Generator, List, Optional, Set, Type, cast
+from typing import Any, Dict, Generator, List, Optional, Set, Tuple, Type, cast
 
 import openai  # noqa
 
@@ -37,14 +36,21 @@ from packages.valory.contracts.multisend.contract import (
     MultiSendOperation,
 )
 from packages.valory.protocols.contract_api import ContractApiMessage
-from packages.valory.skills.abstract_round_abci.base import AbstractRound
+from packages.valory.skills.abstract_round_abci.base import AbstractRound, get_name
+from packages.valory.skills.abstract_round_abci.behaviour_utils import TimeoutException
 from packages.valory.skills.abstract_round_abci.behaviours import (
     AbstractRoundBehaviour,
     BaseBehaviour,
 )
+from packages.valory.skills.abstract_round_abci.io_.store import SupportedFiletype
+from packages.valory.skills.task_execution.utils.done_tasks import DoneTaskStore
+from packages.valory.skills.task_submission_abci.batching import FlushReason
 from packages.valory.skills.task_submission_abci.models import Params
 from packages.valory.skills.task_submission_abci.payloads import TransactionPayload
 from packages.valory.skills.task_submission_abci.rounds import (
+    BATCH_DIGEST,
+    BATCH_HASH,
+    BATCH_REQUEST_IDS,
     SynchronizedData,
     TaskPoolingPayload,
     TaskPoolingRound,
@@ -58,8 +64,23 @@ from packages.valory.skills.transaction_settlement_abci.payload_tools import (
 
 ZERO_ETHER_VALUE = 0
 SAFE_GAS = 0
+# https://ethereum.org/en/developers/docs/gas/, EIP-2028 and the yellow paper
+ZERO_BYTE_GAS = 4
+NON_ZERO_BYTE_GAS = 16
+LOG_DATA_BYTE_GAS = 8
 DONE_TASKS = "ready_tasks"
-DONE_TASKS_LOCK = "lock"
+POOLING_WINDOW_OPENED_AT = "pooling_window_opened_at"
+DONE_TASKS_FILENAME = "done_tasks.json"
+# set by the transaction settlement only once the tx has been verified
+FINAL_TX_HASH = "final_tx_hash"
+# the age based flush decisions are re-evaluated at least this often, in seconds
+POOLING_POLL_INTERVAL = 0.5
+
+
+def batch_digest(done_tasks: List[Dict[str, Any]]) -> str:
+    """Get the digest of a batch of done tasks, over their canonical JSON serialization."""
+    serialized = json.dumps(done_tasks, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
 
 
 class TaskExecutionBaseBehaviour(BaseBehaviour, abc.ABC):
@@ -75,21 +96,22 @@ class TaskExecutionBaseBehaviour(BaseBehaviour, abc.ABC):
         """Return the params."""
         return cast(Params, super().params)
 
+    @property
+    def done_tasks_store(self) -> DoneTaskStore:
+        """Return the store of the done (ready) tasks from shared state."""
+        return cast(DoneTaskStore, self.context.shared_state[DONE_TASKS])
+
     @property
     def done_tasks(self) -> List[Dict[str, Any]]:
         """
         Return the done (ready) tasks from shared state.
 
         Use with care, the returned data here is NOT synchronized with the rest of the agents.
+        The tasks are shared with the store, they must not be mutated.
 
         :returns: the tasks
         """
-        done_tasks = deepcopy(self.context.shared_state.get(DONE_TASKS, []))
-        return cast(List[Dict[str, Any]], done_tasks)
-
-    def done_tasks_lock(self) -> threading.Lock:
-        """Get done_tasks_lock."""
-        return self.context.shared_state[DONE_TASKS_LOCK]
+        return self.done_tasks_store.snapshot(self.params.max_tasks_per_period)
 
     def remove_tasks(self, submitted_tasks: List[Dict[str, Any]]) -> None:
         """
@@ -97,21 +119,16 @@ class TaskExecutionBaseBehaviour(BaseBehaviour, abc.ABC):
 
         :param submitted_tasks: the done tasks that have already been submitted
         """
-        # run this in a lock
-        # the amount of done tasks will always be relatively low (<<20)
-        # we can afford to do this in a lock
-        with self.done_tasks_lock():
-            done_tasks = self.done_tasks
-            not_submitted = []
-            for done_task in done_tasks:
-                is_submitted = False
-                for submitted_task in submitted_tasks:
-                    if submitted_task["request_id"] == done_task["request_id"]:
-                        is_submitted = True
-                        break
-                if not is_submitted:
-                    not_submitted.append(done_task)
-            self.context.shared_state[DONE_TASKS] = not_submitted
+        self.done_tasks_store.settle(task["request_id"] for task in submitted_tasks)
+        self.release_tasks()
+
+    def release_tasks(self) -> None:
+        """Release the tasks of the previous batches which were not delivered, so that they can be pooled again."""
+        released = self.done_tasks_store.release()
+        if released > 0:
+            self.context.logger.info(
+                f"{released} tasks of the previous batch were not delivered. Pooling them again."
+            )
 
 
 class TaskPoolingBehaviour(TaskExecutionBaseBehaviour):
@@ -133,29 +150,115 @@ class TaskPoolingBehaviour(TaskExecutionBaseBehaviour):
             yield from self.wait_until_round_end()
         self.set_done()
 
+    def _take_pooling_timeout(self) -> float:
+        """
+        Get the time left to wait for done tasks, and close the pooling window.
+
+        The pooling window opens as soon as the previous batch's tx hash has been agreed upon,
+        so the time spent settling it counts towards the window of the next batch.
+
+        :return: the timeout.
+        """
+        opened_at = self.context.shared_state.pop(POOLING_WINDOW_OPENED_AT, None)
+        if opened_at is None:
+            return self.params.task_wait_timeout
+        elapsed = time.time() - opened_at
+        return max(0.0, self.params.task_wait_timeout - elapsed)
+
     def get_payload_content(self) -> Generator[None, None, str]:
         """Get the payload content."""
-        done_tasks = yield from self.get_done_tasks(self.params.task_wait_timeout)
-        return json.dumps(done_tasks)
+        pooling_timeout = self._take_pooling_timeout()
+        done_tasks = yield from self.get_done_tasks(pooling_timeout)
+        # the tasks are assigned to this period's batch, until it gets settled
+        self.done_tasks_store.assign(
+            (task["request_id"] for task in done_tasks),
+            self.synchronized_data.period_count,
+        )
+        if not self.params.use_ipfs_for_pooling or len(done_tasks) == 0:
+            return json.dumps(done_tasks)
+
+        ipfs_hash = yield from self.send_to_ipfs(
+            DONE_TASKS_FILENAME, done_tasks, filetype=SupportedFiletype.JSON
+        )
+        if ipfs_hash is None:
+            self.context.logger.warning(
+                "Couldn't store the done tasks on IPFS. Including them in the payload instead."
+            )
+            return json.dumps(done_tasks)
+
+        # only the reference to the batch goes through consensus
+        return json.dumps(
+            {
+                BATCH_HASH: ipfs_hash,
+                BATCH_DIGEST: batch_digest(done_tasks),
+                BATCH_REQUEST_IDS: [task["request_id"] for task in done_tasks],
+            }
+        )
 
     def get_done_tasks(self, timeout: float) -> Generator[None, None, List[Dict]]:
-        """Wait for tasks to get done in the specified timeout."""
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if len(self.done_tasks) == 0:
-                one_second = 1.0
-                yield from self.sleep(one_second)
-                continue
-            # there are done tasks, return all of them
-            return self.done_tasks
+        """Wait for a batch of tasks to get done in the specified timeout."""
+        store = self.done_tasks_store
+        controller = self.params.batching_controller
+        reason: Optional[FlushReason] = None
+
+        def should_flush() -> bool:
+            """Check whether the available tasks should be pooled, or it pays off to wait for more."""
+            nonlocal reason
+            reason = controller.flush_reason(
+                store.available(), store.added, store.oldest_added_at()
+            )
+            return reason is not None
+
+        try:
+            # the decision changes when tasks get done, or as the available ones grow older
+            yield from self.wait_for_condition(
+                should_flush,
+                timeout=timeout,
+                condition_key=store.available,
+                poll_interval=POOLING_POLL_INTERVAL,
+            )
+        except TimeoutException:
+            reason = FlushReason.TIMEOUT
+
+        oldest_added_at = store.oldest_added_at()
+        # return up to the maximum allowed per period
+        done_tasks = self.done_tasks
+        controller.record_flush(
+            len(done_tasks), oldest_added_at, cast(FlushReason, reason)
+        )
+        if len(done_tasks) == 0:
+            # no tasks are ready for this agent
+            self.context.logger.info("No tasks were ready within the timeout")
+            return []
+
+        self.context.logger.info(
+            f"Pooling {len(done_tasks)} tasks, reason: {cast(FlushReason, reason).value}. "
+            f"Recent batch sizes and ages (median, p90, max): {controller.distributions()}"
+        )
+        return done_tasks
 
-        # no tasks are ready for this agent
-        self.context.logger.info("No tasks were ready within the timeout")
-        return []
+    @property
+    def is_previous_batch_settled(self) -> bool:
+        """
+        Check whether the tx of the previous period has been settled.
+
+        The transaction settlement sets the final tx hash only when the tx has been verified,
+        and the period has been reset since, so the hash is looked up in the data of the previous period.
+
+        :return: whether the tx has been settled.
+        """
+        db = self.synchronized_data.db
+        previous_period = db.get_latest_from_reset_index(db.reset_index - 1)
+        return previous_period.get(FINAL_TX_HASH, None) is not None
 
     def handle_submitted_tasks(self) -> None:
         """Handle tasks that have been already submitted before (in a prev. period)."""
         submitted_tasks = cast(List[Dict[str, Any]], self.synchronized_data.done_tasks)
+        if not self.is_previous_batch_settled:
+            # e.g., the settlement failed, the tasks have not been delivered
+            self.release_tasks()
+            return
+
         self.context.logger.info(
             f"Tasks {submitted_tasks} has already been submitted. "
             f"Removing them from the list of tasks to be processed."
@@ -171,33 +274,169 @@ class TransactionPreparationBehaviour(TaskExecutionBaseBehaviour):
     def async_act(self) -> Generator:  # pylint: disable=R0914,R0915
         """Do the act, supporting asynchronous execution."""
         with self.context.benchmark_tool.measure(self.behaviour_id).local():
-            payload_content = yield from self.get_payload_content()
+            payload_content, delivered_tasks = yield from self.get_payload_content()
             sender = self.context.agent_address
-            payload = TransactionPayload(sender=sender, content=payload_content)
+            payload = TransactionPayload(
+                sender=sender, content=payload_content, delivered_tasks=delivered_tasks
+            )
         with self.context.benchmark_tool.measure(self.behaviour_id).consensus():
             yield from self.send_a2a_transaction(payload)
             yield from self.wait_until_round_end()
+        if self.is_tx_hash_agreed:
+            # the next batch can start being collected during the settlement
+            self.context.shared_state[POOLING_WINDOW_OPENED_AT] = time.time()
         self.set_done()
 
-    def get_payload_content(self) -> Generator[None, None, str]:
-        """Prepare the transaction"""
-        all_txs = []
-        for task in self.synchronized_data.done_tasks:
-            deliver_tx = yield from self._get_deliver_tx(task)
-            if deliver_tx is None:
-                # something went wrong, respond with ERROR payload for now
-                return TransactionPreparationRound.ERROR_PAYLOAD
-            all_txs.append(deliver_tx)
-            response_tx = task.get("transaction", None)
-            if response_tx is not None:
-                all_txs.append(response_tx)
+    @property
+    def is_tx_hash_agreed(self) -> bool:
+        """Check whether the agents agreed on a tx hash in this period, rather than on an error or on nothing."""
+        db = self.synchronized_data.db
+        tx_hash = db.get(get_name(SynchronizedData.most_voted_tx_hash), None)
+        return tx_hash is not None
+
+    def get_payload_content(self) -> Generator[None, None, Tuple[str, int]]:
+        """Prepare the transaction, returns the payload and the number of tasks it delivers."""
+        done_tasks = yield from self._resolve_done_tasks()
+        if done_tasks is None:
+            # something went wrong, respond with ERROR payload for now
+            return TransactionPreparationRound.ERROR_PAYLOAD, 0
+
+        deliver_txs = yield from self._get_deliver_txs(done_tasks)
+        if deliver_txs is None:
+            # something went wrong, respond with ERROR payload for now
+            return TransactionPreparationRound.ERROR_PAYLOAD, 0
+
+        all_txs = self._fit_to_multisend(done_tasks, deliver_txs)
+        delivered_tasks = len(all_txs)
+        all_txs = [tx for task_txs in all_txs for tx in task_txs]
 
         multisend_tx_str = yield from self._to_multisend(all_txs)
         if multisend_tx_str is None:
             # something went wrong, respond with ERROR payload for now
-            return TransactionPreparationRound.ERROR_PAYLOAD
+            return TransactionPreparationRound.ERROR_PAYLOAD, 0
+
+        return multisend_tx_str, delivered_tasks
+
+    def _resolve_done_tasks(self) -> Generator[None, None, Optional[List[Dict]]]:
+        """Get the done tasks, fetching the batches which were pooled via IPFS and verifying them against their digests."""
+        done_tasks = self.synchronized_data.done_tasks
+        batches = {
+            task[BATCH_HASH]: task[BATCH_DIGEST]
+            for task in done_tasks
+            if BATCH_HASH in task
+        }
+        # the tasks are keyed by their batch too, as different batches may contain the same request
+        fetched: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        # the batches are fetched concurrently
+        batch_by_hash = yield from self.get_many_from_ipfs(
+            batches, filetype=SupportedFiletype.JSON
+        )
+        for ipfs_hash, digest in batches.items():
+            batch = batch_by_hash[ipfs_hash]
+            if batch is None:
+                self.context.logger.error(
+                    f"Couldn't fetch the batch of done tasks {ipfs_hash}."
+                )
+                return None
+            batch = cast(List[Dict[str, Any]], batch)
+            if batch_digest(batch) != digest:
+                self.context.logger.error(
+                    f"The batch of done tasks {ipfs_hash} does not match its digest {digest}."
+                )
+                return None
+            fetched.update({(ipfs_hash, task["request_id"]): task for task in batch})
+
+        resolved = []
+        for task in done_tasks:
+            if BATCH_HASH not in task:
+                resolved.append(task)
+                continue
+            fetched_task = fetched.get((task[BATCH_HASH], task["request_id"]), None)
+            if fetched_task is None:
+                self.context.logger.error(
+                    f"Task {task['request_id']} is missing from the batch {task[BATCH_HASH]}."
+                )
+                return None
+            resolved.append(fetched_task)
+        return resolved
+
+    @staticmethod
+    def _data_size(data: Any) -> int:
+        """Get the size of the data of a tx, in bytes."""
+        if isinstance(data, str):
+            return len(data[2:] if data.startswith("0x") else data) // 2
+        return len(data)
+
+    def _estimate_gas(self, tx: Dict[str, Any], logs_data: bool) -> int:
+        """
+        Estimate the gas that a call of the multisend tx uses.
+
+        This is a deterministic estimate, based on the calldata, so that all the agents select the same txs.
+
+        :param tx: the tx.
+        :param logs_data: whether the call emits its calldata in an event, as `deliver` does.
+        :return: the gas estimate.
+        """
+        data = tx.get("data", b"")
+        if isinstance(data, str):
+            data = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+        zero_bytes = data.count(0)
+        gas = (
+            self.params.deliver_gas_overhead
+            + ZERO_BYTE_GAS * zero_bytes
+            + NON_ZERO_BYTE_GAS * (len(data) - zero_bytes)
+        )
+        if logs_data:
+            gas += LOG_DATA_BYTE_GAS * len(data)
+        return gas
+
+    def _fit_to_multisend(
+        self, done_tasks: List[Dict[str, Any]], deliver_txs: List[Dict]
+    ) -> List[List[Dict]]:
+        """
+        Select the txs of the tasks which fit in a single multisend tx.
+
+        The tasks are selected in order, until the gas or the data size budget is exhausted.
+        The first task is always selected, so that an oversized task cannot block the rest of the queue.
+
+        :param done_tasks: the done tasks.
+        :param deliver_txs: the deliver tx of each task.
+        :return: the txs of each selected task.
+        """
+        selected: List[List[Dict]] = []
+        total_gas, total_size = 0, 0
+        for task, deliver_tx in zip(done_tasks, deliver_txs):
+            task_txs = [deliver_tx]
+            gas = self._estimate_gas(deliver_tx, logs_data=True)
+            size = self._data_size(deliver_tx["data"])
+            response_tx = task.get("transaction", None)
+            if response_tx is not None:
+                task_txs.append(response_tx)
+                gas += self._estimate_gas(response_tx, logs_data=False)
+                size += self._data_size(response_tx.get("data", b""))
 
-        return multisend_tx_str
+            fits = (
+                total_gas + gas <= self.params.multisend_max_gas
+                and total_size + size <= self.params.multisend_max_data_size
+            )
+            if not fits and len(selected) > 0:
+                break
+            if not fits:
+                self.context.logger.warning(
+                    f"Task {task['request_id']} exceeds the multisend budget on its own "
+                    f"(~{gas} gas, {size} bytes). Delivering it alone."
+                )
+            selected.append(task_txs)
+            total_gas += gas
+            total_size += size
+
+        carried_forward = len(done_tasks) - len(selected)
+        if carried_forward > 0:
+            self.context.logger.info(
+                f"Delivering {len(selected)} tasks (~{total_gas} gas, {total_size} bytes) in this period. "
+                f"{carried_forward} tasks are carried forward to the next periods."
+            )
+        return selected
 
     def _to_multisend(
         self, transactions: List[Dict]
@@ -280,32 +519,42 @@ class TransactionPreparationBehaviour(TaskExecutionBaseBehaviour):
         tx_hash = cast(str, response.state.body["tx_hash"])[2:]
         return tx_hash
 
-    def _get_deliver_tx(
-        self, task_data: Dict[str, Any]
-    ) -> Generator[None, None, Optional[Dict]]:
-        """Get the deliver tx."""
+    def _get_deliver_txs(
+        self, tasks: List[Dict[str, Any]]
+    ) -> Generator[None, None, Optional[List[Dict]]]:
+        """Get the deliver txs of all the tasks, with a single contract api request."""
+        if len(tasks) == 0:
+            return []
+
+        start = time.time()
         contract_api_msg = yield from self.get_contract_api_response(
             performative=ContractApiMessage.Performative.GET_STATE,  # type: ignore
             contract_address=self.params.agent_mech_contract_address,
             contract_id=str(AgentMechContract.contract_id),
-            contract_callable="get_deliver_data",
-            request_id=task_data["request_id"],
-            data=task_data["task_result"],
+            contract_callable="get_multiple_deliver_data",
+            request_ids=[task["request_id"] for task in tasks],
+            datas=[task["task_result"] for task in tasks],
         )
         if (
             contract_api_msg.performative != ContractApiMessage.Performative.STATE
         ):  # pragma: nocover
             self.context.logger.warning(
-                f"get_deliver_data unsuccessful!: {contract_api_msg}"
+                f"get_multiple_deliver_data unsuccessful!: {contract_api_msg}"
             )
             return None
 
-        data = cast(bytes, contract_api_msg.state.body["data"])
-        return {
-            "to": self.params.agent_mech_contract_address,
-            "value": ZERO_ETHER_VALUE,
-            "data": data,
-        }
+        datas = cast(List[bytes], contract_api_msg.state.body["data"])
+        self.context.logger.info(
+            f"Encoded {len(datas)} deliver calls in {time.time() - start:.3f}s."
+        )
+        return [
+            {
+                "to": self.params.agent_mech_contract_address,
+                "value": ZERO_ETHER_VALUE,
+                "data": data,
+            }
+            for data in datas
+        ]
 
 
 class TaskSubmissionRoundBehaviour(AbstractRoundBehaviour):
@@ -30,6 +30,7 @@ from packages.valory.skills.abstract_round_abci.models import Requests as BaseRe
 from packages.valory.skills.abstract_round_abci.models import (
     SharedState as BaseSharedState,
 )
+from packages.valory.skills.task_submission_abci.batching import BatchingController
 from packages.valory.skills.task_submission_abci.rounds import TaskSubmissionAbciApp
 
 
@@ -46,6 +47,24 @@ class Params(BaseParams):
         """Initialize the parameters object."""
 
         self.task_wait_timeout = self._ensure("task_wait_timeout", kwargs, float)
+        self.max_tasks_per_period = self._ensure("max_tasks_per_period", kwargs, int)
+        self.target_batch_size = self._ensure("target_batch_size", kwargs, int)
+        self.max_batch_age = self._ensure("max_batch_age", kwargs, float)
+        self.completion_rate_window = self._ensure(
+            "completion_rate_window", kwargs, float
+        )
+        self.batching_controller = BatchingController(
+            target_batch_size=self.target_batch_size,
+            max_batch_size=self.max_tasks_per_period,
+            max_batch_age=self.max_batch_age,
+            rate_window=self.completion_rate_window,
+        )
+        self.use_ipfs_for_pooling = self._ensure("use_ipfs_for_pooling", kwargs, bool)
+        self.multisend_max_gas = self._ensure("multisend_max_gas", kwargs, int)
+        self.multisend_max_data_size = self._ensure(
+            "multisend_max_data_size", kwargs, int
+        )
+        self.deliver_gas_overhead = self._ensure("deliver_gas_overhead", kwargs, int)
         self.multisend_address = kwargs.get("multisend_address", None)
         if self.multisend_address is None:
             raise ValueError("No multisend_address specified!")
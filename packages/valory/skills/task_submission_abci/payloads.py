@@ -36,3 +36,4 @@ class TransactionPayload(BaseTxPayload):
     """Represent a transaction payload for the TransactionPreparationRound."""
 
     content: str
+    delivered_tasks: int
@@ -39,6 +39,12 @@ from packages.valory.skills.task_submission_abci.payloads import (
 )
 
 
+# the keys of a pooling payload which references a batch of done tasks stored on IPFS
+BATCH_HASH = "ipfs_hash"
+BATCH_DIGEST = "digest"
+BATCH_REQUEST_IDS = "request_ids"
+
+
 class Event(Enum):
     """TaskSubmissionAbciApp Events"""
 
@@ -88,17 +94,44 @@ class TaskPoolingRound(CollectionRound):
     def end_block(self) -> Optional[Tuple[BaseSynchronizedData, Event]]:
         """Process the end of the block."""
         if self.collection_threshold_reached:
-            all_done_tasks = []
-            for payload in self.collection.values():
+            # index the tasks by request id, if more than one agent has done the same task,
+            # the one of the agent with the lowest address wins, so that all the agents pick the same one
+            merged_done_tasks: Dict[Any, Dict[str, Any]] = {}
+            duplicates: Dict[Any, int] = {}
+            for sender in sorted(self.collection):
+                payload = self.collection[sender]
                 done_tasks_str = cast(TaskPoolingPayload, payload).content
                 done_tasks = json.loads(done_tasks_str)
-                all_done_tasks.extend(done_tasks)
-            all_done_tasks = sorted(all_done_tasks, key=lambda x: x["request_id"])
+                if isinstance(done_tasks, dict):
+                    # the batch is stored on IPFS, only its reference is agreed upon
+                    done_tasks = [
+                        {
+                            "request_id": request_id,
+                            BATCH_HASH: done_tasks[BATCH_HASH],
+                            BATCH_DIGEST: done_tasks[BATCH_DIGEST],
+                        }
+                        for request_id in done_tasks[BATCH_REQUEST_IDS]
+                    ]
+                for done_task in done_tasks:
+                    request_id = done_task["request_id"]
+                    if request_id in merged_done_tasks:
+                        duplicates[request_id] = duplicates.get(request_id, 0) + 1
+                        continue
+                    merged_done_tasks[request_id] = done_task
+
+            if len(duplicates) > 0:
+                self.context.logger.warning(
+                    f"{sum(duplicates.values())} duplicate done tasks were pooled and discarded: {duplicates}"
+                )
+            all_done_tasks = [
+                merged_done_tasks[request_id]
+                for request_id in sorted(merged_done_tasks)
+            ]
             synchronized_data = self.synchronized_data.update(
                 synchronized_data_class=SynchronizedData,
                 **{
                     get_name(SynchronizedData.done_tasks): all_done_tasks,
-                }
+                },
             )
             if len(all_done_tasks) > 0:
                 return synchronized_data, Event.DONE
@@ -125,18 +158,21 @@ class TransactionPreparationRound(CollectSameUntilThresholdRound):
                         synchronized_data_class=SynchronizedData,
                         **{
                             get_name(SynchronizedData.done_tasks): [],
-                        }
+                        },
                     ),
                     Event.ERROR,
                 )
 
+            tx_hash, delivered_tasks = self.most_voted_payload_values
+            # only the tasks which fit in the multisend tx are delivered in this period,
+            # the rest remain in the agents' queues, and are carried forward to the next one
+            done_tasks = self.synchronized_data.done_tasks[:delivered_tasks]
             state = self.synchronized_data.update(
                 synchronized_data_class=self.synchronized_data_class,
                 **{
-                    get_name(
-                        SynchronizedData.most_voted_tx_hash
-                    ): self.most_voted_payload,
-                }
+                    get_name(SynchronizedData.most_voted_tx_hash): tx_hash,
+                    get_name(SynchronizedData.done_tasks): done_tasks,
+                },
             )
             return state, Event.DONE
         if not self.is_majority_possible(
@@ -148,7 +184,7 @@ class TransactionPreparationRound(CollectSameUntilThresholdRound):
                     synchronized_data_class=SynchronizedData,
                     **{
                         get_name(SynchronizedData.done_tasks): [],
-                    }
+                    },
                 ),
                 Event.NO_MAJORITY,
             )
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the batching.py module of the skill."""
+
+# pylint: skip-file
+
+from typing import Optional
+
+import pytest
+
+from packages.valory.skills.task_execution.utils.done_tasks import DoneTaskStore
+from packages.valory.skills.task_submission_abci.batching import (
+    BatchingController,
+    FlushReason,
+)
+
+
+TARGET_BATCH_SIZE = 5
+MAX_BATCH_SIZE = 10
+MAX_BATCH_AGE = 10.0
+RATE_WINDOW = 10.0
+NOW = 1000.0
+
+
+def _controller() -> BatchingController:
+    """Get a batching controller."""
+    return BatchingController(
+        target_batch_size=TARGET_BATCH_SIZE,
+        max_batch_size=MAX_BATCH_SIZE,
+        max_batch_age=MAX_BATCH_AGE,
+        rate_window=RATE_WINDOW,
+    )
+
+
+class TestBatchingController:
+    """Test `BatchingController`."""
+
+    @pytest.mark.parametrize(
+        "available, age, expected",
+        (
+            (0, 0.0, None),
+            (MAX_BATCH_SIZE, 0.0, FlushReason.MAX_SIZE),
+            (TARGET_BATCH_SIZE, 0.0, FlushReason.TARGET_SIZE),
+            (1, MAX_BATCH_AGE, FlushReason.MAX_AGE),
+        ),
+    )
+    def test_flush_reason(
+        self, available: int, age: float, expected: Optional[FlushReason]
+    ) -> None:
+        """Test the flush decisions which do not depend on the completion rate."""
+        controller = _controller()
+        oldest_added_at = NOW - age if available > 0 else None
+        reason = controller.flush_reason(available, available, oldest_added_at, NOW)
+        assert reason == expected
+
+    def test_wait_while_tasks_arrive(self) -> None:
+        """Test that the controller keeps waiting only while the next task is expected before the batch gets too old."""
+        controller = _controller()
+        # 2 tasks per second
+        controller.observe(20, NOW - 1)
+        assert controller.completion_rate == 2.0
+        assert controller.flush_reason(1, 20, NOW - 1, NOW) is None
+        # the next task is not expected before the oldest one reaches its maximum age
+        reason = controller.flush_reason(1, 20, NOW - MAX_BATCH_AGE + 0.1, NOW)
+        assert reason == FlushReason.NO_EXPECTED_GAIN
+
+    def test_no_arrivals(self) -> None:
+        """Test that the available tasks are pooled right away if no tasks are getting done."""
+        controller = _controller()
+        assert controller.flush_reason(1, 0, NOW, NOW) == FlushReason.NO_EXPECTED_GAIN
+
+    def test_rate_window(self) -> None:
+        """Test that only the recent arrivals count towards the completion rate."""
+        controller = _controller()
+        controller.observe(5, NOW)
+        controller.observe(8, NOW + RATE_WINDOW / 2)
+        assert controller.completion_rate == 8 / RATE_WINDOW
+        controller.observe(8, NOW + RATE_WINDOW + 1)
+        assert controller.completion_rate == 3 / RATE_WINDOW
+
+    def test_released_tasks_are_not_arrivals(self) -> None:
+        """Test that the tasks which become available again, because their batch was not delivered, are not counted."""
+        store = DoneTaskStore()
+        controller = _controller()
+        for request_id in range(3):
+            store.add({"request_id": request_id})
+        controller.observe(store.added, NOW)
+        store.assign(range(3), batch_id=0)
+        assert store.available() == 0
+        controller.observe(store.added, NOW + 1)
+
+        assert store.release() == 3
+        # a task done again is not counted twice either
+        store.add({"request_id": 0})
+        controller.observe(store.added, NOW + 2)
+        assert store.available() == 3
+        assert controller.completion_rate == 3 / RATE_WINDOW
+
+    def test_record_flush(self) -> None:
+        """Test the distributions of the recorded batches."""
+        controller = _controller()
+        assert controller.distributions() == {}
+        controller.record_flush(0, None, FlushReason.TIMEOUT, NOW)
+        for size in range(1, 11):
+            controller.record_flush(size, NOW - size, FlushReason.TARGET_SIZE, NOW)
+
+        assert controller.flushes[FlushReason.TIMEOUT] == 1
+        assert controller.flushes[FlushReason.TARGET_SIZE] == 10
+        assert controller.distributions() == {
+            "size": (5, 9, 10),
+            "age": (5.0, 9.0, 10.0),
+        }
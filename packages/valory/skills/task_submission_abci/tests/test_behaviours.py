@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the behaviours.py module of the skill."""
+
+# pylint: skip-file
+
+import time
+from typing import Any, Dict, Generator, List, Optional
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from packages.valory.skills.abstract_round_abci.base import AbciAppDB
+from packages.valory.skills.task_execution.utils.done_tasks import DoneTaskStore
+from packages.valory.skills.task_submission_abci.behaviours import (
+    DONE_TASKS,
+    FINAL_TX_HASH,
+    LOG_DATA_BYTE_GAS,
+    NON_ZERO_BYTE_GAS,
+    POOLING_WINDOW_OPENED_AT,
+    TaskPoolingBehaviour,
+    TransactionPreparationBehaviour,
+    batch_digest,
+)
+from packages.valory.skills.task_submission_abci.rounds import (
+    BATCH_DIGEST,
+    BATCH_HASH,
+    SynchronizedData,
+)
+
+
+MECH_ADDRESS = "0x" + "1" * 40
+DELIVER_GAS_OVERHEAD = 1000
+DELIVER_DATA_SIZE = 100
+# the deliver calldata is all non-zero bytes, and is logged
+DELIVER_GAS = DELIVER_GAS_OVERHEAD + (NON_ZERO_BYTE_GAS + LOG_DATA_BYTE_GAS) * (
+    DELIVER_DATA_SIZE
+)
+UNLIMITED = 10**9
+
+
+def _behaviour(
+    max_gas: int = UNLIMITED, max_data_size: int = UNLIMITED
+) -> TransactionPreparationBehaviour:
+    """Get a `TransactionPreparationBehaviour` with the given multisend budget."""
+    context = MagicMock()
+    context.params.deliver_gas_overhead = DELIVER_GAS_OVERHEAD
+    context.params.multisend_max_gas = max_gas
+    context.params.multisend_max_data_size = max_data_size
+    return TransactionPreparationBehaviour(
+        name="transaction_preparation", skill_context=context
+    )
+
+
+def _run(generator: Generator) -> Any:
+    """Run a generator which does not wait for anything, and get its return value."""
+    with pytest.raises(StopIteration) as stop:
+        next(generator)
+    return stop.value.value
+
+
+def _deliver_tx(size: int = DELIVER_DATA_SIZE) -> Dict[str, Any]:
+    """Get a deliver tx, with `size` bytes of calldata."""
+    return {"to": MECH_ADDRESS, "value": 0, "data": "0x" + "ff" * size}
+
+
+def _done_tasks(n: int) -> List[Dict[str, Any]]:
+    """Get `n` done tasks."""
+    return [{"request_id": request_id} for request_id in range(n)]
+
+
+class TestFitToMultisend:
+    """Test `TransactionPreparationBehaviour._fit_to_multisend`."""
+
+    def test_all_fit(self) -> None:
+        """Test that all the tasks are selected if they fit in the budget."""
+        behaviour = _behaviour()
+        deliver_txs = [_deliver_tx() for _ in range(3)]
+        selected = behaviour._fit_to_multisend(_done_tasks(3), deliver_txs)
+        assert selected == [[tx] for tx in deliver_txs]
+        behaviour.context.logger.info.assert_not_called()
+
+    def test_estimate_gas(self) -> None:
+        """Test the deterministic gas estimate of a call."""
+        behaviour = _behaviour()
+        tx = {"data": bytes([0, 0, 1])}
+        assert behaviour._estimate_gas(tx, logs_data=False) == (
+            DELIVER_GAS_OVERHEAD + 2 * 4 + NON_ZERO_BYTE_GAS
+        )
+        assert behaviour._estimate_gas(_deliver_tx(), logs_data=True) == DELIVER_GAS
+
+    @pytest.mark.parametrize(
+        "max_gas, max_data_size",
+        (
+            (2 * DELIVER_GAS, UNLIMITED),
+            (UNLIMITED, 2 * DELIVER_DATA_SIZE),
+            (2 * DELIVER_GAS + 1, 3 * DELIVER_DATA_SIZE - 1),
+        ),
+    )
+    def test_budget(self, max_gas: int, max_data_size: int) -> None:
+        """Test that the tasks are selected in order, until the gas or the data size budget is exhausted."""
+        behaviour = _behaviour(max_gas, max_data_size)
+        deliver_txs = [_deliver_tx() for _ in range(4)]
+        selected = behaviour._fit_to_multisend(_done_tasks(4), deliver_txs)
+        assert selected == [[deliver_txs[0]], [deliver_txs[1]]]
+        behaviour.context.logger.info.assert_called_once()
+        assert "2 tasks are carried forward" in str(
+            behaviour.context.logger.info.call_args
+        )
+
+    def test_response_tx(self) -> None:
+        """Test that the response tx of a task is delivered along with it, and counts towards the budget."""
+        behaviour = _behaviour(max_data_size=2 * DELIVER_DATA_SIZE)
+        response_tx = {"to": MECH_ADDRESS, "value": 0, "data": "0x" + "ff" * 10}
+        done_tasks = _done_tasks(2)
+        done_tasks[0]["transaction"] = response_tx
+        deliver_txs = [_deliver_tx() for _ in range(2)]
+        selected = behaviour._fit_to_multisend(done_tasks, deliver_txs)
+        assert selected == [[deliver_txs[0], response_tx]]
+
+    @pytest.mark.parametrize(
+        "max_gas, max_data_size",
+        (
+            (DELIVER_GAS - 1, UNLIMITED),
+            (UNLIMITED, DELIVER_DATA_SIZE - 1),
+        ),
+    )
+    def test_first_task_exceeds_budget(self, max_gas: int, max_data_size: int) -> None:
+        """Test that a first task which exceeds the budget on its own is delivered alone."""
+        behaviour = _behaviour(max_gas, max_data_size)
+        deliver_txs = [_deliver_tx() for _ in range(3)]
+        selected = behaviour._fit_to_multisend(_done_tasks(3), deliver_txs)
+        assert selected == [[deliver_txs[0]]]
+        behaviour.context.logger.warning.assert_called_once()
+        assert "Delivering it alone" in str(behaviour.context.logger.warning.call_args)
+
+    def test_no_tasks(self) -> None:
+        """Test that nothing is selected if there are no tasks."""
+        assert _behaviour()._fit_to_multisend([], []) == []
+
+
+def test_batch_digest() -> None:
+    """Test that the digest of a batch does not depend on the order of the keys of its tasks."""
+    batch = [{"request_id": 1, "task_result": "result"}]
+    reordered = [{"task_result": "result", "request_id": 1}]
+    assert batch_digest(batch) == batch_digest(reordered)
+    assert batch_digest(batch) != batch_digest([{"request_id": 2}])
+
+
+class TestResolveDoneTasks:
+    """Test `TransactionPreparationBehaviour._resolve_done_tasks`."""
+
+    batch = [
+        {"request_id": 1, "task_result": "result_1"},
+        {"request_id": 2, "task_result": "result_2"},
+    ]
+
+    @classmethod
+    def _references(cls, ipfs_hash: str, digest: str) -> List[Dict[str, Any]]:
+        """Get the pooled references to the tasks of the batch."""
+        return [
+            {
+                "request_id": task["request_id"],
+                BATCH_HASH: ipfs_hash,
+                BATCH_DIGEST: digest,
+            }
+            for task in cls.batch
+        ]
+
+    def _resolve(
+        self,
+        done_tasks: List[Dict[str, Any]],
+        fetched: Dict[str, Optional[List[Dict[str, Any]]]],
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Resolve the pooled done tasks, with the given batches fetched from IPFS."""
+        behaviour = _behaviour()
+        behaviour.context.state.synchronized_data.done_tasks = done_tasks
+        requested = []
+
+        def get_many_from_ipfs(ipfs_hashes: Any, **_: Any) -> Generator:
+            """Get the batches from IPFS."""
+            requested.extend(ipfs_hashes)
+            return fetched
+            yield
+
+        with patch.object(behaviour, "get_many_from_ipfs", new=get_many_from_ipfs):
+            resolved = _run(behaviour._resolve_done_tasks())
+        # every batch is fetched once, no matter how many tasks it contains
+        assert sorted(requested) == sorted(fetched)
+        return resolved
+
+    def test_inline(self) -> None:
+        """Test that the tasks pooled inline are used as they are."""
+        assert self._resolve(self.batch, {}) == self.batch
+
+    def test_ipfs(self) -> None:
+        """Test that the tasks pooled via IPFS are replaced by the ones in their batch."""
+        inline = {"request_id": 0, "task_result": "result_0"}
+        done_tasks = [inline] + self._references("hash", batch_digest(self.batch))
+        resolved = self._resolve(done_tasks, {"hash": self.batch})
+        assert resolved == [inline] + self.batch
+
+    def test_same_request_in_many_batches(self) -> None:
+        """Test that each task is resolved from its own batch."""
+        other_batch = [{"request_id": 1, "task_result": "other_result_1"}]
+        done_tasks = self._references("hash", batch_digest(self.batch))
+        done_tasks.append(
+            {
+                "request_id": 1,
+                BATCH_HASH: "other_hash",
+                BATCH_DIGEST: batch_digest(other_batch),
+            }
+        )
+        resolved = self._resolve(
+            done_tasks, {"hash": self.batch, "other_hash": other_batch}
+        )
+        assert resolved == self.batch + other_batch
+
+    def test_fetch_failure(self) -> None:
+        """Test that the tasks cannot be resolved if a batch cannot be fetched."""
+        done_tasks = self._references("hash", batch_digest(self.batch))
+        assert self._resolve(done_tasks, {"hash": None}) is None
+
+    def test_digest_mismatch(self) -> None:
+        """Test that the tasks cannot be resolved if a batch does not match its digest."""
+        tampered = [dict(self.batch[0], task_result="tampered"), self.batch[1]]
+        done_tasks = self._references("hash", batch_digest(self.batch))
+        assert self._resolve(done_tasks, {"hash": tampered}) is None
+
+    def test_missing_task(self) -> None:
+        """Test that the tasks cannot be resolved if a task is missing from its batch."""
+        partial = self.batch[:1]
+        done_tasks = self._references("hash", batch_digest(partial))
+        assert self._resolve(done_tasks, {"hash": partial}) is None
+
+
+class TestHandleSubmittedTasks:
+    """Test `TaskPoolingBehaviour.handle_submitted_tasks`."""
+
+    def _handle(self, settled: bool) -> DoneTaskStore:
+        """Handle the tasks submitted in the previous period, whose tx settlement succeeded or failed."""
+        store = DoneTaskStore()
+        for request_id in range(3):
+            store.add({"request_id": request_id})
+        # all the tasks were pooled, but only the first two fit in the multisend tx
+        store.assign(range(3), batch_id=0)
+        submitted_tasks = [{"request_id": 0}, {"request_id": 1}]
+
+        db = AbciAppDB(
+            setup_data=AbciAppDB.data_to_lists(
+                {
+                    "participants": ("agent_0",),
+                    "all_participants": ("agent_0",),
+                    "safe_contract_address": "safe",
+                    "consensus_threshold": 1,
+                    "done_tasks": submitted_tasks,
+                }
+            ),
+            cross_period_persisted_keys=frozenset({"done_tasks"}),
+        )
+        if settled:
+            db.update(**{FINAL_TX_HASH: "final_tx_hash"})
+        # reset and pause, the done tasks are persisted across periods
+        db.create()
+
+        context = MagicMock()
+        context.shared_state = {DONE_TASKS: store}
+        context.state.synchronized_data = SynchronizedData(db)
+        behaviour = TaskPoolingBehaviour(name="task_pooling", skill_context=context)
+        assert behaviour.is_previous_batch_settled == settled
+        behaviour.handle_submitted_tasks()
+        return store
+
+    def test_settled(self) -> None:
+        """Test that the delivered tasks are removed, and the rest are pooled again."""
+        store = self._handle(settled=True)
+        assert [task["request_id"] for task in store.snapshot()] == [2]
+        assert store.assigned == 0
+        # the delivered tasks are never delivered again
+        assert not store.add({"request_id": 0})
+
+    def test_failed(self) -> None:
+        """Test that no task is removed if the settlement failed, they are all pooled again."""
+        store = self._handle(settled=False)
+        assert [task["request_id"] for task in store.snapshot()] == [0, 1, 2]
+        assert store.assigned == 0
+
+
+class TestPoolingWindow:
+    """Test the pooling window, which opens once a tx hash is agreed upon."""
+
+    def _prepare(self, tx_hash: Optional[str]) -> Dict[str, Any]:
+        """Prepare the tx, with the given tx hash agreed upon, returns the shared state."""
+        db = AbciAppDB(setup_data=AbciAppDB.data_to_lists({"done_tasks": []}))
+        if tx_hash is not None:
+            db.update(most_voted_tx_hash=tx_hash)
+        behaviour = _behaviour()
+        behaviour.context.shared_state = {}
+        behaviour.context.state.synchronized_data = SynchronizedData(db)
+
+        def noop(*_: Any) -> Generator:
+            """Do not wait for anything."""
+            return
+            yield
+
+        def get_payload_content() -> Generator:
+            """Get the payload content."""
+            return "payload", 1
+            yield
+
+        with patch.object(
+            behaviour, "get_payload_content", new=get_payload_content
+        ), patch.object(behaviour, "send_a2a_transaction", new=noop), patch.object(
+            behaviour, "wait_until_round_end", new=noop
+        ), patch.object(
+            behaviour, "set_done"
+        ):
+            _run(behaviour.async_act())
+        return behaviour.context.shared_state
+
+    def test_opened_on_tx_hash(self) -> None:
+        """Test that the window opens once the agents agree on a tx hash."""
+        assert POOLING_WINDOW_OPENED_AT in self._prepare("tx_hash")
+
+    def test_closed_on_error(self) -> None:
+        """Test that the window does not open if the agents agreed on an error or on nothing."""
+        assert POOLING_WINDOW_OPENED_AT not in self._prepare(None)
+
+    def test_take_pooling_timeout(self) -> None:
+        """Test that the time spent since the window opened is deducted once."""
+        context = MagicMock()
+        context.params.task_wait_timeout = 10.0
+        context.shared_state = {POOLING_WINDOW_OPENED_AT: time.time() - 4.0}
+        behaviour = TaskPoolingBehaviour(name="task_pooling", skill_context=context)
+        assert behaviour._take_pooling_timeout() <= 6.0
+        assert behaviour._take_pooling_timeout() == 10.0
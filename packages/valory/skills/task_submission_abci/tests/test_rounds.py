@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""Test the rounds.py module of the skill."""
+
+# pylint: skip-file
+
+import json
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, cast
+from unittest.mock import MagicMock
+
+import pytest
+
+from packages.valory.skills.abstract_round_abci.base import get_name
+from packages.valory.skills.abstract_round_abci.test_tools.rounds import (
+    BaseCollectSameUntilThresholdRoundTest,
+)
+from packages.valory.skills.task_submission_abci.payloads import (
+    TaskPoolingPayload,
+    TransactionPayload,
+)
+from packages.valory.skills.task_submission_abci.rounds import (
+    BATCH_DIGEST,
+    BATCH_HASH,
+    BATCH_REQUEST_IDS,
+    Event,
+)
+from packages.valory.skills.task_submission_abci.rounds import (
+    SynchronizedData as TaskSubmissionSynchronizedData,
+)
+from packages.valory.skills.task_submission_abci.rounds import (
+    TaskPoolingRound,
+    TransactionPreparationRound,
+)
+
+
+DUMMY_TX_HASH = "tx_hash"
+
+
+def get_done_tasks(n: int) -> List[Dict[str, Any]]:
+    """Get `n` done tasks."""
+    return [
+        {"request_id": request_id, "task_result": f"result_{request_id}"}
+        for request_id in range(n)
+    ]
+
+
+def get_participant_to_tx_payload(
+    participants: FrozenSet[str], content: str, delivered_tasks: int
+) -> Dict[str, TransactionPayload]:
+    """Get the same transaction payload from every participant."""
+    return {
+        participant: TransactionPayload(
+            sender=participant, content=content, delivered_tasks=delivered_tasks
+        )
+        for participant in participants
+    }
+
+
+class TestTaskPoolingRound(BaseCollectSameUntilThresholdRoundTest):
+    """Test `TaskPoolingRound`."""
+
+    _synchronized_data_class = TaskSubmissionSynchronizedData
+    _event_class = Event
+
+    def _end_block(
+        self, contents: Dict[str, Any]
+    ) -> Optional[Tuple[TaskSubmissionSynchronizedData, Event]]:
+        """Process the pooling payload of each sender and end the block."""
+        test_round = TaskPoolingRound(
+            synchronized_data=self.synchronized_data, context=MagicMock()
+        )
+        for sender, content in contents.items():
+            payload = TaskPoolingPayload(sender=sender, content=json.dumps(content))
+            test_round.process_payload(payload)
+        res = test_round.end_block()
+        if res is None:
+            return None
+        synchronized_data, event = res
+        return cast(TaskSubmissionSynchronizedData, synchronized_data), cast(
+            Event, event
+        )
+
+    def test_threshold_not_reached(self) -> None:
+        """Test that the round waits for enough agents to pool their tasks."""
+        first, second, *_ = sorted(self.participants)
+        done_tasks = get_done_tasks(1)
+        assert self._end_block({first: done_tasks, second: done_tasks}) is None
+
+    def test_json(self) -> None:
+        """Test that the tasks pooled inline by the agents are merged, sorted by request id."""
+        first, second, third, _ = sorted(self.participants)
+        done_tasks = get_done_tasks(4)
+        res = self._end_block(
+            {
+                first: [done_tasks[3], done_tasks[0]],
+                second: [done_tasks[2]],
+                third: [done_tasks[1]],
+            }
+        )
+        assert res is not None
+        synchronized_data, event = res
+        assert event == Event.DONE
+        assert synchronized_data.done_tasks == done_tasks
+
+    def test_ipfs(self) -> None:
+        """Test that only the references of the tasks pooled via IPFS are agreed upon."""
+        first, second, third, _ = sorted(self.participants)
+        reference = {
+            BATCH_HASH: "hash",
+            BATCH_DIGEST: "digest",
+            BATCH_REQUEST_IDS: [2, 1],
+        }
+        res = self._end_block({first: reference, second: [], third: get_done_tasks(1)})
+        assert res is not None
+        synchronized_data, event = res
+        assert event == Event.DONE
+        assert synchronized_data.done_tasks == [
+            get_done_tasks(1)[0],
+            {"request_id": 1, BATCH_HASH: "hash", BATCH_DIGEST: "digest"},
+            {"request_id": 2, BATCH_HASH: "hash", BATCH_DIGEST: "digest"},
+        ]
+
+    @pytest.mark.parametrize("reverse", (False, True))
+    def test_duplicates(self, reverse: bool) -> None:
+        """Test that a task done by several agents is delivered once, and that the agent with the lowest address wins."""
+        first, second, third, _ = sorted(self.participants)
+        contents = {
+            first: [{"request_id": 1, "task_result": "first"}],
+            second: [
+                {"request_id": 1, "task_result": "second"},
+                {"request_id": 2, "task_result": "second"},
+            ],
+            third: [{"request_id": 2, "task_result": "third"}],
+        }
+        # the order in which the payloads arrive does not matter
+        senders = sorted(contents, reverse=reverse)
+        res = self._end_block({sender: contents[sender] for sender in senders})
+        assert res is not None
+        synchronized_data, event = res
+        assert event == Event.DONE
+        assert synchronized_data.done_tasks == [
+            {"request_id": 1, "task_result": "first"},
+            {"request_id": 2, "task_result": "second"},
+        ]
+
+    def test_no_tasks(self) -> None:
+        """Test that the period finishes if no agent has pooled any tasks."""
+        res = self._end_block({sender: [] for sender in self.participants})
+        assert res is not None
+        synchronized_data, event = res
+        assert event == Event.NO_TASKS
+        assert synchronized_data.done_tasks == []
+
+
+class TestTransactionPreparationRound(BaseCollectSameUntilThresholdRoundTest):
+    """Test `TransactionPreparationRound`."""
+
+    _synchronized_data_class = TaskSubmissionSynchronizedData
+    _event_class = Event
+
+    def _round(self, done_tasks: List[Dict[str, Any]]) -> TransactionPreparationRound:
+        """Get the round, with the given pooled done tasks."""
+        synchronized_data = self.synchronized_data.update(
+            **{get_name(TaskSubmissionSynchronizedData.done_tasks): done_tasks}
+        )
+        return TransactionPreparationRound(
+            synchronized_data=synchronized_data, context=MagicMock()
+        )
+
+    def _end_block(
+        self,
+        test_round: TransactionPreparationRound,
+        content: str,
+        delivered_tasks: int,
+    ) -> Tuple[TaskSubmissionSynchronizedData, Event]:
+        """Process the same payload from all the participants and end the block."""
+        payloads = get_participant_to_tx_payload(
+            self.participants, content, delivered_tasks
+        )
+        for payload in payloads.values():
+            test_round.process_payload(payload)
+        assert test_round.threshold_reached
+        res = test_round.end_block()
+        assert res is not None
+        synchronized_data, event = res
+        return cast(TaskSubmissionSynchronizedData, synchronized_data), event
+
+    @pytest.mark.parametrize("delivered_tasks", (1, 3, 5))
+    def test_run(self, delivered_tasks: int) -> None:
+        """Test that only the tasks which fit in the multisend tx are kept as done."""
+        done_tasks = get_done_tasks(5)
+        test_round = self._round(done_tasks)
+        synchronized_data, event = self._end_block(
+            test_round, DUMMY_TX_HASH, delivered_tasks
+        )
+        assert event == Event.DONE
+        assert synchronized_data.most_voted_tx_hash == DUMMY_TX_HASH
+        assert synchronized_data.done_tasks == done_tasks[:delivered_tasks]
+
+    def test_error(self) -> None:
+        """Test that no task is kept as done if the tx could not be prepared."""
+        test_round = self._round(get_done_tasks(2))
+        synchronized_data, event = self._end_block(
+            test_round, TransactionPreparationRound.ERROR_PAYLOAD, 0
+        )
+        assert event == Event.ERROR
+        assert synchronized_data.done_tasks == []
+
+    def test_no_majority(self) -> None:
+        """Test that no task is kept as done if the agents cannot agree on a tx."""
+        test_round = self._round(get_done_tasks(2))
+        self._test_no_majority_event(test_round)
+        assert test_round.synchronized_data.done_tasks == []
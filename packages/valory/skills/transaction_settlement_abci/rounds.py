@@ -382,7 +382,8 @@ class SelectKeeperTransactionSubmissionBAfterTimeoutRound(
         if self.threshold_reached:
             synchronized_data = cast(SynchronizedData, self.synchronized_data)
             keeper = synchronized_data.most_voted_keeper_address
-            missed_messages = synchronized_data.missed_messages
+            # copy the missed messages, as the db values are frozen in copy-on-write mode
+            missed_messages = dict(synchronized_data.missed_messages)
             missed_messages[keeper] += 1
 
             synchronized_data = cast(
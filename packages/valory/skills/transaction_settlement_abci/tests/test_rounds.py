@@ -517,6 +517,44 @@ class TestSelectKeeperTransactionSubmissionBAfterTimeoutRound(
         )
         assert synchronized_data.missed_messages == expected_missed_messages
 
+    def test_copy_on_write(self) -> None:
+        """Test that the missed messages are not modified in place, as they are frozen in a copy-on-write db."""
+        keeper = f"keeper{'-' * 36}"
+        keepers = f"{int(1).to_bytes(32, 'big').hex()}{keeper}"
+        synchronized_data = TransactionSettlementSynchronizedSata(
+            db=AbciAppDB(
+                setup_data=dict(
+                    participants=[tuple(self.participants)],
+                    all_participants=[tuple(self.participants)],
+                    consensus_threshold=[3],
+                    safe_contract_address=["test_address"],
+                    keepers=[keepers],
+                    missed_messages=[{keeper: 10}],
+                ),
+                cross_period_persisted_keys=frozenset({"keepers", "missed_messages"}),
+                copy_on_write=True,
+            )
+        )
+        stored_missed_messages = synchronized_data.missed_messages
+        test_round = self.test_class(
+            synchronized_data=synchronized_data, context=MagicMock()
+        )
+        most_voted_payload = int(1).to_bytes(32, "big").hex() + "new_keeper" + "-" * 32
+        for payload in get_participant_to_selection(
+            self.participants, most_voted_payload
+        ).values():
+            test_round.process_payload(payload)
+
+        result = test_round.end_block()
+        assert result is not None
+        next_synchronized_data, event = result
+        assert event == TransactionSettlementEvent.DONE
+        next_synchronized_data = cast(
+            TransactionSettlementSynchronizedSata, next_synchronized_data
+        )
+        assert next_synchronized_data.missed_messages == {keeper: 11}
+        assert stored_missed_messages == {keeper: 10}
+
 
 class TestFinalizationRound(BaseOnlyKeeperSendsRoundTest):
     """Test FinalizationRound."""
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2023 Valory AG
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+
+"""This module merges the benchmarks of all the agents of a service and reports the slowest behaviours and rounds."""
+
+import argparse
+import sys
+from pathlib import Path
+
+from packages.valory.skills.abstract_round_abci.benchmark import (
+    BenchmarkReport,
+    read_rollups,
+)
+
+
+def report_benchmarks(log_dir: Path, top: int) -> str:
+    """Merge the benchmark files of all the agents under a directory and format the report."""
+    report = BenchmarkReport()
+    for rollup in read_rollups(log_dir):
+        report.add(rollup)
+    return report.format(top)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "log_dir",
+        type=Path,
+        help="the `log_dir` of the benchmark tool, containing one directory per agent",
+    )
+    parser.add_argument("-n", "--top", type=int, default=10)
+    args = parser.parse_args()
+    if not args.log_dir.is_dir():
+        print(f"{args.log_dir} is not a directory.")
+        sys.exit(1)
+    print(report_benchmarks(args.log_dir, args.top))
@@ -212,6 +212,10 @@ def search_google(query: str, api_key: str, engine: str, num: int = 3) -> List[s
     return [result["link"] for result in search["items"]]
 
 
+# the spaCy model, loaded once by `warmup` or by the first task, and reused by the next ones
+nlp = None
+
+
 def download_spacy_model(model_name: str) -> None:
     """Downloads the specified spaCy language model if it is not already installed."""
     if not isinstance(model_name, str) or not model_name:
@@ -222,6 +226,15 @@ def download_spacy_model(model_name: str) -> None:
         print(f"{model_name} is already installed.")
 
 
+def load_spacy_model(model_name: str = "en_core_web_lg"):
+    """Loads the specified spaCy language model, downloading it if needed, or returns the already loaded one."""
+    global nlp  # pylint: disable=global-statement
+    if nlp is None:
+        download_spacy_model(model_name)
+        nlp = spacy.load(model_name)
+    return nlp
+
+
 def extract_event_date(doc_question) -> str:
     '''
     Extracts the event date from the event question if present.
@@ -924,6 +937,17 @@ def fetch_additional_information(
     return additional_informations
 
 
+def warmup() -> None:
+    """
+    Warm the tool up before it executes its first task.
+
+    Downloads the spaCy model if needed and loads it for `run` to reuse, along with the tiktoken encoding.
+    Calling it more than once is harmless.
+    """
+    load_spacy_model("en_core_web_lg")
+    tiktoken.get_encoding("cl100k_base")
+
+
 def run(**kwargs) -> Tuple[str, Optional[Dict[str, Any]]]:
     """
     Run the task with the given arguments.
@@ -949,9 +973,8 @@ def run(**kwargs) -> Tuple[str, Optional[Dict[str, Any]]]:
     if tool not in ALLOWED_TOOLS:
         raise ValueError(f"TOOL {tool} is not supported.")
 
-    # Load the spacy model
-    download_spacy_model("en_core_web_lg")
-    nlp = spacy.load("en_core_web_lg")
+    # Load the spacy model, unless the warmup already did
+    spacy_model = load_spacy_model("en_core_web_lg")
 
     # Get the LLM engine to be used
     engine = TOOL_TO_ENGINE[tool]
@@ -979,7 +1002,7 @@ def run(**kwargs) -> Tuple[str, Optional[Dict[str, Any]]]:
             engine="gpt-3.5-turbo",
             temperature=0.5,
             max_compl_tokens=max_compl_tokens,
-            nlp=nlp,
+            nlp=spacy_model,
             max_add_words=max_add_words,
             google_api_key=kwargs["api_keys"]["google_api_key"],
             google_engine=kwargs["api_keys"]["google_engine_id"],